@@ -0,0 +1,287 @@
+"""APB 주변장치 모델 (GPIO / UART / Timer)
+
+study/0827_code_review.md의 APB 슬레이브처럼 장치마다 0x1000 바이트
+주소 칸 하나를 차지한다. 장치는 Memory와 같은 read_*/write_* 인터페이스를
+가지므로 RISCVCore.attach_device()로 붙이면 데이터패스가 RAM과 똑같이
+(장치, 칸 내 오프셋)으로 접근한다. 주소 디코딩은 코어의 페이지 표가 맡는다.
+
+이 모델은 Store가 아닌 사이클마다 ExeReg 주소로 버스를 읽으므로, 장치
+레지스터 읽기에는 부수 효과가 없어야 한다 (UART 수신 바이트는 RXDATA에
+무엇이든 써야 다음 바이트로 넘어간다).
+"""
+from collections import deque
+
+APB_BASE = 0x10000000
+APB_SLOT_SIZE = 0x1000  # 슬레이브 한 칸 (PADDR[11:0])
+
+
+class ApbDevice:
+    """APB 슬레이브 기본 클래스 (워드 레지스터만 구현하면 된다)
+
+    바이트/하프워드 접근은 워드 레지스터의 해당 레인으로 처리한다.
+    레지스터 쓰기에는 부수 효과가 있어 이전 값을 다시 써서 되돌릴 수 없으므로
+    (undoable = False), 되돌리기 저널에는 Store 직전의 snapshot()이 남고
+    undo_step()은 restore()로 되돌린다. 이미 stream으로 내보낸 UART 문자는
+    되돌리지 못한다.
+    """
+    undoable = False
+    
+    def __init__(self, size=APB_SLOT_SIZE):
+        self.size = size
+        self.core = None
+        self.reset()
+    
+    def __len__(self):
+        return self.size
+    
+    def attach(self, core):
+        """코어에 붙을 때 호출 (사이클 수 등 코어 상태가 필요한 장치용)"""
+        self.core = core
+    
+    def reset(self):
+        """레지스터 초기화 (코어 reset() 때마다 호출)"""
+    
+    def read_register(self, offset):
+        """워드 레지스터 읽기 (offset은 4의 배수, 부수 효과 없이)"""
+        return 0
+    
+    def write_register(self, offset, value):
+        """워드 레지스터 쓰기 (offset은 4의 배수)"""
+    
+    def read_word(self, addr):
+        if 0 <= addr and addr + 3 < self.size:
+            lane = addr & 0x3
+            value = self.read_register(addr - lane) >> (8 * lane)
+            if lane:
+                value |= self.read_register(addr - lane + 4) << (32 - 8 * lane)
+            return value & 0xFFFFFFFF
+        return 0
+    
+    def read_half(self, addr):
+        return self.read_word(addr) & 0xFFFF if 0 <= addr and addr + 1 < self.size else 0
+    
+    def read_byte(self, addr):
+        return self.read_word(addr) & 0xFF if 0 <= addr < self.size else 0
+    
+    def _write_lanes(self, addr, value, mask):
+        if 0 <= addr < self.size:
+            lane = addr & 0x3
+            offset = addr - lane
+            old = self.read_register(offset)
+            shift = 8 * lane
+            self.write_register(offset, (old & ~(mask << shift) | (value & mask) << shift) & 0xFFFFFFFF)
+    
+    def write_word(self, addr, value):
+        self._write_lanes(addr, value, 0xFFFFFFFF)
+    
+    def write_half(self, addr, value):
+        self._write_lanes(addr, value, 0xFFFF)
+    
+    def write_byte(self, addr, value):
+        self._write_lanes(addr, value, 0xFF)
+    
+    def snapshot(self):
+        """레지스터 상태 복사본 (capture_state()용)"""
+        return None
+    
+    def restore(self, snapshot):
+        pass
+
+
+class Gpio(ApbDevice):
+    """GPIO (32핀)
+
+    0x00 MODE  핀별 방향 (1 = 출력)
+    0x04 ODR   출력 데이터
+    0x08 IDR   핀 값 (출력 핀은 ODR, 입력 핀은 set_inputs()로 준 값, 읽기 전용)
+    """
+    MODE = 0x00
+    ODR = 0x04
+    IDR = 0x08
+    
+    def __init__(self, size=APB_SLOT_SIZE, on_change=None):
+        self.on_change = on_change  # 출력 핀 값이 바뀌면 on_change(pins) 호출
+        self.inputs = 0
+        super().__init__(size)
+    
+    def reset(self):
+        self.mode = 0
+        self.odr = 0
+    
+    @property
+    def pins(self):
+        return (self.odr & self.mode) | (self.inputs & ~self.mode & 0xFFFFFFFF)
+    
+    def set_inputs(self, value):
+        """외부에서 입력 핀 값 설정"""
+        self.inputs = value & 0xFFFFFFFF
+    
+    def read_register(self, offset):
+        if offset == self.MODE:
+            return self.mode
+        if offset == self.ODR:
+            return self.odr
+        if offset == self.IDR:
+            return self.pins
+        return 0
+    
+    def write_register(self, offset, value):
+        before = self.odr & self.mode
+        if offset == self.MODE:
+            self.mode = value
+        elif offset == self.ODR:
+            self.odr = value
+        else:
+            return
+        if self.on_change is not None and self.odr & self.mode != before:
+            self.on_change(self.odr & self.mode)
+    
+    def snapshot(self):
+        return self.mode, self.odr
+    
+    def restore(self, snapshot):
+        self.mode, self.odr = snapshot
+
+
+class Uart(ApbDevice):
+    """UART (송신은 바로 완료, 수신은 feed()로 넣은 바이트)
+
+    0x00 TXDATA  쓰면 하위 바이트를 송신 (output에 쌓이고 stream이 있으면 바로 출력)
+    0x04 STATUS  bit0 송신 가능(항상 1), bit1 수신 데이터 있음
+    0x08 RXDATA  수신 바이트 (읽기는 그대로, 무엇이든 쓰면 다음 바이트로 넘어간다)
+    """
+    TXDATA = 0x00
+    STATUS = 0x04
+    RXDATA = 0x08
+    
+    def __init__(self, size=APB_SLOT_SIZE, stream=None):
+        self.stream = stream  # 송신 문자를 바로 쓸 텍스트 스트림 (예: sys.stdout)
+        super().__init__(size)
+    
+    def reset(self):
+        self.transmitted = bytearray()
+        self.received = deque()
+    
+    @property
+    def output(self):
+        """지금까지 송신한 문자열"""
+        return self.transmitted.decode('latin-1')
+    
+    def feed(self, data):
+        """수신 바이트 추가 (bytes 또는 str)"""
+        if isinstance(data, str):
+            data = data.encode('latin-1')
+        self.received.extend(data)
+    
+    def read_register(self, offset):
+        if offset == self.STATUS:
+            return 0x1 | (0x2 if self.received else 0)
+        if offset == self.RXDATA:
+            return self.received[0] if self.received else 0
+        return 0
+    
+    def write_register(self, offset, value):
+        if offset == self.TXDATA:
+            value &= 0xFF
+            self.transmitted.append(value)
+            if self.stream is not None:
+                self.stream.write(chr(value))
+        elif offset == self.RXDATA and self.received:
+            self.received.popleft()
+    
+    def snapshot(self):
+        return bytes(self.transmitted), tuple(self.received)
+    
+    def restore(self, snapshot):
+        transmitted, received = snapshot
+        self.transmitted = bytearray(transmitted)
+        self.received = deque(received)
+
+
+class Timer(ApbDevice):
+    """코어 사이클로 세는 타이머 (사이클마다 갱신하지 않고 읽을 때 계산)
+
+    0x00 CTRL      bit0 동작
+    0x04 PRESCALE  (PRESCALE + 1) 사이클마다 COUNT 1 증가
+    0x08 COUNT     현재 값 (쓰면 그 값에서 다시 센다)
+    0x0C COMPARE   비교 값
+    0x10 STATUS    bit0 COUNT >= COMPARE (읽기 전용)
+
+    명령어 단위 실행(step_instruction)에서는 명령어 시작 사이클 기준으로 읽으므로
+    사이클 모델보다 몇 사이클 작은 값이 보일 수 있다.
+    """
+    CTRL = 0x00
+    PRESCALE = 0x04
+    COUNT = 0x08
+    COMPARE = 0x0C
+    STATUS = 0x10
+    
+    def reset(self):
+        self.enabled = 0
+        self.prescale = 0
+        self.compare = 0
+        self.base_count = 0  # base_cycle 시점의 COUNT
+        self.base_cycle = 0
+    
+    def _cycle(self):
+        return self.core.cycle_count if self.core is not None else 0
+    
+    @property
+    def count(self):
+        if not self.enabled:
+            return self.base_count
+        return (self.base_count + (self._cycle() - self.base_cycle) // (self.prescale + 1)) & 0xFFFFFFFF
+    
+    def _rebase(self, count):
+        self.base_count = count
+        self.base_cycle = self._cycle()
+    
+    def read_register(self, offset):
+        if offset == self.CTRL:
+            return self.enabled
+        if offset == self.PRESCALE:
+            return self.prescale
+        if offset == self.COUNT:
+            return self.count
+        if offset == self.COMPARE:
+            return self.compare
+        if offset == self.STATUS:
+            return 1 if self.count >= self.compare else 0
+        return 0
+    
+    def write_register(self, offset, value):
+        if offset == self.CTRL:
+            count = self.count
+            self.enabled = value & 0x1
+            self._rebase(count)
+        elif offset == self.PRESCALE:
+            self._rebase(self.count)
+            self.prescale = value
+        elif offset == self.COUNT:
+            self._rebase(value)
+        elif offset == self.COMPARE:
+            self.compare = value
+    
+    def snapshot(self):
+        return self.enabled, self.prescale, self.compare, self.base_count, self.base_cycle
+    
+    def restore(self, snapshot):
+        self.enabled, self.prescale, self.compare, self.base_count, self.base_cycle = snapshot
+
+
+# 기본 주변장치 배치 (0x1000_0000 ~ 0x1000_2FFF는 RAM/GPO/GPI 칸으로 비워 둔다)
+DEFAULT_LAYOUT = (
+    ('gpio', APB_BASE + 0x3000, Gpio),
+    ('uart', APB_BASE + 0x4000, Uart),
+    ('timer', APB_BASE + 0x5000, Timer),
+)
+
+
+def attach_default_peripherals(core, uart_stream=None):
+    """GPIO / UART / Timer를 기본 주소에 붙이고 {이름: 장치}를 반환"""
+    devices = {}
+    for name, base, device_class in DEFAULT_LAYOUT:
+        device = device_class(stream=uart_stream) if device_class is Uart else device_class()
+        core.attach_device(base, device)
+        devices[name] = device
+    return devices
@@ -0,0 +1,250 @@
+"""여러 머신 동시 실행 (NumPy): python riscv_batch.py [code.mem] --lanes N [--random-ram WORDS]
+
+같은 ROM 프로그램을 초기 RAM/레지스터만 다른 N개 머신(레인)에서 한꺼번에
+실행한다. 레지스터 파일은 (N, 32) uint32, RAM은 (N, RAM 워드 수) uint32 배열이고
+명령어 하나를 모든 레인에 배열 연산 한 번으로 적용하므로, 머신마다 드는
+Python 오버헤드가 명령어마다 한 번으로 줄어든다.
+
+이 모델은 분기를 하지 않으므로(PC+4) 실행 경로가 데이터와 무관하다.
+그래서 PC, 사이클 수, 정지 여부는 모든 레인이 같고 스칼라 하나로 둔다
+(분기 발산 마스크가 필요 없다). 명령어마다 결과는 step_instruction()과 같다.
+
+RAM만 모델링한다 (추가 데이터 버스 영역이나 주변장치가 있는 코어는 받지 않는다).
+NumPy가 필요하다 (이 모듈만 쓴다).
+"""
+import sys
+
+import numpy as np
+
+from riscv_defines import (
+    FETCH, R_EXE, I_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE, S_EXE, L_EXE,
+    ADD, SUB, SLL, SRL, SRA, SLT, SLTU, XOR, OR, AND,
+)
+
+
+def _signed(value):
+    return value.astype(np.int32)
+
+
+# 레인 배열용 ALU 연산 (ALU_OPERATIONS와 같은 결과, 정의되지 않은 코드는 0)
+_ZERO_ALU = lambda a, b: np.zeros_like(a)
+BATCH_ALU_OPERATIONS = [_ZERO_ALU] * 0x10
+BATCH_ALU_OPERATIONS[ADD] = lambda a, b: a + b
+BATCH_ALU_OPERATIONS[SUB] = lambda a, b: a - b
+BATCH_ALU_OPERATIONS[SLL] = lambda a, b: a << (b & np.uint32(0x1F))
+BATCH_ALU_OPERATIONS[SRL] = lambda a, b: a >> (b & np.uint32(0x1F))
+BATCH_ALU_OPERATIONS[SRA] = lambda a, b: (_signed(a) >> _signed(b & np.uint32(0x1F))).astype(np.uint32)
+BATCH_ALU_OPERATIONS[SLT] = lambda a, b: (_signed(a) < _signed(b)).astype(np.uint32)
+BATCH_ALU_OPERATIONS[SLTU] = lambda a, b: (a < b).astype(np.uint32)
+BATCH_ALU_OPERATIONS[XOR] = lambda a, b: a ^ b
+BATCH_ALU_OPERATIONS[OR] = lambda a, b: a | b
+BATCH_ALU_OPERATIONS[AND] = lambda a, b: a & b
+BATCH_ALU_OPERATIONS = tuple(BATCH_ALU_OPERATIONS)
+
+_STORE_BYTES = {0: 4, 1: 1, 2: 2}  # ramControl -> 저장 바이트 수 (sw, sb, sh)
+
+
+class BatchCore:
+    """RISCVCore 하나를 본떠 만든 N개 레인 묶음
+
+    template은 명령어 경계(FETCH)에 있는 코어로, ROM(디코딩 캐시), 메모리 맵,
+    레지스터, RAM 내용, 사이클/명령어 수를 모든 레인의 시작 상태로 복사한다.
+    레인별 입력은 regfile / ram_words / ram_bytes 배열에 직접 쓰거나
+    write_words()로 넣는다. RAM은 N * RAM 크기 바이트를 차지한다.
+    """
+    
+    def __init__(self, template, lanes):
+        if template.extra_memories or template.devices:
+            raise ValueError("BatchCore는 RAM만 모델링합니다 (추가 버스 영역/주변장치 없는 코어만)")
+        if template.state != FETCH:
+            raise ValueError("template 코어가 명령어 경계(FETCH)에 있어야 합니다")
+        self.lanes = lanes
+        self.max_cycles = template.max_cycles
+        self.decode_cache = template.decode_cache
+        self.rom_base = template.rom_base
+        self.rom_last = template.rom_last
+        self.ram_base = template.ram_base
+        self.ram_size = template.ram_size
+        
+        # 레지스터 파일 (N, 32), x0 열은 항상 0
+        self.regfile = np.tile(np.array(template.regfile, dtype=np.uint32), (lanes, 1))
+        
+        # RAM (N, 워드 수), ram_bytes는 같은 버퍼의 바이트 뷰 (N, RAM 크기)
+        image = np.zeros(self.ram_size, dtype=np.uint8)
+        for offset, data in template.ram.iter_chunks():
+            image[offset:offset + len(data)] = np.frombuffer(data, dtype=np.uint8)[:self.ram_size - offset]
+        self.ram_bytes = np.tile(image, (lanes, 1))
+        self.ram_words = self.ram_bytes[:, :self.ram_size - self.ram_size % 4].view('<u4')
+        
+        # 레인마다 다른 파이프라인 레지스터 (나머지는 모든 레인이 같다)
+        pipe = template.pipe
+        self.exe_addr = np.full(lanes, pipe.ExeReg_aluResult, dtype=np.uint32)      # ExeReg_aluResult
+        self.bus_rdata = np.full(lanes, pipe.MemAccReg_busRData, dtype=np.uint32)   # MemAccReg_busRData
+        self.bus_wdata = np.full(lanes, pipe.MemAccReg_busWData, dtype=np.uint32)   # MemAccReg_busWData
+        
+        # 모든 레인에 공통인 실행 상태
+        self.pc = pipe.PCOutData
+        self.cycle_count = template.cycle_count
+        self.instruction_count = template.instruction_count
+        self.halted = template.halted
+        self.halt_reason = template.halt_reason
+        self._lane_index = np.arange(lanes)
+    
+    def write_words(self, offset, values):
+        """RAM offset부터 레인별 워드 쓰기 (values는 (N,) 또는 (N, 워드 수), offset은 4의 배수)"""
+        values = np.asarray(values, dtype=np.uint32)
+        if values.ndim == 1:
+            values = values[:, None]
+        index = offset // 4
+        self.ram_words[:, index:index + values.shape[1]] = values
+    
+    def read_words(self, offset, count=1):
+        """RAM offset부터 count 워드의 레인별 값 (N, count)"""
+        index = offset // 4
+        return self.ram_words[:, index:index + count].copy()
+    
+    def _read_bus(self, addr, current):
+        """레인별 버스 읽기 (RAM 밖 주소의 레인은 current 값을 유지)"""
+        offset = addr.astype(np.int64) - self.ram_base
+        size = self.ram_size
+        inside = (offset >= 0) & (offset < size)
+        if not inside.any():
+            return current
+        full = inside & (offset <= size - 4)
+        if full.all() and not (offset & 0x3).any():
+            return self.ram_words[self._lane_index, offset >> 2]
+        # 정렬되지 않았거나 끝에 걸친 주소 (Memory.read_word와 같이 끝에 걸치면 0)
+        index = np.where(full, offset, 0)
+        lanes = self._lane_index
+        data = self.ram_bytes
+        word = (data[lanes, index].astype(np.uint32)
+                | data[lanes, index + 1].astype(np.uint32) << 8
+                | data[lanes, index + 2].astype(np.uint32) << 16
+                | data[lanes, index + 3].astype(np.uint32) << 24)
+        return np.where(full, word, np.where(inside, np.uint32(0), current))
+    
+    def _store(self, addr, value, ram_control):
+        """레인별 sw/sb/sh (RAM 밖이거나 끝에 걸친 레인은 쓰지 않는다)"""
+        width = _STORE_BYTES.get(ram_control)
+        if width is None:
+            return
+        offset = addr.astype(np.int64) - self.ram_base
+        mask = (offset >= 0) & (offset <= self.ram_size - width)
+        if not mask.any():
+            return
+        if width == 4 and mask.all() and not (offset & 0x3).any():
+            self.ram_words[self._lane_index, offset >> 2] = value
+            return
+        lanes = self._lane_index[mask]
+        offset = offset[mask]
+        value = value[mask]
+        for k in range(width):
+            self.ram_bytes[lanes, offset + k] = (value >> np.uint32(8 * k)).astype(np.uint8)
+    
+    def halt(self, reason):
+        self.halted = True
+        self.halt_reason = reason
+        return False
+    
+    def step_instruction(self):
+        """모든 레인에서 명령어 하나 실행 (step_instruction()과 같은 결과). 정지하면 False
+
+        이번 명령어가 최대 사이클 수를 넘기면 실행하지 않고 정지한다
+        (사이클 모델처럼 명령어 중간까지 실행하지는 않는다).
+        """
+        if self.halted:
+            return False
+        pc = self.pc
+        if not self.rom_base <= pc <= self.rom_last:
+            self.cycle_count += 1
+            return self.halt(f"ROM 범위 초과 - 시뮬레이션 종료 (PC: 0x{pc:08X})")
+        decoded = self.decode_cache.lookup(pc)
+        if self.max_cycles is not None and self.cycle_count + decoded.cycles > self.max_cycles:
+            return self.halt("최대 사이클 수 도달 - 시뮬레이션 종료")
+        
+        regfile = self.regfile
+        rf_data1 = regfile[:, decoded.rs1].copy()
+        rf_data2 = regfile[:, decoded.rs2].copy()
+        
+        # FETCH/DECODE 사이클: 이전 명령어의 ExeReg 주소로 버스를 읽는다
+        bus_rdata = self._read_bus(self.exe_addr, self.bus_rdata)
+        
+        state = decoded.exe_state
+        if state != FETCH:
+            # DECODE: ExeReg = RF1 + RF2, 이후 사이클은 새 주소로 버스를 읽는다
+            addr = rf_data1 + rf_data2
+            bus_rdata = self._read_bus(addr, bus_rdata)
+            self.exe_addr = addr
+            
+            value = None
+            if state == R_EXE:
+                value = BATCH_ALU_OPERATIONS[decoded.operator](rf_data1, rf_data2)
+            elif state == I_EXE:
+                value = BATCH_ALU_OPERATIONS[decoded.alu_control](rf_data1, np.uint32(decoded.imm))
+            elif state == LU_EXE:
+                value = decoded.imm
+            elif state == AU_EXE:
+                value = (decoded.imm + pc + 4) & 0xFFFFFFFF
+            elif state in (J_EXE, JL_EXE):
+                value = (pc + 8) & 0xFFFFFFFF
+            elif state == L_EXE:
+                value = bus_rdata
+            elif state == S_EXE:
+                self.bus_wdata = rf_data2
+                self._store(addr, rf_data2, decoded.store_ram_control)
+            if value is not None and decoded.rd != 0:
+                regfile[:, decoded.rd] = value
+            self.instruction_count += 1
+        
+        self.bus_rdata = bus_rdata
+        self.pc = pc + 4
+        self.cycle_count += decoded.cycles
+        return True
+    
+    def run(self, max_instructions=None):
+        """정지할 때까지 (또는 max_instructions개) 실행하고 실행한 사이클 수를 반환"""
+        start = self.cycle_count
+        executed = 0
+        while max_instructions is None or executed < max_instructions:
+            if not self.step_instruction():
+                break
+            executed += 1
+        return self.cycle_count - start
+
+
+def main(argv=None):
+    import argparse
+    import time
+    from riscv_core import RISCVCore
+    
+    parser = argparse.ArgumentParser(description="같은 프로그램을 N개 머신에서 동시에 실행 (NumPy)")
+    parser.add_argument("program", nargs="?", default="code.mem", help="프로그램 이미지 (.mem / flat binary / ELF)")
+    parser.add_argument("--lanes", type=int, default=1024, help="머신 수")
+    parser.add_argument("--max-cycles", type=int, default=100000, help="최대 사이클 수")
+    parser.add_argument("--random-ram", type=int, default=0, metavar="WORDS",
+                        help="RAM 앞쪽 WORDS 워드를 레인마다 난수로 채운다")
+    parser.add_argument("--seed", type=int, default=0, help="--random-ram 난수 시드")
+    args = parser.parse_args(argv)
+    
+    template = RISCVCore(max_cycles=args.max_cycles)
+    template.load_image(args.program)
+    batch = BatchCore(template, args.lanes)
+    if args.random_ram:
+        rng = np.random.default_rng(args.seed)
+        batch.write_words(0, rng.integers(0, 1 << 32, size=(args.lanes, args.random_ram), dtype=np.uint32))
+    
+    start = time.perf_counter()
+    cycles = batch.run()
+    elapsed = time.perf_counter() - start
+    
+    outcomes = len(np.unique(batch.regfile, axis=0))
+    print(f"{args.lanes}개 레인, {cycles} 사이클 / {batch.instruction_count} 명령어 실행")
+    print(f"정지 사유: {batch.halt_reason}")
+    print(f"서로 다른 최종 레지스터 상태: {outcomes}개")
+    if elapsed > 0:
+        print(f"실행 시간: {elapsed:.3f}s ({cycles * args.lanes / elapsed:,.0f} lane-cycles/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
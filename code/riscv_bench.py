@@ -0,0 +1,662 @@
+"""마이크로 벤치마크: python riscv_bench.py [code.mem] [--repeat N]
+워크로드 벤치마크: python riscv_bench.py --suite [--json PATH] [--baseline PATH]
+
+예전 문자열 상태 / if-elif 체인 방식과 지금의 정수 상태 / 조회 표 방식을
+같은 입력 스트림으로 돌려 사이클당 비용을 비교한다.
+입력 스트림은 실제 프로그램을 사이클 모델로 실행하면서 기록한다.
+메모리 백엔드(BytewiseMemory / Memory / SparseMemory)도 같은 접근 패턴으로 비교한다.
+
+--suite는 code.mem, 버블 정렬, ALU 위주 코드, memcpy를 사이클 모델 /
+명령어 단위 / 블록 번역(매번 새 코어이므로 번역 전 속도)으로 실행해 cycles/s, instructions/s, 최대 RSS와
+함수 묶음별 시간(cProfile)을 JSON으로 남긴다. 워크로드별 최대 RSS는 새
+프로세스에서 따로 실행해 잰다. 결과 확인이 틀리면 JSON을 쓰지 않고 1을,
+--baseline으로 이전 버전의 JSON과 비교해 느려진 항목이 있어도 1을 반환한다.
+"""
+import os
+import random
+import sys
+import time
+
+from riscv_core import (ALU_OPERATIONS, CONTROL_TABLE, RAM_NONE, RAM_STORE, BytewiseMemory,
+                        ControlSignals, Memory, RegisterView, RISCVCore)
+from riscv_memmap import MemoryMap, SparseMemory
+from riscv_defines import FETCH, STATE_NAMES
+
+
+def legacy_alu(a, b, aluControl):
+    """예전 execute_alu (if/elif 체인)"""
+    a_signed = a if a < 0x80000000 else a - 0x100000000
+    b_signed = b if b < 0x80000000 else b - 0x100000000
+    
+    if aluControl == 0:  # ADD
+        result = (a + b) & 0xFFFFFFFF
+    elif aluControl == 8:  # SUB
+        result = (a - b) & 0xFFFFFFFF
+    elif aluControl == 1:  # SLL
+        result = (a << (b & 0x1F)) & 0xFFFFFFFF
+    elif aluControl == 5:  # SRL
+        result = (a >> (b & 0x1F)) & 0xFFFFFFFF
+    elif aluControl == 13:  # SRA
+        if a & 0x80000000:
+            result = ((a >> (b & 0x1F)) | (0xFFFFFFFF << (32 - (b & 0x1F)))) & 0xFFFFFFFF
+        else:
+            result = (a >> (b & 0x1F)) & 0xFFFFFFFF
+    elif aluControl == 2:  # SLT
+        result = 1 if a_signed < b_signed else 0
+    elif aluControl == 3:  # SLTU
+        result = 1 if a < b else 0
+    elif aluControl == 4:  # XOR
+        result = a ^ b
+    elif aluControl == 6:  # OR
+        result = a | b
+    elif aluControl == 7:  # AND
+        result = a & b
+    elif aluControl == 0x10:  # BEQ
+        result = 1 if a == b else 0
+    elif aluControl == 0x11:  # BNE
+        result = 1 if a != b else 0
+    elif aluControl == 0x14:  # BLT
+        result = 1 if a_signed < b_signed else 0
+    elif aluControl == 0x15:  # BGE
+        result = 1 if a_signed >= b_signed else 0
+    elif aluControl == 0x16:  # BLTU
+        result = 1 if a < b else 0
+    elif aluControl == 0x17:  # BGEU
+        result = 1 if a >= b else 0
+    else:
+        result = 0
+    
+    return result
+
+
+def legacy_control_unit(state, decoded):
+    """예전 execute_control_unit_state (문자열 비교 체인)
+
+    (다음 상태, 제어 신호, aluControl, ramControl)을 반환한다.
+    """
+    operator = decoded.operator
+    control_signals = {
+        'PCEn': 0, 'regFileWe': 0, 'aluSrcMuxSel': 0, 'busWe': 0,
+        'RFWDSrcMuxSel': 0, 'branch': 0, 'jal': 0, 'jalr': 0
+    }
+    aluControl = 0
+    ramControl = 0
+    next_state = state
+    
+    if state == 'FETCH':
+        control_signals['PCEn'] = 1
+        next_state = 'DECODE'
+    elif state == 'DECODE':
+        next_state = STATE_NAMES[decoded.exe_state]
+    elif state == 'R_EXE':
+        aluControl = operator
+        control_signals['regFileWe'] = 1
+        next_state = 'FETCH'
+    elif state == 'I_EXE':
+        control_signals['regFileWe'] = 1
+        control_signals['aluSrcMuxSel'] = 1
+        aluControl = operator if operator == 0xD else operator & 0x7
+        next_state = 'FETCH'
+    elif state == 'B_EXE':
+        control_signals['branch'] = 1
+        aluControl = operator
+        next_state = 'FETCH'
+    elif state == 'LU_EXE':
+        control_signals['regFileWe'] = 1
+        control_signals['RFWDSrcMuxSel'] = 2
+        next_state = 'FETCH'
+    elif state == 'AU_EXE':
+        control_signals['regFileWe'] = 1
+        control_signals['RFWDSrcMuxSel'] = 3
+        next_state = 'FETCH'
+    elif state == 'J_EXE':
+        control_signals['regFileWe'] = 1
+        control_signals['RFWDSrcMuxSel'] = 4
+        control_signals['jal'] = 1
+        next_state = 'FETCH'
+    elif state == 'JL_EXE':
+        control_signals['regFileWe'] = 1
+        control_signals['RFWDSrcMuxSel'] = 4
+        control_signals['jal'] = 1
+        control_signals['jalr'] = 1
+        next_state = 'FETCH'
+    elif state == 'S_EXE':
+        control_signals['aluSrcMuxSel'] = 1
+        next_state = 'S_MEM'
+    elif state == 'S_MEM':
+        control_signals['aluSrcMuxSel'] = 1
+        control_signals['busWe'] = 1
+        ramControl = decoded.store_ram_control
+        next_state = 'FETCH'
+    elif state == 'L_EXE':
+        control_signals['aluSrcMuxSel'] = 1
+        control_signals['RFWDSrcMuxSel'] = 1
+        next_state = 'L_MEM'
+    elif state == 'L_MEM':
+        control_signals['aluSrcMuxSel'] = 1
+        control_signals['RFWDSrcMuxSel'] = 1
+        ramControl = decoded.load_ram_control
+        next_state = 'L_WB'
+    elif state == 'L_WB':
+        control_signals['regFileWe'] = 1
+        control_signals['aluSrcMuxSel'] = 1
+        control_signals['RFWDSrcMuxSel'] = 1
+        next_state = 'FETCH'
+    
+    return next_state, control_signals, aluControl, ramControl
+
+
+def table_control_unit(state, decoded, signals):
+    """지금의 execute_control_unit_state와 같은 CONTROL_TABLE 조회 (signals를 제자리 갱신)"""
+    signal_values, next_state, completes, uses_alu_control, ram_source = CONTROL_TABLE[state]
+    (signals.PCEn, signals.regFileWe, signals.aluSrcMuxSel, signals.busWe,
+     signals.RFWDSrcMuxSel, signals.branch, signals.jal, signals.jalr) = signal_values
+    if next_state is None:
+        next_state = decoded.exe_state
+    aluControl = decoded.alu_control if uses_alu_control else 0
+    if ram_source == RAM_NONE:
+        ramControl = 0
+    elif ram_source == RAM_STORE:
+        ramControl = decoded.store_ram_control
+    else:
+        ramControl = decoded.load_ram_control
+    return next_state, aluControl, ramControl
+
+
+def record_streams(path, max_cycles=None):
+    """프로그램을 사이클 모델로 실행하며 (상태, 디코딩 레코드)와 ALU 입력을 기록"""
+    core = RISCVCore(max_cycles=max_cycles)
+    core.load_code(path)
+    control_stream = []
+    alu_stream = []
+    while True:
+        state = core.state
+        if state != FETCH:
+            control_stream.append((state, core.current_decoded))
+        if not core.step():
+            break
+        pipeline = core.pipeline_registers
+        b = pipeline['DecReg_immExt'] if core.control_signals['aluSrcMuxSel'] else pipeline['DecReg_RFData2']
+        alu_stream.append((pipeline['DecReg_RFData1'], b, core.aluControl))
+    return control_stream, alu_stream
+
+
+def _best_of(repeat, func, *args):
+    """repeat번 실행한 최소 시간 (초)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _run_alu(alu, stream):
+    for a, b, aluControl in stream:
+        alu(a, b, aluControl)
+
+
+def _run_alu_table(stream):
+    for a, b, aluControl in stream:
+        ALU_OPERATIONS[aluControl](a, b)
+
+
+def _run_control(control_unit, stream, *args):
+    for state, decoded in stream:
+        control_unit(state, decoded, *args)
+
+
+def _run_core(path, cycles, memory_class=Memory):
+    """cycles 사이클을 채울 때까지 프로그램을 처음부터 반복 실행"""
+    done = 0
+    while done < cycles:
+        core = RISCVCore(max_cycles=cycles - done, memory_class=memory_class)
+        core.load_code(path)
+        done += core.run()
+
+
+MEMORY_OPS = ('read_byte', 'read_half', 'read_word', 'write_byte', 'write_half', 'write_word')
+
+
+def memory_stream(count, size=1024, seed=0):
+    """RAM 접근 패턴 (연산 이름, 주소, 값). 워드 접근 위주, 끝 경계 주소 포함"""
+    rng = random.Random(seed)
+    weights = (1, 1, 6, 1, 1, 3)
+    stream = []
+    for op in rng.choices(MEMORY_OPS, weights, k=count):
+        stream.append((op, rng.randrange(size), rng.getrandbits(32)))
+    return stream
+
+
+def _bind_memory_stream(memory, stream):
+    """측정 루프에서 getattr 비용을 빼기 위해 메서드를 미리 바인딩"""
+    return [(getattr(memory, op), op[0] == 'r', addr, value) for op, addr, value in stream]
+
+
+def _run_memory(calls):
+    for method, is_read, addr, value in calls:
+        if is_read:
+            method(addr)
+        else:
+            method(addr, value)
+
+
+def _check_memory_backends(stream, size=1024):
+    """세 백엔드가 같은 스트림에서 같은 값/내용을 내는지 확인"""
+    old, new, sparse = BytewiseMemory(size), Memory(size), SparseMemory(size, 256)
+    for op, addr, value in stream:
+        if op[0] == 'r':
+            expected = getattr(old, op)(addr)
+            assert expected == getattr(new, op)(addr) == getattr(sparse, op)(addr), (op, addr)
+        else:
+            getattr(old, op)(addr, value)
+            getattr(new, op)(addr, value)
+            getattr(sparse, op)(addr, value)
+    assert old.data == new.data
+    assert all(old.data[i] == sparse.read_byte(i) for i in range(size))
+
+
+# ---------------------------------------------------------------------------
+# 워크로드 벤치마크 (--suite): 고정 워크로드를 헤드리스로 돌려 JSON으로 기록
+#
+# 이 모델은 분기를 하지 않으므로(PC+4) 합성 워크로드는 모두 루프를 펼친
+# 직선 코드로 만든다. 로드/스토어 주소는 RF1 + RF2라서
+#   lw rd, imm(rs1)  -> x[rs1] + x[imm & 0x1F]
+#   sw rs2, 0(rs1)   -> x[rs1] + x[rs2]  (저장 값을 미리 빼 둔 주소를 rs1에 넣는다)
+# 로 쓴다.
+
+SUITE_RAM = 'ram:0:16K'  # 합성 워크로드의 RAM (ROM은 프로그램 크기에 맞춘다)
+SUITE_MODES = ('step', 'instruction', 'translate')
+
+
+def _enc_r(funct7, funct3, rd, rs1, rs2):
+    return funct7 << 25 | rs2 << 20 | rs1 << 15 | funct3 << 12 | rd << 7 | 0x33
+
+
+def _enc_i(funct3, rd, rs1, imm, opcode=0x13):
+    return (imm & 0xFFF) << 20 | rs1 << 15 | funct3 << 12 | rd << 7 | opcode
+
+
+def _enc_sw(rs2, rs1):
+    return rs2 << 20 | rs1 << 15 | 2 << 12 | 0x23
+
+
+def _enc_lw(rd, rs1, index_reg=0):
+    """lw rd, index_reg(rs1): 주소 = x[rs1] + x[index_reg]"""
+    return _enc_i(2, rd, rs1, index_reg, opcode=0x03)
+
+
+def _li(rd, value):
+    """rd = value (0 <= value < 2^22, addi/slli 조합)"""
+    return [_enc_i(0, rd, 0, value >> 11), _enc_i(1, rd, rd, 11), _enc_i(0, rd, rd, value & 0x7FF)]
+
+
+def _store(value_reg, base_reg, offset_reg, scratch=15):
+    """M[x[base_reg] + x[offset_reg]] = x[value_reg]"""
+    return [_enc_r(0, 0, scratch, base_reg, offset_reg),
+            _enc_r(0x20, 0, scratch, scratch, value_reg),
+            _enc_sw(value_reg, scratch)]
+
+
+def bubble_sort_program(count=16, base=0x100):
+    """분기 없는 버블 정렬 (비교-교환을 slt/xor 마스크로, 부호 있는 오름차순)"""
+    words = _li(6, base)
+    for end in range(count - 1, 0, -1):
+        for j in range(end):
+            words += [
+                _enc_i(0, 7, 0, 4 * j),            # x7 = 4j
+                _enc_i(0, 8, 0, 4 * j + 4),        # x8 = 4j + 4
+                _enc_lw(11, 6, 7),                 # a = M[j]
+                _enc_lw(12, 6, 8),                 # b = M[j + 1]
+                _enc_r(0, 2, 13, 12, 11),          # t = b < a
+                _enc_r(0x20, 0, 13, 0, 13),        # mask = -t
+                _enc_r(0, 4, 14, 11, 12),          # d = a ^ b
+                _enc_r(0, 7, 14, 14, 13),          # d &= mask
+                _enc_r(0, 4, 11, 11, 14),          # a = min
+                _enc_r(0, 4, 12, 12, 14),          # b = max
+            ]
+            words += _store(11, 6, 7) + _store(12, 6, 8)
+    return words
+
+
+def alu_program(count=6000, seed=1):
+    """ALU 명령어만 섞은 직선 코드 (R-type 10종 + I-type 6종, x5~x12)"""
+    rng = random.Random(seed)
+    words = []
+    for rd in range(5, 13):
+        words += _li(rd, rng.getrandbits(22))
+    r_ops = [(0, 0), (0x20, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0x20, 5), (0, 6), (0, 7)]
+    i_ops = (0, 2, 3, 4, 6, 7)
+    regs = range(5, 13)
+    while len(words) < count:
+        rd, rs1, rs2 = rng.choice(regs), rng.choice(regs), rng.choice(regs)
+        if rng.random() < 0.7:
+            funct7, funct3 = rng.choice(r_ops)
+            words.append(_enc_r(funct7, funct3, rd, rs1, rs2))
+        else:
+            words.append(_enc_i(rng.choice(i_ops), rd, rs1, rng.randrange(-2048, 2048)))
+    return words
+
+
+def memcpy_program(count=512, src=0x0000, dst=0x2000):
+    """워드 count개 복사 (명령어 5개 중 로드 1 + 스토어 1)"""
+    words = _li(6, src) + _li(9, dst)
+    for _ in range(count):
+        words += [
+            _enc_lw(11, 6),                        # x11 = M[x6]
+            _enc_i(0, 6, 6, 4),                    # x6 += 4
+            _enc_r(0x20, 0, 15, 9, 11),            # x15 = x9 - x11
+            _enc_sw(11, 15),                       # M[x15 + x11] = x11
+            _enc_i(0, 9, 9, 4),                    # x9 += 4
+        ]
+    return words
+
+
+def _fill_ram(core, offset, values):
+    for index, value in enumerate(values):
+        core.ram.write_word(offset + 4 * index, value)
+
+
+def _signed32(value):
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def _check_sorted(core, count=16, base=0x100):
+    values = [_signed32(core.ram.read_word(base + 4 * i)) for i in range(count)]
+    if values != sorted(values):
+        raise RuntimeError(f"정렬 결과가 틀립니다: {values}")
+
+
+def _check_copied(core, count=512, src=0x0000, dst=0x2000):
+    for i in range(count):
+        if core.ram.read_word(src + 4 * i) != core.ram.read_word(dst + 4 * i):
+            raise RuntimeError(f"memcpy 결과가 틀립니다 (워드 {i})")
+
+
+def suite_workloads(program="code.mem"):
+    """(이름, 코어 생성 함수, 결과 확인 함수 또는 None) 목록"""
+    rng = random.Random(7)
+    sort_input = [rng.getrandbits(32) for _ in range(16)]
+    copy_input = [rng.getrandbits(32) for _ in range(512)]
+    programs = (
+        ('bubble_sort', bubble_sort_program(), lambda core: _fill_ram(core, 0x100, sort_input), _check_sorted),
+        ('alu_loop', alu_program(), None, None),
+        ('memcpy', memcpy_program(), lambda core: _fill_ram(core, 0, copy_input), _check_copied),
+    )
+    
+    def bundled():
+        core = RISCVCore(max_cycles=None)
+        core.load_image(program)
+        return core
+    
+    def synthetic(words, setup):
+        def build():
+            # ROM을 프로그램 크기에 맞춰 뒤쪽 0 워드(알 수 없는 opcode)를 실행하지 않게 한다
+            memory_map = MemoryMap.from_specs([f'rom:0:{4 * len(words)}', SUITE_RAM])
+            core = RISCVCore(max_cycles=None, memory_map=memory_map)
+            core.load_words(words)
+            if setup is not None:
+                setup(core)
+            return core
+        return build
+    
+    workloads = [(os.path.basename(program), bundled, None)]
+    workloads += [(name, synthetic(words, setup), check) for name, words, setup, check in programs]
+    return workloads
+
+
+def _run_mode(core, mode):
+    if mode == 'step':
+        core.run()
+    else:
+        if mode == 'translate':
+            core.enable_translation()
+        core.run_instructions()
+
+
+def peak_rss():
+    """프로세스 최대 RSS (바이트, 잴 수 없는 플랫폼에서는 None)
+
+    Linux의 ru_maxrss는 fork/exec 때 부모 값을 물려받으므로, 주소 공간마다
+    새로 세는 /proc/self/status의 VmHWM을 먼저 쓴다.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024  # kB 단위
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux는 KiB 단위
+
+
+def _workload_peak_rss(program, index):
+    """index번 워크로드를 실행 방식마다 한 번씩 돌린 뒤의 최대 RSS (새 프로세스에서 호출)"""
+    _, build, _ = suite_workloads(program)[index]
+    for mode in SUITE_MODES:
+        _run_mode(build(), mode)
+    return peak_rss()
+
+
+def workload_peak_rss(program, index):
+    """워크로드 하나의 최대 RSS (바이트)
+
+    ru_maxrss는 프로세스 전체에서 줄지 않는 값이라, 앞선 워크로드와 cProfile
+    측정의 영향을 받지 않도록 spawn으로 새 인터프리터를 띄워 잰다.
+    """
+    import multiprocessing
+    
+    if peak_rss() is None:
+        return None
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_workload_peak_rss, (program, index))
+
+
+# 함수별 시간 묶음 (cProfile 자체 시간 기준, 이름 또는 파일로 분류)
+BREAKDOWN_GROUPS = ('execute_control_unit_state', 'execute_datapath', 'execute_alu', 'memory', 'logging')
+
+
+def _breakdown_group(filename, function):
+    name = os.path.basename(filename)
+    if function in ('execute_control_unit_state', 'execute_datapath'):
+        return function
+    if name == 'riscv_core.py' and function in ('execute_alu', '<lambda>', '_alu_sra', '_to_signed'):
+        return 'execute_alu'
+    if name in ('riscv_core.py', 'riscv_memmap.py') and function.startswith(('read_', 'write_')):
+        return 'memory'
+    if name == 'riscv_trace.py' or function == 'write_log':
+        return 'logging'
+    return 'other'
+
+
+def function_breakdown(build):
+    """사이클 로그를 켠 사이클 모델 실행 한 번을 cProfile로 재서 묶음별 자체 시간 (초)"""
+    import cProfile
+    import pstats
+    import tempfile
+    
+    core = build()
+    with tempfile.TemporaryDirectory() as tmp:
+        core.start_trace(os.path.join(tmp, 'trace.txt'))
+        profile = cProfile.Profile()
+        profile.enable()
+        core.run()
+        core.stop_trace()
+        profile.disable()
+    times = dict.fromkeys(BREAKDOWN_GROUPS + ('other',), 0.0)
+    for (filename, _, function), (_, _, tottime, _, _) in pstats.Stats(profile).stats.items():
+        times[_breakdown_group(filename, function)] += tottime
+    total = sum(times.values()) or 1.0
+    return {group: {'seconds': seconds, 'share': seconds / total} for group, seconds in times.items()}
+
+
+def run_suite(program="code.mem", repeat=5, breakdown=True):
+    """워크로드 x 실행 방식 측정 결과 (JSON으로 바로 쓸 수 있는 dict)"""
+    import platform
+    
+    results = []
+    for index, (name, build, check) in enumerate(suite_workloads(program)):
+        entry = {'name': name, 'modes': {}}
+        for mode in SUITE_MODES:
+            best = None
+            for _ in range(repeat):
+                core = build()
+                start = time.perf_counter()
+                _run_mode(core, mode)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                if check is not None:
+                    check(core)
+            entry.setdefault('cycles', core.cycle_count)
+            entry.setdefault('instructions', core.instruction_count)
+            if (core.cycle_count, core.instruction_count) != (entry['cycles'], entry['instructions']):
+                raise RuntimeError(f"{name}: {mode} 실행의 사이클/명령어 수가 다른 방식과 다릅니다 "
+                                   f"({core.cycle_count}/{core.instruction_count}, "
+                                   f"기대 {entry['cycles']}/{entry['instructions']})")
+            entry['modes'][mode] = {
+                'seconds': best,
+                'cycles_per_sec': core.cycle_count / best if best else None,
+                'instructions_per_sec': core.instruction_count / best if best else None,
+            }
+        if breakdown:
+            entry['breakdown'] = function_breakdown(build)
+        entry['peak_rss'] = workload_peak_rss(program, index)
+        results.append(entry)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'workloads': results,
+        'process_peak_rss': peak_rss(),
+    }
+
+
+def compare_suite(baseline, current, tolerance=0.1):
+    """baseline보다 cycles/s가 tolerance 비율 넘게 떨어진 (워크로드, 방식, 비율) 목록"""
+    old = {(w['name'], mode): row['cycles_per_sec'] for w in baseline['workloads']
+           for mode, row in w['modes'].items()}
+    regressions = []
+    for workload in current['workloads']:
+        for mode, row in workload['modes'].items():
+            before = old.get((workload['name'], mode))
+            if before and row['cycles_per_sec'] and row['cycles_per_sec'] < before * (1 - tolerance):
+                regressions.append((workload['name'], mode, row['cycles_per_sec'] / before))
+    return regressions
+
+
+def print_suite(summary):
+    for workload in summary['workloads']:
+        print(f"{workload['name']}: {workload['cycles']} 사이클 / {workload['instructions']} 명령어")
+        for mode, row in workload['modes'].items():
+            print(f"  {mode:<12} {row['cycles_per_sec']:>12,.0f} cycles/s "
+                  f"{row['instructions_per_sec']:>12,.0f} instr/s")
+        for group, row in workload.get('breakdown', {}).items():
+            print(f"    {group:<28} {row['seconds'] * 1e3:8.2f} ms {100 * row['share']:6.2f}%")
+        if workload['peak_rss'] is not None:
+            print(f"  최대 RSS {workload['peak_rss'] / (1 << 20):.1f} MiB")
+    if summary['process_peak_rss'] is not None:
+        print(f"측정 프로세스 전체 최대 RSS: {summary['process_peak_rss'] / (1 << 20):.1f} MiB")
+
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="ALU / Control Unit 디스패치 마이크로 벤치마크")
+    parser.add_argument("program", nargs="?", default="code.mem", help="ROM 이미지 (.mem)")
+    parser.add_argument("--repeat", type=int, default=20, help="반복 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--suite", action="store_true", help="워크로드 벤치마크 실행 (반복은 --repeat / 4)")
+    parser.add_argument("--json", metavar="PATH", help="--suite 결과를 JSON으로 기록")
+    parser.add_argument("--baseline", metavar="PATH", help="이전 --suite JSON과 cycles/s 비교")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="--baseline 비교에서 허용하는 속도 저하 비율 (기본 0.1)")
+    parser.add_argument("--no-breakdown", action="store_true", help="--suite에서 cProfile 측정 생략")
+    args = parser.parse_args(argv)
+    if args.suite:
+        return _suite_main(args)
+    
+    control_stream, alu_stream = record_streams(args.program)
+    legacy_control_stream = [(STATE_NAMES[state], decoded) for state, decoded in control_stream]
+    cycles = len(alu_stream)
+    
+    # 두 방식이 같은 결과를 내는지 먼저 확인
+    for a, b, aluControl in alu_stream:
+        assert legacy_alu(a, b, aluControl) == ALU_OPERATIONS[aluControl](a, b)
+    signals = ControlSignals()
+    for (state, decoded), (name, _) in zip(control_stream, legacy_control_stream):
+        next_state, aluControl, ramControl = table_control_unit(state, decoded, signals)
+        old = legacy_control_unit(name, decoded)
+        assert (STATE_NAMES[next_state], dict(RegisterView(signals)), aluControl, ramControl) == old
+    
+    rows = [
+        ("ALU (if/elif)", _best_of(args.repeat, _run_alu, legacy_alu, alu_stream), len(alu_stream)),
+        ("ALU (표)", _best_of(args.repeat, _run_alu_table, alu_stream), len(alu_stream)),
+        ("Control Unit (문자열)", _best_of(args.repeat, _run_control, legacy_control_unit,
+                                         legacy_control_stream), len(control_stream)),
+        ("Control Unit (표)", _best_of(args.repeat, _run_control, table_control_unit,
+                                      control_stream, signals), len(control_stream)),
+        ("코어 전체 step()", _best_of(max(1, args.repeat // 4), _run_core, args.program, cycles * 4),
+         cycles * 4),
+    ]
+    
+    print(f"{args.program}: {cycles} 사이클 스트림, 최소값 / {args.repeat}회")
+    for name, elapsed, count in rows:
+        print(f"  {name:<22} {elapsed * 1e9 / count:8.1f} ns/cycle")
+    
+    # 메모리 백엔드 비교
+    stream = memory_stream(20000)
+    _check_memory_backends(stream)
+    memory_rows = [
+        ("BytewiseMemory", _best_of(args.repeat, _run_memory,
+                                    _bind_memory_stream(BytewiseMemory(1024), stream)), len(stream)),
+        ("Memory (struct)", _best_of(args.repeat, _run_memory,
+                                     _bind_memory_stream(Memory(1024), stream)), len(stream)),
+        ("SparseMemory", _best_of(args.repeat, _run_memory,
+                                  _bind_memory_stream(SparseMemory(1024, 256), stream)), len(stream)),
+    ]
+    print(f"메모리 백엔드: 접근 {len(stream)}회")
+    for name, elapsed, count in memory_rows:
+        print(f"  {name:<22} {elapsed * 1e9 / count:8.1f} ns/access")
+    core_rows = [
+        ("step() + BytewiseMemory", _best_of(max(1, args.repeat // 4), _run_core, args.program,
+                                             cycles * 4, BytewiseMemory), cycles * 4),
+        ("step() + Memory", _best_of(max(1, args.repeat // 4), _run_core, args.program,
+                                     cycles * 4, Memory), cycles * 4),
+    ]
+    for name, elapsed, count in core_rows:
+        print(f"  {name:<22} {elapsed * 1e9 / count:8.1f} ns/cycle")
+    return 0
+
+
+def _suite_main(args):
+    import json
+    
+    try:
+        summary = run_suite(args.program, max(1, args.repeat // 4), breakdown=not args.no_breakdown)
+    except RuntimeError as e:
+        print(f"검증 실패: {e}")
+        return 1
+    print_suite(summary)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"결과 기록: {args.json}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_suite(json.load(f), summary, args.tolerance)
+        for name, mode, ratio in regressions:
+            print(f"느려짐: {name} / {mode} ({ratio:.2f}배)")
+        if regressions:
+            return 1
+        print(f"기준 대비 {args.tolerance:.0%} 넘게 느려진 항목 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1261 @@
+import struct
+import sys
+from collections import deque
+from collections.abc import Mapping
+
+from riscv_decode import DecodeCache, decode
+from riscv_loader import detect_format, open_image, parse_mem_lines, read_mem_cached, words_to_bytes
+from riscv_memmap import MemoryMap, make_memory
+from riscv_trace import TraceWriter
+from riscv_defines import (
+    FETCH, DECODE, R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE,
+    S_EXE, S_MEM, L_EXE, L_MEM, L_WB, STATE_NAMES, STATE_BY_NAME, NUM_STATES,
+    ADD, SUB, SLL, SRL, SRA, SLT, SLTU, XOR, OR, AND,
+)
+
+
+class PipelineRegisters:
+    """파이프라인 레지스터 (하드웨어와 동일, 매 사이클 제자리에서 갱신)"""
+    __slots__ = (
+        'PCOutData',           # PC 출력
+        'DecReg_RFData1',      # Decode 단계 RF Data1
+        'DecReg_RFData2',      # Decode 단계 RF Data2
+        'DecReg_immExt',       # Decode 단계 Immediate
+        'ExeReg_RFData2',      # Execute 단계 RF Data2
+        'ExeReg_aluResult',    # Execute 단계 ALU 결과
+        'ExeReg_PCSrcMuxOut',  # Execute 단계 PC 소스
+        'MemAccReg_busRData',  # Memory 단계 버스 읽기 데이터
+        'MemAccReg_busAddr',   # Memory 단계 버스 주소
+        'MemAccReg_busWData',  # Memory 단계 버스 쓰기 데이터
+    )
+    
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+    
+    def values(self):
+        """__slots__ 순서의 값 튜플 (되돌리기 저널용)"""
+        return (self.PCOutData, self.DecReg_RFData1, self.DecReg_RFData2, self.DecReg_immExt,
+                self.ExeReg_RFData2, self.ExeReg_aluResult, self.ExeReg_PCSrcMuxOut,
+                self.MemAccReg_busRData, self.MemAccReg_busAddr, self.MemAccReg_busWData)
+    
+    def load(self, values):
+        """__slots__ 순서의 값 튜플로 모든 레지스터 설정"""
+        (self.PCOutData, self.DecReg_RFData1, self.DecReg_RFData2, self.DecReg_immExt,
+         self.ExeReg_RFData2, self.ExeReg_aluResult, self.ExeReg_PCSrcMuxOut,
+         self.MemAccReg_busRData, self.MemAccReg_busAddr, self.MemAccReg_busWData) = values
+
+
+class ControlSignals:
+    """제어 신호 (하드웨어와 동일, 매 사이클 제자리에서 갱신)"""
+    __slots__ = (
+        'PCEn',           # PC Enable
+        'regFileWe',      # Register File Write Enable
+        'aluSrcMuxSel',   # ALU Source Mux Select
+        'busWe',          # Bus Write Enable
+        'RFWDSrcMuxSel',  # RF Write Data Source Mux Select
+        'branch',         # Branch
+        'jal',            # JAL
+        'jalr',           # JALR
+    )
+    
+    def __init__(self):
+        self.load(_signals())
+    
+    def values(self):
+        """__slots__ 순서의 값 튜플 (되돌리기 저널용)"""
+        return (self.PCEn, self.regFileWe, self.aluSrcMuxSel, self.busWe,
+                self.RFWDSrcMuxSel, self.branch, self.jal, self.jalr)
+    
+    def load(self, values):
+        """__slots__ 순서의 값 튜플로 모든 신호 설정"""
+        (self.PCEn, self.regFileWe, self.aluSrcMuxSel, self.busWe,
+         self.RFWDSrcMuxSel, self.branch, self.jal, self.jalr) = values
+
+
+class RegisterView(Mapping):
+    """__slots__ 레코드를 이름으로 읽는 읽기 전용 매핑 (표시/로그용)"""
+    __slots__ = ('_record', '_names')
+    
+    def __init__(self, record):
+        self._record = record
+        self._names = type(record).__slots__
+    
+    def __getitem__(self, name):
+        if name not in self._names:
+            raise KeyError(name)
+        return getattr(self._record, name)
+    
+    def __iter__(self):
+        return iter(self._names)
+    
+    def __len__(self):
+        return len(self._names)
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+def _signals(**active):
+    """제어 신호 값 튜플 생성 (ControlSignals 순서, 지정하지 않은 신호는 0)"""
+    return tuple(active.pop(name, 0) for name in ControlSignals.__slots__)
+
+
+# ramControl 출처 (CONTROL_TABLE의 ram 열)
+RAM_NONE = 0   # ramControl = 0
+RAM_STORE = 1  # S_MEM: sb=1, sh=2, sw=0
+RAM_LOAD = 2   # L_MEM: lb=1, lh=2, lw=0, lbu=5, lhu=6
+
+# Control Unit 상태 표 (ControlUnit.sv와 동일, 상태 번호로 인덱싱)
+#   (제어 신호, 다음 상태, 명령어 완료 여부, aluControl 사용 여부, ramControl 출처)
+#   DECODE의 다음 상태(None)는 디코딩 시 미리 계산한 exe_state를 쓴다
+CONTROL_TABLE = [None] * NUM_STATES
+CONTROL_TABLE[FETCH] = (_signals(PCEn=1), DECODE, False, False, RAM_NONE)
+CONTROL_TABLE[DECODE] = (_signals(), None, False, False, RAM_NONE)
+CONTROL_TABLE[R_EXE] = (_signals(regFileWe=1), FETCH, True, True, RAM_NONE)
+CONTROL_TABLE[I_EXE] = (_signals(regFileWe=1, aluSrcMuxSel=1), FETCH, True, True, RAM_NONE)
+CONTROL_TABLE[B_EXE] = (_signals(branch=1), FETCH, True, True, RAM_NONE)
+CONTROL_TABLE[LU_EXE] = (_signals(regFileWe=1, RFWDSrcMuxSel=2), FETCH, True, False, RAM_NONE)
+CONTROL_TABLE[AU_EXE] = (_signals(regFileWe=1, RFWDSrcMuxSel=3), FETCH, True, False, RAM_NONE)
+CONTROL_TABLE[J_EXE] = (_signals(regFileWe=1, RFWDSrcMuxSel=4, jal=1), FETCH, True, False, RAM_NONE)
+CONTROL_TABLE[JL_EXE] = (_signals(regFileWe=1, RFWDSrcMuxSel=4, jal=1, jalr=1),
+                         FETCH, True, False, RAM_NONE)
+CONTROL_TABLE[S_EXE] = (_signals(aluSrcMuxSel=1), S_MEM, False, False, RAM_NONE)
+CONTROL_TABLE[S_MEM] = (_signals(aluSrcMuxSel=1, busWe=1), FETCH, True, False, RAM_STORE)
+CONTROL_TABLE[L_EXE] = (_signals(aluSrcMuxSel=1, RFWDSrcMuxSel=1), L_MEM, False, False, RAM_NONE)
+CONTROL_TABLE[L_MEM] = (_signals(aluSrcMuxSel=1, RFWDSrcMuxSel=1), L_WB, False, False, RAM_LOAD)
+CONTROL_TABLE[L_WB] = (_signals(regFileWe=1, aluSrcMuxSel=1, RFWDSrcMuxSel=1),
+                       FETCH, True, False, RAM_NONE)
+CONTROL_TABLE = tuple(CONTROL_TABLE)
+
+# 상태 전환 후 ExeReg를 갱신하는 상태 (*_EXE)
+UPDATES_EXE_REG = tuple(state in (R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE, S_EXE, L_EXE)
+                        for state in range(NUM_STATES))
+
+# 명령어 단위 실행 후 남는 제어 신호 (exe_state -> 명령어의 마지막 상태 신호)
+LAST_STATE_SIGNALS = [_signals()] * NUM_STATES  # FETCH: DECODE (알 수 없는 opcode)
+for _state in (R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE):
+    LAST_STATE_SIGNALS[_state] = CONTROL_TABLE[_state][0]
+LAST_STATE_SIGNALS[S_EXE] = CONTROL_TABLE[S_MEM][0]
+LAST_STATE_SIGNALS[L_EXE] = CONTROL_TABLE[L_WB][0]
+LAST_STATE_SIGNALS = tuple(LAST_STATE_SIGNALS)
+
+
+def _to_signed(value):
+    """32비트 값을 부호 있는 정수로"""
+    return value if value < 0x80000000 else value - 0x100000000
+
+
+def _alu_sra(a, b):
+    if a & 0x80000000:  # 음수인 경우
+        return ((a >> (b & 0x1F)) | (0xFFFFFFFF << (32 - (b & 0x1F)))) & 0xFFFFFFFF
+    return (a >> (b & 0x1F)) & 0xFFFFFFFF
+
+
+# ALU 연산 표 (alu 모듈과 동일, aluControl로 인덱싱, 정의되지 않은 코드는 0)
+ALU_OPERATIONS = [lambda a, b: 0] * 0x20
+ALU_OPERATIONS[ADD] = lambda a, b: (a + b) & 0xFFFFFFFF
+ALU_OPERATIONS[SUB] = lambda a, b: (a - b) & 0xFFFFFFFF
+ALU_OPERATIONS[SLL] = lambda a, b: (a << (b & 0x1F)) & 0xFFFFFFFF
+ALU_OPERATIONS[SRL] = lambda a, b: (a >> (b & 0x1F)) & 0xFFFFFFFF
+ALU_OPERATIONS[SRA] = _alu_sra
+ALU_OPERATIONS[SLT] = lambda a, b: 1 if _to_signed(a) < _to_signed(b) else 0
+ALU_OPERATIONS[SLTU] = lambda a, b: 1 if a < b else 0
+ALU_OPERATIONS[XOR] = lambda a, b: a ^ b
+ALU_OPERATIONS[OR] = lambda a, b: a | b
+ALU_OPERATIONS[AND] = lambda a, b: a & b
+ALU_OPERATIONS[0x10] = lambda a, b: 1 if a == b else 0                        # BEQ
+ALU_OPERATIONS[0x11] = lambda a, b: 1 if a != b else 0                        # BNE
+ALU_OPERATIONS[0x14] = lambda a, b: 1 if _to_signed(a) < _to_signed(b) else 0   # BLT
+ALU_OPERATIONS[0x15] = lambda a, b: 1 if _to_signed(a) >= _to_signed(b) else 0  # BGE
+ALU_OPERATIONS[0x16] = lambda a, b: 1 if a < b else 0                         # BLTU
+ALU_OPERATIONS[0x17] = lambda a, b: 1 if a >= b else 0                        # BGEU
+ALU_OPERATIONS = tuple(ALU_OPERATIONS)
+
+# 바이트 단위 메모리 모델 (예전 백엔드, 비교/검증용으로 유지)
+class BytewiseMemory:
+    def __init__(self, size_bytes):
+        self.data = bytearray(size_bytes)  # 바이트 단위
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def read_byte(self, addr):
+        if addr < len(self.data):
+            return self.data[addr]
+        return 0
+    
+    def read_half(self, addr):
+        if addr + 1 < len(self.data):
+            return self.data[addr] | (self.data[addr+1] << 8)  # 리틀 엔디안
+        return 0
+    
+    def read_word(self, addr):
+        if addr + 3 < len(self.data):
+            return (self.data[addr] |
+                    (self.data[addr+1] << 8) |
+                    (self.data[addr+2] << 16) |
+                    (self.data[addr+3] << 24))
+        return 0
+    
+    def write_byte(self, addr, value):
+        if addr < len(self.data):
+            self.data[addr] = value & 0xFF
+    
+    def write_half(self, addr, value):
+        if addr + 1 < len(self.data):
+            self.data[addr] = value & 0xFF
+            self.data[addr+1] = (value >> 8) & 0xFF
+    
+    def write_word(self, addr, value):
+        if addr + 3 < len(self.data):
+            self.data[addr] = value & 0xFF
+            self.data[addr+1] = (value >> 8) & 0xFF
+            self.data[addr+2] = (value >> 16) & 0xFF
+            self.data[addr+3] = (value >> 24) & 0xFF
+    
+    def clear(self):
+        self.data = bytearray(len(self.data))
+    
+    def snapshot(self):
+        """현재 내용 복사본 (restore()에 그대로 넘긴다)"""
+        return self.data.copy()
+    
+    def restore(self, snapshot):
+        self.data = snapshot.copy()
+    
+    def map_image(self, offset, data, size=None):
+        """offset부터 data를 한 번에 복사하고 size까지 남는 부분(.bss)은 0으로 채운다"""
+        size = len(data) if size is None else size
+        end = min(offset + size, len(self.data))
+        data_end = min(offset + len(data), end)
+        if offset < data_end:
+            self.data[offset:data_end] = data[:data_end - offset]
+        if data_end < end:
+            self.data[max(offset, data_end):end] = bytes(end - max(offset, data_end))
+    
+    def iter_chunks(self, chunk_size=4096):
+        """(오프셋, 바이트열) 조각으로 전체 내용을 차례로 반환 (스냅샷 파일용)"""
+        data = self.data
+        for offset in range(0, len(data), chunk_size):
+            yield offset, bytes(data[offset:offset + chunk_size])
+    
+    def write_bytes(self, offset, data):
+        """offset부터 data를 그대로 기록 (범위 밖은 잘라낸다)"""
+        end = min(offset + len(data), len(self.data))
+        if offset < end:
+            self.data[offset:end] = data[:end - offset]
+
+
+_unpack_word = struct.Struct('<I').unpack_from
+_pack_word = struct.Struct('<I').pack_into
+_unpack_half = struct.Struct('<H').unpack_from
+_pack_half = struct.Struct('<H').pack_into
+
+
+class Memory(BytewiseMemory):
+    """워드/하프워드 접근을 struct로 한 번에 처리하는 메모리 (기본 백엔드)
+
+    범위 안의 접근만 struct 경로로 처리하고, 범위 밖/음수 주소는
+    BytewiseMemory와 똑같이 동작하도록 그쪽 구현에 맡긴다.
+    sb/sh/lb/lh/lbu/lhu의 레인 선택과 부호 확장은 DataPath에서 그대로 한다.
+    """
+    
+    def read_half(self, addr):
+        data = self.data
+        if 0 <= addr <= len(data) - 2:
+            return _unpack_half(data, addr)[0]
+        return BytewiseMemory.read_half(self, addr)
+    
+    def read_word(self, addr):
+        data = self.data
+        if 0 <= addr <= len(data) - 4:
+            return _unpack_word(data, addr)[0]
+        return BytewiseMemory.read_word(self, addr)
+    
+    def write_half(self, addr, value):
+        data = self.data
+        if 0 <= addr <= len(data) - 2:
+            _pack_half(data, addr, value & 0xFFFF)
+        else:
+            BytewiseMemory.write_half(self, addr, value)
+    
+    def write_word(self, addr, value):
+        data = self.data
+        if 0 <= addr <= len(data) - 4:
+            _pack_word(data, addr, value & 0xFFFFFFFF)
+        else:
+            BytewiseMemory.write_word(self, addr, value)
+
+
+# load_image에서 미리 디코딩할 최대 워드 수 (나머지는 처음 FETCH될 때 디코딩)
+PREDECODE_WORDS = 4096
+
+# 데이터 버스 페이지 표 (RAM 밖 영역과 주변장치 주소 디코딩, 4 KiB = APB 슬레이브 한 칸)
+BUS_PAGE_SHIFT = 12
+BUS_TABLE_MAX_PAGES = 1 << 16  # 이보다 큰 영역은 표에 넣지 않고 따로 찾는다
+
+
+class RISCVCore:
+    """GUI 없이 동작하는 멀티사이클 RISC-V 시뮬레이션 엔진
+
+    RISCVMemoryMonitor는 이 클래스를 감싸서 화면에 표시만 담당한다.
+    CI처럼 디스플레이가 없는 환경에서는 run()으로 바로 실행할 수 있다.
+    """
+    
+    def __init__(self, max_cycles=1000, keep_history=False, memory_class=Memory, memory_map=None,
+                 max_history=None):
+        # 최대 사이클 수 제한 (안전장치, None이면 제한 없음)
+        self.max_cycles = max_cycles
+        
+        # 되돌리기 히스토리 사용 여부 (GUI에서만 켠다)
+        self.keep_history = keep_history
+        
+        # 실행 히스토리 (되돌리기 기능용, 단계마다 바뀐 값만 기록하는 저널)
+        #   (단계 시작 시 상태 튜플, [덮어쓴 레지스터/메모리 값]) 항목의 링 버퍼
+        #   max_history가 None이면 개수 제한 없음 (메모리는 쓰기 횟수에 비례)
+        self.max_history = max_history
+        self.history = deque(maxlen=max_history)
+        self._journal = None  # 현재 단계의 쓰기 기록 리스트 (기록 중이 아니면 None)
+        
+        # 화면 갱신용 변경 추적 (track_dirty()로 켠다, 꺼져 있으면 None)
+        #   dirty_registers: 값이 바뀌었을 수 있는 레지스터 번호 집합
+        #   dirty_words: (저장소, 워드 오프셋) 집합
+        #   dirty_all: 전체를 다시 그려야 함 (로드/복원 등)
+        self.dirty_registers = None
+        self.dirty_words = None
+        self.dirty_all = False
+        
+        # 사이클 로그 기록기 (riscv_trace.TraceWriter, start_trace()로 연다)
+        self.log_file = None
+        
+        # 프로파일러 (riscv_profile.Profiler, start_profile()로 켠다)
+        self.profiler = None
+        
+        # 브레이크포인트 PC 집합 (run(until_breakpoint=True)에서 사용)
+        self.breakpoints = set()
+        
+        # 워치포인트 / 조건 정지 엔진 (riscv_watch.WatchEngine, start_watch()로 붙인다)
+        self.watch = None
+        
+        # 데이터 버스 주변장치 [(시작 주소, 끝 주소, 장치)] (attach_device()로 붙인다, reset 후에도 유지)
+        self.devices = []
+        
+        # 기본 블록 번역기 (riscv_translate.BlockTranslator, enable_translation()으로 켠다)
+        self.translator = None
+        
+        # RAM/ROM 백엔드 (Memory 또는 BytewiseMemory)
+        self.memory_class = memory_class
+        
+        # 메모리 맵 (ROM/RAM 시작 주소와 크기, 추가 데이터 버스 영역)
+        self.memory_map = memory_map or MemoryMap()
+        
+        self.reset()
+    
+    def reset(self):
+        """코어 상태 초기화 (ROM 포함)"""
+        # 메모리 상태 (시뮬레이션용)
+        self.regfile = [0] * 32  # x0-x31 레지스터 (각 32비트)
+        self.regfile[1] = 0x64  # ra = 0x64
+        # 메모리 (바이트 어드레서블, 영역 기준 오프셋으로 접근)
+        memory_map = self.memory_map
+        self.rom = make_memory(memory_map.rom.size, self.memory_class, memory_map.page_size)
+        self.ram = make_memory(memory_map.ram.size, self.memory_class, memory_map.page_size)
+        self.rom_base = memory_map.rom.base
+        self.rom_last = memory_map.rom.end - 4  # 마지막 명령어 주소
+        self.ram_base = memory_map.ram.base
+        self.ram_size = memory_map.ram.size
+        
+        # RAM 밖의 데이터 버스 영역 [(시작 주소, 끝 주소, 저장소)]
+        self.extra_memories = [(region.base, region.end,
+                                make_memory(region.size, self.memory_class, memory_map.page_size))
+                               for region in memory_map.extra_regions]
+        for _, _, device in self.devices:
+            device.reset()
+        self._build_bus_table()
+        
+        # 사전 디코딩 캐시 (PC/4 인덱스, ROM 재적재 시 무효화)
+        self.decode_cache = DecodeCache(self.rom, memory_map.rom.size // 4, self.rom_base)
+        self.image = None  # load_image()로 연 이미지 (mmap 유지용)
+        
+        # 멀티사이클 파이프라인 상태
+        self.cycle_count = 0
+        self.instruction_count = 0
+        self.current_instruction = 0
+        self.current_decoded = decode(0)
+        self.state = FETCH       # 상태 번호 (riscv_defines, ControlUnit.sv 순서)
+        self.next_state = FETCH
+        
+        # 파이프라인 레지스터 / 제어 신호 (하드웨어와 동일)
+        # 실행 경로는 pipe/signals를 직접 갱신하고, 표시/로그 코드는
+        # 이름으로 읽는 읽기 전용 뷰(pipeline_registers/control_signals)를 쓴다
+        self.pipe = PipelineRegisters()
+        self.signals = ControlSignals()
+        self.pipeline_registers = RegisterView(self.pipe)
+        self.control_signals = RegisterView(self.signals)
+        self.pipe.PCOutData = self.rom_base
+        
+        # ALU 및 메모리 제어
+        self.aluControl = 0
+        self.ramControl = 0
+        
+        # 정지 상태
+        self.halted = False
+        self.halt_reason = None
+        self.breakpoint_hit = False
+        self.watch_hit = None  # 마지막 워치포인트 / 조건 정지 원인 (riscv_watch.WatchHit)
+        self._instruction_completed = False
+        self._last_pc = None
+        self._pc_stall_count = 0
+        
+        # 히스토리 초기화
+        self.history.clear()
+        self._journal = None
+        self.dirty_all = True
+        
+        # 명령어 단위 실행 핸들러 (DECODE 다음 상태 번호로 인덱싱)
+        handlers = [None] * NUM_STATES
+        handlers[R_EXE] = self._exec_r
+        handlers[I_EXE] = self._exec_i
+        handlers[B_EXE] = self._exec_b
+        handlers[LU_EXE] = self._exec_lu
+        handlers[AU_EXE] = self._exec_au
+        handlers[J_EXE] = handlers[JL_EXE] = self._exec_j
+        handlers[S_EXE] = self._exec_s
+        handlers[L_EXE] = self._exec_l
+        self._instruction_handlers = tuple(handlers)
+    
+    @property
+    def control_state(self):
+        """현재 상태 이름 (표시용, 내부에서는 state 번호를 쓴다)"""
+        return STATE_NAMES[self.state]
+    
+    @control_state.setter
+    def control_state(self, name):
+        self.state = STATE_BY_NAME[name]
+    
+    def load_words(self, words, records=None):
+        """워드 리스트를 ROM에 적재 (4바이트씩, 리틀 엔디안)
+
+        records는 같은 워드들의 디코딩 레코드 (이미지 캐시에서 읽은 경우)
+        """
+        self.rom.map_image(0, words_to_bytes(words))
+        
+        # ROM이 바뀌었으므로 디코딩 캐시를 새로 만든다
+        self.decode_cache.invalidate()
+        self.dirty_all = True
+        if records is not None:
+            self.decode_cache.fill(records)
+        else:
+            self.decode_cache.predecode(len(words))
+        return len(words)
+    
+    def load_code(self, path="code.mem", use_cache=True):
+        """code.mem 파일을 읽어 ROM에 적재하고 적재한 명령어 수를 반환
+
+        use_cache가 True이면 __rvcache__의 파싱 결과를 재사용한다 (riscv_loader).
+        """
+        max_words = self.memory_map.rom.size // 4
+        if use_cache:
+            words, records = read_mem_cached(path, max_words, records=True)
+            return self.load_words(words, records)
+        with open(path, "r", encoding="utf-8") as f:
+            words = parse_mem_lines(f, max_words)
+        return self.load_words(words)
+    
+    def load_image(self, path, fmt=None):
+        """.mem / flat binary / ELF 이미지를 적재하고 ROM에 올린 명령어 수를 반환
+
+        flat binary와 ELF는 mmap한 파일을 그대로 저장소에 넘긴다 (riscv_loader).
+        실행 세그먼트와 flat binary는 ROM에, 나머지 ELF 세그먼트는 데이터 버스
+        영역(RAM 등)에 올린다. ELF 시작 주소가 ROM 안이면 PC를 거기로 옮긴다.
+        """
+        fmt = fmt or detect_format(path)
+        if fmt == 'mem':
+            return self.load_code(path)
+        image = open_image(path, fmt, base=self.rom_base)
+        rom_bytes = 0
+        for segment in image.segments:
+            if segment.executable:
+                memory, offset = self.rom, segment.address - self.rom_base
+                if not 0 <= offset < len(self.rom):
+                    memory = None
+            else:
+                memory, offset = self.data_memory(segment.address)
+            if memory is None or not hasattr(memory, 'map_image'):
+                image.close()
+                raise ValueError(f"세그먼트가 메모리 맵 밖에 있습니다: {segment}")
+            memory.map_image(offset, segment.data, segment.mem_size)
+            if memory is self.rom:
+                rom_bytes = max(rom_bytes, min(offset + len(segment.data), len(self.rom)))
+        
+        # 이미지가 저장소에서 참조되는 동안 mmap을 유지한다
+        self.image = image
+        
+        # ROM이 바뀌었으므로 디코딩 캐시를 새로 만든다
+        self.decode_cache.invalidate()
+        self.dirty_all = True
+        self.decode_cache.predecode(min(rom_bytes // 4, PREDECODE_WORDS))
+        if image.entry is not None and self.in_rom(image.entry):
+            self.pipe.PCOutData = image.entry
+        return rom_bytes // 4
+    
+    def in_rom(self, pc):
+        """pc가 ROM 영역 안의 명령어 주소인지"""
+        return self.rom_base <= pc <= self.rom_last
+    
+    def data_memory(self, addr):
+        """데이터 버스 주소 -> (저장소 또는 장치, 영역 내 오프셋), 어느 영역에도 없으면 (None, 0)
+
+        RAM은 바로 확인하고, 그 밖의 영역과 장치는 페이지 표 한 번 조회로 찾는다.
+        """
+        offset = addr - self.ram_base
+        if 0 <= offset < self.ram_size:
+            return self.ram, offset
+        for base, end, memory in self._bus_pages.get(addr >> BUS_PAGE_SHIFT, ()):
+            if base <= addr < end:
+                return memory, addr - base
+        for base, end, memory in self._bus_large:
+            if base <= addr < end:
+                return memory, addr - base
+        return None, 0
+    
+    def _build_bus_table(self):
+        """추가 영역과 장치의 페이지 -> [(시작, 끝, 대상)] 표 만들기 (RAM은 data_memory가 먼저 본다)"""
+        pages = {}
+        large = []
+        for entry in self.extra_memories + self.devices:
+            base, end, _ = entry
+            first, last = base >> BUS_PAGE_SHIFT, (end - 1) >> BUS_PAGE_SHIFT
+            if last - first >= BUS_TABLE_MAX_PAGES:
+                large.append(entry)
+                continue
+            for page in range(first, last + 1):
+                pages[page] = pages.get(page, ()) + (entry,)
+        self._bus_pages = pages
+        self._bus_large = tuple(large)
+    
+    def attach_device(self, base, device):
+        """주변장치를 데이터 버스 base 주소에 붙인다 (riscv_apb.ApbDevice 등)
+
+        장치는 read_*/write_* 인터페이스를 가진 객체로, RAM과 같은 경로로
+        (장치, base 기준 오프셋)으로 접근된다. 다른 영역과 겹치면 ValueError.
+        """
+        end = base + len(device)
+        if base < 0 or base & 0x3 or end > 0x100000000:
+            raise ValueError(f"장치 주소가 잘못되었습니다 (0x{base:X})")
+        for other_base, other_end, _ in ([(self.ram_base, self.ram_base + self.ram_size, None)]
+                                         + self.extra_memories + self.devices):
+            if base < other_end and other_base < end:
+                raise ValueError(f"장치 주소 0x{base:08X}~0x{end - 1:08X}가 다른 영역과 겹칩니다")
+        self.devices.append((base, end, device))
+        device.attach(self)
+        self._build_bus_table()
+        return device
+    
+    def halt(self, reason):
+        """시뮬레이션 정지 (reason은 상태 표시줄에 그대로 쓰인다)"""
+        self.halted = True
+        self.halt_reason = reason
+        return False
+    
+    def step(self):
+        """한 사이클 실행. 정지 조건에 걸리면 False를 반환"""
+        if self.halted:
+            return False
+        
+        # 현재 상태를 히스토리에 저장
+        if self.keep_history:
+            self.save_state()
+        
+        # 사이클 카운터 증가
+        self.cycle_count += 1
+        
+        # ROM 범위 체크 - PC가 ROM 범위를 벗어나면 시뮬레이션 정지
+        rom_addr = self.pipe.PCOutData
+        
+        # PC가 유효한 ROM 주소인지 확인 (기본 0x00000000 ~ 0x000003FC)
+        # FETCH에서만 확인해 마지막 ROM 워드의 명령어도 끝까지 실행한다
+        if self.state == FETCH and not self.rom_base <= rom_addr <= self.rom_last:
+            return self.halt(f"ROM 범위 초과 - 시뮬레이션 종료 (PC: 0x{rom_addr:08X})")
+        
+        # 무한 루프 방지 - 같은 PC에서 너무 오래 머물면 정지
+        if self._last_pc is not None:
+            if self._last_pc == rom_addr:
+                self._pc_stall_count += 1
+                if self._pc_stall_count > 100:  # 100사이클 이상 같은 PC에 머물면 정지
+                    return self.halt(f"무한 루프 감지 - 시뮬레이션 종료 (PC: 0x{rom_addr:08X})")
+            else:
+                self._pc_stall_count = 0
+        else:
+            self._last_pc = rom_addr
+            self._pc_stall_count = 0
+        
+        # Control Unit 상태 머신 실행
+        state = self.state
+        self.execute_control_unit_state()
+        
+        # DataPath 실행
+        self.execute_datapath()
+        
+        if self.profiler is not None:
+            self.profiler.record_cycle(state, rom_addr)
+        
+        # 명령어 완료 체크 (FETCH로 돌아왔을 때)
+        if self.state == FETCH and self._instruction_completed:
+            self.instruction_count += 1
+            self._instruction_completed = False
+        
+        # 로그 기록 (기록기 버퍼에 쌓는다)
+        if self.log_file is not None:
+            pipe = self.pipe
+            self.log_file.record(self.cycle_count, pipe.PCOutData, self.current_instruction,
+                                 pipe.MemAccReg_busAddr, pipe.MemAccReg_busWData,
+                                 pipe.MemAccReg_busRData, self.signals.busWe)
+        
+        # 최대 사이클 수 제한 (안전장치)
+        if self.max_cycles is not None and self.cycle_count > self.max_cycles:
+            return self.halt("최대 사이클 수 도달 - 시뮬레이션 종료")
+        return True
+    
+    def run(self, max_cycles=None, until_breakpoint=False):
+        """최대 max_cycles 사이클 실행하고 실제로 실행한 사이클 수를 반환
+
+        max_cycles가 None이면 정지 조건(ROM 범위 초과, 무한 루프,
+        최대 사이클 수)에 걸릴 때까지 실행한다.
+        until_breakpoint가 True이면 breakpoints에 있는 PC를 FETCH하기 직전에
+        멈추고 breakpoint_hit을 세운다. 다음 run()은 그 PC부터 이어서 실행한다.
+        워치포인트 엔진(watch)이 붙어 있으면 워치포인트에 걸린 사이클 뒤에도
+        멈추고 원인을 watch_hit에 남긴다.
+        """
+        step = self.step
+        start = self.cycle_count
+        end = None if max_cycles is None else start + max_cycles
+        breakpoints = self.breakpoints if until_breakpoint else None
+        watch = self.watch if until_breakpoint else None
+        
+        # 직전 run()이 브레이크포인트에서 멈췄다면 그 자리는 한 번 건너뛴다
+        resume = self.breakpoint_hit
+        self.breakpoint_hit = False
+        self.watch_hit = None
+        
+        while end is None or self.cycle_count < end:
+            if (breakpoints and self.state == FETCH
+                    and self.pipe.PCOutData in breakpoints):
+                if not resume and (watch is None or watch.breakpoint_condition(self.pipe.PCOutData)):
+                    self.breakpoint_hit = True
+                    break
+            resume = False
+            if not step():
+                break
+            if watch is not None and self._watch_stopped(watch):
+                break
+        return self.cycle_count - start
+    
+    def _watch_stopped(self, watch):
+        """워치포인트에 걸렸거나 명령어 경계에서 조건 정지가 참이 되었는지"""
+        if self.watch_hit is not None:
+            return True
+        return bool(watch.conditions) and self.state == FETCH and watch.check_conditions()
+    
+    def step_instruction(self):
+        """명령어 하나를 한 번에 실행 (ISA 수준 빠른 실행)
+
+        FSM을 사이클마다 돌리지 않고 opcode별 핸들러로 명령어를 바로 끝낸다.
+        cycle_count는 명령어 종류별 상태 수만큼 더해서 사이클 모델과 같게 유지하고,
+        파이프라인 레지스터/버스/제어 신호도 사이클 모델로 실행했을 때의
+        마지막 상태 값으로 맞춰 두므로 어느 명령어 경계에서든 step()으로
+        다시 바꿔 실행할 수 있다.
+
+        명령어 중간(FETCH가 아닌 상태)에서 호출하면 사이클 모델로 현재 명령어를
+        마저 끝낸다. 사이클 로그를 기록 중이거나 이번 명령어 안에서 최대 사이클
+        수 또는 ROM 범위 정지에 걸리는 경우에도 사이클 모델로 실행한다.
+        정지하면 False를 반환한다.
+        """
+        if self.halted:
+            return False
+        
+        pc = self.pipe.PCOutData
+        decoded = self.decode_cache.lookup(pc)
+        if (self.state != FETCH or self.log_file is not None or not self.rom_base <= pc <= self.rom_last
+                or (self.max_cycles is not None
+                    and self.cycle_count + decoded.cycles > self.max_cycles)):
+            # 사이클 모델로 다음 명령어 경계까지 실행
+            while self.step() and self.state != FETCH:
+                pass
+            return not self.halted
+        
+        # 현재 상태를 히스토리에 저장 (명령어 단위)
+        if self.keep_history:
+            self.save_state()
+        if self._last_pc is None:
+            self._last_pc = pc
+        
+        regfile = self.regfile
+        pipe = self.pipe
+        rf_data1 = regfile[decoded.rs1]
+        rf_data2 = regfile[decoded.rs2]
+        
+        # FETCH/DECODE 사이클: 이전 명령어의 ExeReg 주소로 버스를 읽는다
+        bus_addr = pipe.ExeReg_aluResult
+        bus_rdata = pipe.MemAccReg_busRData
+        memory, offset = self.data_memory(bus_addr)
+        if memory is not None:
+            bus_rdata = memory.read_word(offset)
+        
+        # FETCH: 명령어 래치, Decode 레지스터, PC+4
+        self.current_instruction = decoded.word
+        self.current_decoded = decoded
+        pipe.PCOutData = pc + 4
+        pipe.DecReg_RFData1 = rf_data1
+        pipe.DecReg_RFData2 = rf_data2
+        pipe.DecReg_immExt = decoded.imm
+        
+        state = decoded.exe_state
+        self.aluControl = 0
+        self.ramControl = 0
+        if state != FETCH:
+            # DECODE: ExeReg 갱신 (ALU는 ADD, aluSrcMuxSel=0)
+            bus_addr = (rf_data1 + rf_data2) & 0xFFFFFFFF
+            pipe.ExeReg_aluResult = bus_addr
+            pipe.ExeReg_RFData2 = rf_data2
+            pipe.ExeReg_PCSrcMuxOut = pc + 8
+            
+            # *_EXE 이후 사이클: 새 ExeReg 주소로 버스를 읽는다
+            memory, offset = self.data_memory(bus_addr)
+            if memory is not None:
+                bus_rdata = memory.read_word(offset)
+            pipe.MemAccReg_busAddr = bus_addr
+            pipe.MemAccReg_busRData = bus_rdata
+            
+            self._instruction_handlers[state](decoded, pc, rf_data1, rf_data2)
+            self.instruction_count += 1
+        else:
+            pipe.MemAccReg_busAddr = bus_addr
+            pipe.MemAccReg_busRData = bus_rdata
+        
+        self.signals.load(LAST_STATE_SIGNALS[state])
+        self.state = self.next_state = FETCH
+        self.cycle_count += decoded.cycles
+        if self.profiler is not None:
+            self.profiler.record_instruction(pc, decoded)
+        return True
+    
+    def run_instructions(self, max_instructions=None, until_breakpoint=False):
+        """명령어 단위로 최대 max_instructions개 실행하고 실행한 사이클 수를 반환
+
+        until_breakpoint의 의미는 run()과 같다. 블록 번역이 켜져 있으면
+        번역기가 여러 번 디스패치된 ROM 기본 블록을 블록 단위로 실행한다 (결과는
+        같다, 워치포인트 엔진이 붙어 있으면 번역하지 않는다).
+        """
+        if self.translator is not None and self.watch is None:
+            return self.translator.run(max_instructions, until_breakpoint)
+        step_instruction = self.step_instruction
+        start = self.cycle_count
+        breakpoints = self.breakpoints if until_breakpoint else None
+        watch = self.watch if until_breakpoint else None
+        
+        # 직전 실행이 브레이크포인트에서 멈췄다면 그 자리는 한 번 건너뛴다
+        resume = self.breakpoint_hit
+        self.breakpoint_hit = False
+        self.watch_hit = None
+        
+        executed = 0
+        while max_instructions is None or executed < max_instructions:
+            if (breakpoints and self.state == FETCH
+                    and self.pipe.PCOutData in breakpoints):
+                if not resume and (watch is None or watch.breakpoint_condition(self.pipe.PCOutData)):
+                    self.breakpoint_hit = True
+                    break
+            resume = False
+            if not step_instruction():
+                break
+            executed += 1
+            if watch is not None and self._watch_stopped(watch):
+                break
+        return self.cycle_count - start
+    
+    def enable_translation(self, enabled=True):
+        """run_instructions()에서 기본 블록 번역 사용 켜기/끄기 (riscv_translate)"""
+        if enabled:
+            from riscv_translate import BlockTranslator
+            if self.translator is None:
+                self.translator = BlockTranslator(self)
+        else:
+            self.translator = None
+    
+    def _write_rd(self, decoded, value):
+        """Register File 쓰기 (x0는 항상 0)"""
+        if decoded.rd != 0:
+            if self._journal is not None:
+                self._journal.append((None, decoded.rd, 0, self.regfile[decoded.rd]))
+            if self.dirty_registers is not None:
+                self.dirty_registers.add(decoded.rd)
+            if self.watch is not None and self.watch.registers[decoded.rd] is not None:
+                self.watch.check_register(decoded.rd, self.regfile[decoded.rd], value)
+            self.regfile[decoded.rd] = value
+    
+    def _exec_r(self, decoded, pc, rf_data1, rf_data2):
+        """R_EXE: rd = rs1 op rs2"""
+        self.aluControl = decoded.operator
+        self._write_rd(decoded, self.execute_alu(rf_data1, rf_data2, decoded.operator))
+    
+    def _exec_i(self, decoded, pc, rf_data1, rf_data2):
+        """I_EXE: rd = rs1 op imm"""
+        self.aluControl = decoded.alu_control
+        self._write_rd(decoded, self.execute_alu(rf_data1, decoded.imm, self.aluControl))
+    
+    def _exec_b(self, decoded, pc, rf_data1, rf_data2):
+        """B_EXE: 레지스터 쓰기 없음 (PC는 FETCH에서 이미 PC+4)"""
+        self.aluControl = decoded.operator
+    
+    def _exec_lu(self, decoded, pc, rf_data1, rf_data2):
+        """LU_EXE: rd = immExt"""
+        self._write_rd(decoded, decoded.imm)
+    
+    def _exec_au(self, decoded, pc, rf_data1, rf_data2):
+        """AU_EXE: rd = immExt + PCOutData"""
+        self._write_rd(decoded, decoded.imm + pc + 4)
+    
+    def _exec_j(self, decoded, pc, rf_data1, rf_data2):
+        """J_EXE/JL_EXE: rd = PCOutData + 4"""
+        self._write_rd(decoded, pc + 8)
+    
+    def _exec_s(self, decoded, pc, rf_data1, rf_data2):
+        """S_EXE -> S_MEM: ExeReg 주소에 rs2 저장"""
+        addr = self.pipe.ExeReg_aluResult
+        self.pipe.MemAccReg_busWData = rf_data2
+        self.ramControl = decoded.store_ram_control
+        if self.watch is not None:
+            self.watch.check_write(addr, self.ramControl, rf_data2)
+        memory, offset = self.data_memory(addr)
+        if memory is not None:
+            if self._journal is not None:
+                self._journal_store(memory, offset, self.ramControl)
+            if self.dirty_words is not None:
+                self._mark_dirty(memory, offset, self.ramControl)
+            if self.ramControl == 0:  # sw
+                memory.write_word(offset, rf_data2)
+            elif self.ramControl == 1:  # sb
+                memory.write_byte(offset, rf_data2)
+            elif self.ramControl == 2:  # sh
+                memory.write_half(offset, rf_data2)
+    
+    def _exec_l(self, decoded, pc, rf_data1, rf_data2):
+        """L_EXE -> L_MEM -> L_WB: rd = 마지막 버스 읽기 데이터 (L_WB는 ramControl=0)"""
+        if self.watch is not None:
+            self.watch.check_read(self.pipe.ExeReg_aluResult, decoded.load_ram_control)
+        self._write_rd(decoded, self.pipe.MemAccReg_busRData)
+    
+    def execute_control_unit_state(self):
+        """Control Unit 상태 머신 실행 (CONTROL_TABLE 조회)"""
+        state = self.state
+        signal_values, next_state, completes, uses_alu_control, ram_source = CONTROL_TABLE[state]
+        
+        # 제어 신호 (상태별 값을 제자리에 기록)
+        signals = self.signals
+        (signals.PCEn, signals.regFileWe, signals.aluSrcMuxSel, signals.busWe,
+         signals.RFWDSrcMuxSel, signals.branch, signals.jal, signals.jalr) = signal_values
+        
+        if state == FETCH:
+            # 명령어 페치 (사전 디코딩된 레코드를 함께 가져온다)
+            decoded = self.decode_cache.lookup(self.pipe.PCOutData)
+            self.current_decoded = decoded
+            self.current_instruction = decoded.word
+        else:
+            decoded = self.current_decoded
+            if next_state is None:
+                # DECODE: 명령어 타입에 따른 다음 상태 (디코딩 시 미리 계산)
+                next_state = decoded.exe_state
+        
+        self.aluControl = decoded.alu_control if uses_alu_control else 0
+        if ram_source == RAM_NONE:
+            self.ramControl = 0
+        elif ram_source == RAM_STORE:
+            self.ramControl = decoded.store_ram_control
+        else:
+            self.ramControl = decoded.load_ram_control
+            if self.watch is not None:  # L_MEM: 로드 명령어의 실제 메모리 읽기
+                self.watch.check_read(self.pipe.ExeReg_aluResult, self.ramControl)
+        
+        if completes:
+            self._instruction_completed = True
+        
+        # 상태 전환
+        self.state = self.next_state = next_state
+    
+    def execute_datapath(self):
+        """DataPath 실행 (하드웨어와 동일)"""
+        decoded = self.current_decoded
+        rs1 = decoded.rs1
+        rs2 = decoded.rs2
+        rd = decoded.rd
+        pipe = self.pipe
+        signals = self.signals
+        
+        # Register File 읽기 (x0는 항상 0)
+        RFData1 = 0 if rs1 == 0 else self.regfile[rs1]
+        RFData2 = 0 if rs2 == 0 else self.regfile[rs2]
+        
+        # 파이프라인 레지스터 업데이트 (Decode 단계)
+        if self.state == DECODE:
+            pipe.DecReg_RFData1 = RFData1
+            pipe.DecReg_RFData2 = RFData2
+            pipe.DecReg_immExt = decoded.imm  # Immediate 확장 (사전 디코딩 값)
+        
+        # ALU 소스 멀티플렉서
+        if signals.aluSrcMuxSel:
+            aluSrcMuxOut = pipe.DecReg_immExt
+        else:
+            aluSrcMuxOut = pipe.DecReg_RFData2
+        
+        # ALU 실행
+        aluResult = ALU_OPERATIONS[self.aluControl](pipe.DecReg_RFData1, aluSrcMuxOut)
+        
+        # PC 관련 계산
+        PC_4_AdderResult = pipe.PCOutData + 4
+        PC_Imm_AdderSrcMuxOut = (pipe.PCOutData
+                                if not signals.jalr
+                                else pipe.DecReg_RFData1)
+        PC_Imm_AdderResult = pipe.DecReg_immExt + PC_Imm_AdderSrcMuxOut
+        
+        # PC 소스 멀티플렉서
+        PCSrcMuxSel = signals.jal or (aluResult and signals.branch)
+        PCSrcMuxOut = PC_Imm_AdderResult if PCSrcMuxSel else PC_4_AdderResult
+        
+        # 메모리 접근 (Memory 단계)
+        addr = pipe.ExeReg_aluResult
+        pipe.MemAccReg_busAddr = addr
+        
+        # 주소 디코딩 (RAM은 바로, 그 밖의 영역은 data_memory()로 찾는다)
+        memory = self.ram
+        offset = addr - self.ram_base
+        if not 0 <= offset < self.ram_size:
+            memory, offset = self.data_memory(addr)
+        
+        if signals.busWe:  # Store
+            data = pipe.ExeReg_RFData2
+            pipe.MemAccReg_busWData = data
+            if self.watch is not None:
+                self.watch.check_write(addr, self.ramControl, data)
+            
+            if memory is not None:
+                if self._journal is not None:
+                    self._journal_store(memory, offset, self.ramControl)
+                if self.dirty_words is not None:
+                    self._mark_dirty(memory, offset, self.ramControl)
+                if self.ramControl == 0:  # sw
+                    memory.write_word(offset, data)
+                elif self.ramControl == 1:  # sb
+                    memory.write_byte(offset, data)
+                elif self.ramControl == 2:  # sh
+                    memory.write_half(offset, data)
+        elif memory is not None:  # Load
+            if self.ramControl == 0:  # lw
+                pipe.MemAccReg_busRData = memory.read_word(offset)
+            elif self.ramControl == 1:  # lb
+                value = memory.read_byte(offset)
+                if value & 0x80:
+                    value |= 0xFFFFFF00
+                pipe.MemAccReg_busRData = value
+            elif self.ramControl == 2:  # lh
+                value = memory.read_half(offset)
+                if value & 0x8000:
+                    value |= 0xFFFF0000
+                pipe.MemAccReg_busRData = value
+            elif self.ramControl == 5:  # lbu
+                pipe.MemAccReg_busRData = memory.read_byte(offset)
+            elif self.ramControl == 6:  # lhu
+                pipe.MemAccReg_busRData = memory.read_half(offset)
+        
+        # Register File 쓰기 (Writeback 단계) - 즉시 실행
+        if signals.regFileWe and rd != 0:
+            if self._journal is not None:
+                self._journal.append((None, rd, 0, self.regfile[rd]))
+            if self.dirty_registers is not None:
+                self.dirty_registers.add(rd)
+            # Register File Write Data 소스 멀티플렉서 (RFWDSrcMuxSel 0~4)
+            value = (aluResult, pipe.MemAccReg_busRData, pipe.DecReg_immExt,
+                     PC_Imm_AdderResult, PC_4_AdderResult)[signals.RFWDSrcMuxSel]
+            if self.watch is not None and self.watch.registers[rd] is not None:
+                self.watch.check_register(rd, self.regfile[rd], value)
+            self.regfile[rd] = value
+        
+        # 파이프라인 레지스터 업데이트 (Execute 단계)
+        if UPDATES_EXE_REG[self.state]:
+            pipe.ExeReg_aluResult = aluResult
+            pipe.ExeReg_RFData2 = pipe.DecReg_RFData2
+            pipe.ExeReg_PCSrcMuxOut = PCSrcMuxOut
+        
+        # PC 업데이트 - 즉시 실행 (PCEn이 1일 때)
+        if signals.PCEn:
+            pipe.PCOutData = PCSrcMuxOut
+        
+        # x0 레지스터는 항상 0
+        self.regfile[0] = 0
+    
+    def execute_alu(self, a, b, aluControl):
+        """ALU 실행 (alu 모듈과 동일, ALU_OPERATIONS 조회)"""
+        return ALU_OPERATIONS[aluControl](a, b)
+    
+    def save_state(self):
+        """다음 단계의 되돌리기 저널 항목 시작
+
+        레지스터 파일과 RAM은 복사하지 않는다. 단계 중에 덮어쓰는
+        레지스터/메모리의 이전 값만 _journal에 쌓이고, 상태 번호와
+        파이프라인 레지스터, 제어 신호 같은 스칼라 값만 튜플로 남긴다.
+        """
+        self._journal = []
+        self.history.append((self._scalar_state(), self._journal))
+    
+    def _scalar_state(self):
+        """레지스터 파일/메모리를 뺀 나머지 상태 튜플 (저널/체크포인트용)"""
+        return (self.state, self.next_state, self.cycle_count, self.instruction_count,
+                self.current_instruction, self.current_decoded, self.aluControl, self.ramControl,
+                self._instruction_completed, self._last_pc, self._pc_stall_count,
+                self.pipe.values(), self.signals.values())
+    
+    def _load_scalar_state(self, scalars):
+        """_scalar_state() 튜플 복원"""
+        (self.state, self.next_state, self.cycle_count, self.instruction_count,
+         self.current_instruction, self.current_decoded, self.aluControl, self.ramControl,
+         self._instruction_completed, self._last_pc, self._pc_stall_count,
+         pipe_values, signal_values) = scalars
+        self.pipe.load(pipe_values)
+        self.signals.load(signal_values)
+    
+    def _journal_store(self, memory, offset, ram_control):
+        """Store 직전에 덮어쓸 메모리 값을 저널에 기록 (ramControl: sw=0, sb=1, sh=2)
+
+        주변장치처럼 undoable이 False인 대상은 읽은 값을 다시 써서 되돌릴 수
+        없으므로 장치 전체의 snapshot()을 (장치, None, None, 상태)로 남긴다.
+        """
+        if not getattr(memory, 'undoable', True):
+            self._journal.append((memory, None, None, memory.snapshot()))
+            return
+        if ram_control == 0:
+            old = memory.read_word(offset)
+        elif ram_control == 1:
+            old = memory.read_byte(offset)
+        elif ram_control == 2:
+            old = memory.read_half(offset)
+        else:
+            return
+        self._journal.append((memory, offset, ram_control, old))
+    
+    def track_dirty(self, enabled=True):
+        """쓰기 경로에서 바뀐 레지스터/메모리 워드 추적 켜기/끄기 (화면 부분 갱신용)"""
+        if enabled:
+            self.dirty_registers = set()
+            self.dirty_words = set()
+            self.dirty_all = True
+        else:
+            self.dirty_registers = self.dirty_words = None
+    
+    def take_dirty(self):
+        """지금까지 쌓인 변경 목록을 (dirty_all, 레지스터 집합, 워드 집합)으로 넘기고 비운다
+
+        추적이 꺼져 있으면 무엇이 바뀌었는지 모르므로 dirty_all을 True로 돌려준다.
+        """
+        if self.dirty_registers is None:
+            return True, set(), set()
+        everything, self.dirty_all = self.dirty_all, False
+        registers, self.dirty_registers = self.dirty_registers, set()
+        words, self.dirty_words = self.dirty_words, set()
+        return everything, registers, words
+    
+    def _mark_dirty(self, memory, offset, ram_control):
+        """Store가 걸치는 워드를 dirty_words에 추가 (ramControl: sw=0, sb=1, sh=2)"""
+        last = offset + (3 if ram_control == 0 else ram_control - 1)
+        self.dirty_words.add((memory, offset & ~0x3))
+        if last & ~0x3 != offset & ~0x3:
+            self.dirty_words.add((memory, last & ~0x3))
+    
+    def undo_step(self):
+        """이전 단계로 되돌리기 (되돌릴 단계가 없으면 False)"""
+        if not self.history:
+            return False
+        
+        # 저널 항목을 꺼내 쓰기 기록을 역순으로 되돌린다
+        scalars, writes = self.history.pop()
+        self._journal = None
+        regfile = self.regfile
+        for memory, index, ram_control, old in reversed(writes):
+            if memory is None:
+                regfile[index] = old
+                if self.dirty_registers is not None:
+                    self.dirty_registers.add(index)
+                continue
+            if index is None:
+                memory.restore(old)  # 주변장치 (_journal_store() 참고)
+                continue
+            if self.dirty_words is not None:
+                self._mark_dirty(memory, index, ram_control)
+            if ram_control == 0:
+                memory.write_word(index, old)
+            elif ram_control == 1:
+                memory.write_byte(index, old)
+            else:
+                memory.write_half(index, old)
+        
+        self._load_scalar_state(scalars)
+        self.halted = False
+        self.halt_reason = None
+        self.breakpoint_hit = False
+        self.watch_hit = None
+        return True
+    
+    def capture_state(self):
+        """전체 머신 상태 복사본 (restore_state()에 그대로 넘긴다)
+
+        레지스터 파일, RAM과 추가 데이터 버스 영역, 주변장치 레지스터,
+        파이프라인 레지스터, 제어 신호, FSM 상태, 카운터를 담는다. ROM은
+        실행 중에 바뀌지 않으므로 포함하지 않는다.
+        """
+        return (tuple(self.regfile), self.ram.snapshot(),
+                tuple(memory.snapshot() for _, _, memory in self.extra_memories),
+                tuple(device.snapshot() for _, _, device in self.devices),
+                self._scalar_state(), self.halted, self.halt_reason)
+    
+    def restore_state(self, snapshot):
+        """capture_state()로 만든 상태로 되돌린다 (되돌리기 히스토리는 비운다)"""
+        regfile, ram, extra, devices, scalars, self.halted, self.halt_reason = snapshot
+        self.regfile[:] = regfile
+        self.ram.restore(ram)
+        for (_, _, memory), memory_snapshot in zip(self.extra_memories, extra):
+            memory.restore(memory_snapshot)
+        for (_, _, device), device_snapshot in zip(self.devices, devices):
+            device.restore(device_snapshot)
+        self._load_scalar_state(scalars)
+        self.breakpoint_hit = False
+        self.watch_hit = None
+        self.history.clear()
+        self._journal = None
+        self.dirty_all = True
+    
+    def write_log(self, cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we):
+        """로그 레코드 한 개 기록 (버퍼가 찰 때마다 파일에 쓴다)"""
+        if self.log_file is not None:
+            self.log_file.record(cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we)
+    
+    def start_trace(self, path="python_simulation_log.txt", binary=False):
+        """사이클 로그 기록 시작 (binary가 True이면 riscv_trace 바이너리 형식)"""
+        self.stop_trace()
+        self.log_file = TraceWriter(path, binary)
+        return self.log_file
+    
+    def start_profile(self):
+        """PC / 상태 / 명령어 종류 / 메모리 접근별 사이클 집계 시작 (riscv_profile.Profiler 반환)"""
+        from riscv_profile import Profiler
+        self.profiler = Profiler(self)
+        return self.profiler
+    
+    def start_watch(self):
+        """워치포인트 / 조건 정지 엔진 붙이기 (riscv_watch.WatchEngine 반환, 이미 있으면 그것)"""
+        if self.watch is None:
+            from riscv_watch import WatchEngine
+            self.watch = WatchEngine(self)
+        return self.watch
+    
+    def stop_watch(self):
+        """엔진 떼기 (PC 브레이크포인트 집합은 그대로)"""
+        watch, self.watch = self.watch, None
+        return watch
+    
+    def stop_profile(self):
+        """집계 중지 (지금까지의 Profiler를 반환)"""
+        profiler, self.profiler = self.profiler, None
+        return profiler
+    
+    def stop_trace(self):
+        """사이클 로그 기록 정지 (남은 버퍼를 파일에 쓰고 닫는다)"""
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+
+def main(argv=None):
+    """헤드리스 실행: python riscv_core.py [code.mem|.bin|.elf] [--max-cycles N] [--region 이름:시작:크기 ...]"""
+    import argparse
+    import time
+    import riscv_apb
+    import riscv_snapshot
+    
+    parser = argparse.ArgumentParser(description="RISC-V 멀티사이클 시뮬레이터 (헤드리스)")
+    parser.add_argument("program", nargs="?", default="code.mem", help="프로그램 이미지 (.mem / flat binary / ELF)")
+    parser.add_argument("--max-cycles", type=int, default=None, help="최대 사이클 수 (기본: 제한 없음)")
+    parser.add_argument("--region", action="append", default=[], metavar="NAME:BASE:SIZE",
+                        help="메모리 영역 설정 (예: rom:0:64K, ram:0:4M, sram:0x10000000:256K)")
+    parser.add_argument("--cycles", type=int, default=None,
+                        help="이만큼만 실행하고 멈춘다 (정지 상태로 만들지 않으므로 스냅샷에서 이어서 실행 가능)")
+    parser.add_argument("--load-snapshot", metavar="PATH", help="프로그램 대신 스냅샷 파일에서 시작")
+    parser.add_argument("--save-snapshot", metavar="PATH", help="실행 후 상태를 스냅샷 파일로 저장")
+    parser.add_argument("--compress", action="store_true", help="스냅샷을 zlib으로 압축")
+    parser.add_argument("--trace", metavar="PATH", help="사이클 로그 기록 (python_simulation_log.txt 형식)")
+    parser.add_argument("--binary-trace", action="store_true",
+                        help="--trace를 바이너리 형식으로 기록 (riscv_trace.py로 텍스트 변환)")
+    parser.add_argument("--translate", action="store_true",
+                        help="명령어 단위로 실행하면서 여러 번 디스패치된 ROM 기본 블록만 Python 함수로 번역 "
+                             "(분기하지 않는 이 모델에서는 한 번 실행으로 번역되는 블록이 없어 "
+                             "디스패치 횟수를 세는 만큼 명령어 단위 실행보다 조금 느리다)")
+    parser.add_argument("--peripherals", action="store_true",
+                        help="GPIO/UART/Timer를 0x10003000부터 붙인다 (UART 송신은 표준 출력으로)")
+    args = parser.parse_args(argv)
+    if args.translate and (args.cycles is not None or args.trace):
+        parser.error("--translate는 명령어 단위로 실행하므로 --cycles/--trace와 함께 쓸 수 없습니다")
+    
+    if args.load_snapshot:
+        if args.region:
+            parser.error("--load-snapshot은 스냅샷의 메모리 맵을 쓰므로 --region과 함께 쓸 수 없습니다")
+        try:
+            if args.peripherals:
+                # 주변장치 상태도 스냅샷에 있으므로 장치를 먼저 붙이고 복원한다
+                core = RISCVCore(max_cycles=args.max_cycles,
+                                 memory_map=riscv_snapshot.read_memory_map(args.load_snapshot))
+                riscv_apb.attach_default_peripherals(core, uart_stream=sys.stdout)
+                riscv_snapshot.load_snapshot(args.load_snapshot, core)
+            else:
+                core = riscv_snapshot.load_snapshot(args.load_snapshot, max_cycles=args.max_cycles)
+        except ValueError as e:
+            parser.error(str(e))
+        count = None
+    else:
+        try:
+            memory_map = MemoryMap.from_specs(args.region)
+        except ValueError as e:
+            parser.error(str(e))
+        core = RISCVCore(max_cycles=args.max_cycles, memory_map=memory_map)
+        count = core.load_image(args.program)
+    
+    if args.peripherals and not args.load_snapshot:
+        try:
+            riscv_apb.attach_default_peripherals(core, uart_stream=sys.stdout)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.trace:
+        core.start_trace(args.trace, binary=args.binary_trace)
+    start = time.perf_counter()
+    if args.translate:
+        core.enable_translation()
+        cycles = core.run_instructions()
+    else:
+        cycles = core.run(args.cycles)
+    elapsed = time.perf_counter() - start
+    core.stop_trace()
+    
+    if count is None:
+        print(f"스냅샷 {args.load_snapshot}에서 시작 (사이클 {core.cycle_count - cycles}), "
+              f"{cycles} 사이클 / {core.instruction_count} 명령어 실행")
+    else:
+        print(f"명령어 {count}개 로드, {cycles} 사이클 / {core.instruction_count} 명령어 실행")
+    print(f"정지 사유: {core.halt_reason}")
+    if args.save_snapshot:
+        riscv_snapshot.save_snapshot(core, args.save_snapshot, compress=args.compress)
+        print(f"스냅샷 저장: {args.save_snapshot}")
+    if elapsed > 0:
+        print(f"실행 시간: {elapsed:.3f}s ({cycles / elapsed:,.0f} cycles/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
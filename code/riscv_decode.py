@@ -0,0 +1,216 @@
+"""ROM 명령어 사전 디코딩 (predecode)
+
+ROM은 load_code 이후 바뀌지 않으므로 opcode/func3/rs1/rs2/rd/immediate를
+한 번만 추출해 PC/4 로 인덱싱되는 레코드 배열에 담아 둔다.
+매 사이클 경로에서는 배열 인덱싱만 하면 된다.
+"""
+import struct
+
+from riscv_defines import (
+    FETCH, R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE, S_EXE, L_EXE, NUM_STATES,
+    OP_TYPE_R, OP_TYPE_L, OP_TYPE_I, OP_TYPE_S, OP_TYPE_B, OP_TYPE_LU, OP_TYPE_AU,
+    OP_TYPE_J, OP_TYPE_JL, SRA,
+)
+
+# DECODE 상태에서 opcode에 따라 넘어갈 실행 상태 (ControlUnit.sv와 동일)
+EXE_STATE_BY_OPCODE = {
+    OP_TYPE_R: R_EXE,    # R-type
+    OP_TYPE_S: S_EXE,    # S-type
+    OP_TYPE_L: L_EXE,    # L-type
+    OP_TYPE_I: I_EXE,    # I-type
+    OP_TYPE_B: B_EXE,    # B-type
+    OP_TYPE_LU: LU_EXE,  # LUI
+    OP_TYPE_AU: AU_EXE,  # AUIPC
+    OP_TYPE_J: J_EXE,    # JAL
+    OP_TYPE_JL: JL_EXE,  # JALR
+}
+
+# S_MEM 상태의 ramControl (func3 -> ramControl)
+STORE_RAM_CONTROL = {0: 1, 1: 2, 2: 0}  # sb, sh, sw
+
+# L_MEM 상태의 ramControl (func3 -> ramControl)
+LOAD_RAM_CONTROL = {0: 1, 1: 2, 2: 0, 4: 5, 5: 6}  # lb, lh, lw, lbu, lhu
+
+# 명령어 종류별 FSM 사이클 수 (FETCH, DECODE 포함)
+#   R/I/B/LU/AU/J/JL: FETCH -> DECODE -> *_EXE
+#   S: FETCH -> DECODE -> S_EXE -> S_MEM
+#   L: FETCH -> DECODE -> L_EXE -> L_MEM -> L_WB
+#   알 수 없는 opcode: FETCH -> DECODE -> FETCH
+CYCLES_BY_EXE_STATE = [0] * NUM_STATES
+for _state in (R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE):
+    CYCLES_BY_EXE_STATE[_state] = 3
+CYCLES_BY_EXE_STATE[S_EXE] = 4
+CYCLES_BY_EXE_STATE[L_EXE] = 5
+CYCLES_BY_EXE_STATE[FETCH] = 2
+CYCLES_BY_EXE_STATE = tuple(CYCLES_BY_EXE_STATE)
+
+
+def extract_immediate(instruction):
+    """Immediate 값 추출 (immExtend 모듈과 동일)"""
+    opcode = instruction & 0x7F
+    func3 = (instruction >> 12) & 0x7
+    
+    if opcode == 0x33:  # R-type
+        return 0
+    elif opcode == 0x03:  # L-type
+        imm = ((instruction >> 20) & 0xFFF)
+        if imm & 0x800:
+            imm |= 0xFFFFF000
+        return imm
+    elif opcode == 0x23:  # S-type
+        imm = ((instruction >> 25) & 0x7F) << 5 | ((instruction >> 7) & 0x1F)
+        if imm & 0x800:
+            imm |= 0xFFFFF000
+        return imm
+    elif opcode == 0x13:  # I-type
+        if func3 in [1, 5]:  # SLLI, SRLI, SRAI
+            return (instruction >> 20) & 0x1F
+        elif func3 == 3:  # SLTIU
+            return (instruction >> 20) & 0xFFF
+        else:
+            imm = ((instruction >> 20) & 0xFFF)
+            if imm & 0x800:
+                imm |= 0xFFFFF000
+            return imm
+    elif opcode == 0x63:  # B-type
+        imm_12 = (instruction >> 31) & 0x1
+        imm_11 = (instruction >> 7) & 0x1
+        imm_10_5 = (instruction >> 25) & 0x3F
+        imm_4_1 = (instruction >> 8) & 0xF
+        imm = (imm_12 << 12) | (imm_11 << 11) | (imm_10_5 << 5) | (imm_4_1 << 1)
+        if imm & 0x1000:
+            imm |= 0xFFFFE000
+        return imm
+    elif opcode in [0x37, 0x17]:  # LUI, AUIPC
+        return (instruction >> 12) & 0xFFFFF
+    elif opcode == 0x6F:  # JAL
+        imm_20 = (instruction >> 31) & 0x1
+        imm_19_12 = (instruction >> 12) & 0xFF
+        imm_11 = (instruction >> 20) & 0x1
+        imm_10_1 = (instruction >> 21) & 0x3FF
+        imm = (imm_20 << 20) | (imm_19_12 << 12) | (imm_11 << 11) | (imm_10_1 << 1)
+        if imm & 0x100000:
+            imm |= 0xFFE00000
+        return imm
+    elif opcode == 0x67:  # JALR
+        imm = ((instruction >> 20) & 0xFFF)
+        if imm & 0x800:
+            imm |= 0xFFFFF000
+        return imm
+    return 0
+
+
+class DecodedInstruction:
+    """디코딩된 명령어 한 개 (매 사이클 다시 시프트/마스크하지 않기 위한 레코드)"""
+    __slots__ = ('word', 'opcode', 'func3', 'operator', 'rs1', 'rs2', 'rd', 'imm',
+                 'exe_state', 'cycles', 'alu_control', 'store_ram_control', 'load_ram_control')
+    
+    def __init__(self, word):
+        self.word = word
+        self.opcode = word & 0x7F
+        self.func3 = (word >> 12) & 0x7
+        self.operator = ((word >> 30) & 0x1) << 3 | self.func3
+        self.rs1 = (word >> 15) & 0x1F
+        self.rs2 = (word >> 20) & 0x1F
+        self.rd = (word >> 7) & 0x1F
+        self.imm = extract_immediate(word)
+        # 알 수 없는 opcode는 DECODE에서 바로 FETCH로 돌아간다
+        self.exe_state = EXE_STATE_BY_OPCODE.get(self.opcode, FETCH)
+        self.cycles = CYCLES_BY_EXE_STATE[self.exe_state]
+        # *_EXE 상태의 aluControl (I-type은 SRAI만 operator[3]를 쓴다)
+        if self.exe_state == I_EXE and self.operator != SRA:
+            self.alu_control = self.operator & 0x7
+        elif self.exe_state in (R_EXE, I_EXE, B_EXE):
+            self.alu_control = self.operator
+        else:
+            self.alu_control = 0
+        self.store_ram_control = STORE_RAM_CONTROL.get(self.func3, 0)
+        self.load_ram_control = LOAD_RAM_CONTROL.get(self.func3, 0)
+
+
+def decode(word):
+    """명령어 워드 하나를 디코딩"""
+    return DecodedInstruction(word)
+
+
+# 디코딩 레코드 직렬화 형식 (word 제외, 이미지 캐시용)
+#   imm, opcode, func3, operator, rs1, rs2, rd, exe_state, cycles,
+#   alu_control, store_ram_control, load_ram_control
+RECORD_FORMAT = struct.Struct('<I11B')
+
+
+def pack_records(entries):
+    """디코딩 레코드 리스트 -> 바이트열 (워드 순서대로)"""
+    pack = RECORD_FORMAT.pack
+    return b''.join(pack(e.imm & 0xFFFFFFFF, e.opcode, e.func3, e.operator, e.rs1, e.rs2, e.rd,
+                         e.exe_state, e.cycles, e.alu_control, e.store_ram_control,
+                         e.load_ram_control) for e in entries)
+
+
+def unpack_records(words, buffer, offset=0):
+    """pack_records()로 만든 바이트열을 디코딩 레코드 리스트로 복원 (다시 디코딩하지 않는다)"""
+    new = DecodedInstruction.__new__
+    size = RECORD_FORMAT.size * len(words)
+    records = RECORD_FORMAT.iter_unpack(memoryview(buffer)[offset:offset + size])
+    entries = []
+    for word, (imm, opcode, func3, operator, rs1, rs2, rd, exe_state, cycles,
+               alu_control, store_ram_control, load_ram_control) in zip(words, records):
+        entry = new(DecodedInstruction)
+        entry.word = word
+        entry.opcode = opcode
+        entry.func3 = func3
+        entry.operator = operator
+        entry.rs1 = rs1
+        entry.rs2 = rs2
+        entry.rd = rd
+        entry.imm = imm
+        entry.exe_state = exe_state
+        entry.cycles = cycles
+        entry.alu_control = alu_control
+        entry.store_ram_control = store_ram_control
+        entry.load_ram_control = load_ram_control
+        entries.append(entry)
+    return entries
+
+
+class DecodeCache:
+    """PC/4 로 인덱싱되는 디코딩 레코드 배열
+
+    load 시점에 적재된 워드를 한꺼번에 디코딩하고, 나머지 슬롯은 처음
+    FETCH될 때 채운다. ROM이 다시 로드되면 invalidate()로 비워야 한다.
+    """
+    
+    def __init__(self, rom, num_words, base=0):
+        self.rom = rom
+        self.base = base  # ROM 영역 시작 주소 (PC - base가 ROM 오프셋)
+        self.entries = [None] * num_words
+        self.generation = 0  # invalidate()마다 증가 (블록 번역 캐시가 ROM 변경을 알아채는 데 쓴다)
+    
+    def predecode(self, count):
+        """ROM 앞쪽 count 워드를 미리 디코딩"""
+        entries = self.entries
+        read_word = self.rom.read_word
+        for index in range(min(count, len(entries))):
+            entries[index] = DecodedInstruction(read_word(index * 4))
+    
+    def fill(self, records):
+        """미리 디코딩해 둔 레코드 리스트를 앞쪽 슬롯에 채운다 (이미지 캐시용)"""
+        count = min(len(records), len(self.entries))
+        self.entries[:count] = records[:count]
+    
+    def lookup(self, addr):
+        """PC 주소에 해당하는 디코딩 레코드 반환"""
+        offset = addr - self.base
+        index = offset >> 2
+        if offset & 0x3 or not 0 <= index < len(self.entries):
+            # 정렬되지 않았거나 배열 밖인 주소는 캐시하지 않는다
+            return DecodedInstruction(self.rom.read_word(offset))
+        entry = self.entries[index]
+        if entry is None:
+            entry = self.entries[index] = DecodedInstruction(self.rom.read_word(offset))
+        return entry
+    
+    def invalidate(self):
+        """모든 디코딩 레코드 폐기 (ROM 재적재 시)"""
+        self.entries = [None] * len(self.entries)
+        self.generation += 1
@@ -0,0 +1,58 @@
+# defines.sv / ControlUnit.sv 와 같은 인코딩 (Python 모델용)
+
+# ALU 연산 (aluControl, defines.sv)
+ADD = 0b0000
+SUB = 0b1000
+SLL = 0b0001
+SRL = 0b0101
+SRA = 0b1101
+SLT = 0b0010
+SLTU = 0b0011
+XOR = 0b0100
+OR = 0b0110
+AND = 0b0111
+
+# 분기 비교 (func3, defines.sv)
+BEQ = 0b000
+BNE = 0b001
+BLT = 0b100
+BGE = 0b101
+BLTU = 0b110
+BGEU = 0b111
+
+# opcode (defines.sv)
+OP_TYPE_R = 0b0110011
+OP_TYPE_L = 0b0000011
+OP_TYPE_I = 0b0010011
+OP_TYPE_S = 0b0100011
+OP_TYPE_B = 0b1100011
+OP_TYPE_LU = 0b0110111
+OP_TYPE_AU = 0b0010111
+OP_TYPE_J = 0b1101111
+OP_TYPE_JL = 0b1100111
+
+# Control Unit 상태 (ControlUnit.sv의 state_e 선언 순서)
+FETCH = 0
+DECODE = 1
+R_EXE = 2
+I_EXE = 3
+B_EXE = 4
+LU_EXE = 5
+AU_EXE = 6
+J_EXE = 7
+JL_EXE = 8
+S_EXE = 9
+S_MEM = 10
+L_EXE = 11
+L_MEM = 12
+L_WB = 13
+
+STATE_NAMES = ('FETCH', 'DECODE', 'R_EXE', 'I_EXE', 'B_EXE', 'LU_EXE', 'AU_EXE',
+               'J_EXE', 'JL_EXE', 'S_EXE', 'S_MEM', 'L_EXE', 'L_MEM', 'L_WB')
+STATE_BY_NAME = {name: state for state, name in enumerate(STATE_NAMES)}
+NUM_STATES = len(STATE_NAMES)
+
+# 레지스터 ABI 이름 (x0 ~ x31)
+REG_NAMES = ('zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1',
+             'a0', 'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7', 's2', 's3', 's4',
+             's5', 's6', 's7', 's8', 's9', 's10', 's11', 't3', 't4', 't5', 't6')
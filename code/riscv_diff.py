@@ -0,0 +1,191 @@
+"""Python 모델 트레이스와 Vivado 트레이스 비교 (lockstep diff)
+
+write_log 출력(python_simulation_log.txt 또는 바이너리 트레이스)과
+TB_SIM.sv의 simulation_log.txt를 사이클 번호로 맞춰 나란히 읽으며
+PC / 명령어 / 버스 필드가 처음 달라지는 곳을 앞뒤 문맥과 함께 보고한다.
+두 파일을 한 번씩 순서대로 읽기만 하므로 수 GB 트레이스도 메모리는 일정하다.
+
+    python riscv_diff.py python_simulation_log.txt simulation_log.txt [--offset N]
+
+종료 코드: 0 일치, 1 불일치, 2 사용법/파일 오류 (CI에서 그대로 쓴다)
+"""
+import sys
+from collections import deque
+
+from riscv_trace import FIELD_NAMES, format_record, iter_trace
+
+# 비교하는 필드 (cycle 제외)
+COMPARE_FIELDS = FIELD_NAMES[1:]
+
+
+class Divergence:
+    """불일치 한 건 (사이클, 다른 필드 이름들, 두 레코드, 앞뒤 문맥)"""
+    __slots__ = ('cycle', 'fields', 'python', 'vivado', 'before', 'after')
+    
+    def __init__(self, cycle, fields, python, vivado, before):
+        self.cycle = cycle
+        self.fields = fields      # 다른 필드 이름 튜플
+        self.python = python      # Python 레코드 (cycle은 offset 적용 후)
+        self.vivado = vivado      # Vivado 레코드
+        self.before = before      # 직전 (python, vivado) 레코드 쌍 리스트
+        self.after = []           # 직후 (python, vivado) 레코드 쌍 리스트
+
+
+class DiffResult:
+    """비교 결과"""
+    
+    def __init__(self):
+        self.compared = 0          # 두 쪽 모두 있는 사이클 수
+        self.python_only = 0       # Python 트레이스에만 있는 사이클 수
+        self.vivado_only = 0       # Vivado 트레이스에만 있는 사이클 수
+        self.divergences = []      # Divergence 리스트 (최대 max_diffs개)
+        self.mismatched = 0        # 불일치 사이클 수 (max_diffs를 넘은 것 포함)
+        self.first_cycle = None    # 비교한 첫 / 마지막 사이클
+        self.last_cycle = None
+    
+    @property
+    def ok(self):
+        return self.mismatched == 0
+
+
+def _shift(records, offset):
+    """레코드 사이클 번호에 offset을 더한다"""
+    for record in records:
+        yield (record[0] + offset,) + record[1:]
+
+
+def diff_traces(python_path, vivado_path, offset=0, context=3, max_diffs=1, ignore=()):
+    """두 트레이스를 사이클로 맞춰 비교하고 DiffResult 반환
+
+    offset은 Python 사이클 번호에 더할 값 (테스트벤치 리셋 사이클 보정용),
+    ignore는 비교에서 뺄 필드 이름들이다. 불일치가 max_diffs개 모이고
+    마지막 불일치의 뒤 문맥까지 읽으면 바로 멈춘다 (max_diffs가 None이면 끝까지).
+    """
+    unknown = set(ignore) - set(COMPARE_FIELDS)
+    if unknown:
+        raise ValueError(f"알 수 없는 필드: {', '.join(sorted(unknown))}")
+    indexes = [(FIELD_NAMES.index(name), name) for name in COMPARE_FIELDS if name not in ignore]
+    
+    result = DiffResult()
+    history = deque(maxlen=context)
+    pending = []  # 뒤 문맥을 채우는 중인 Divergence
+    python_records = _shift(iter_trace(python_path), offset)
+    vivado_records = iter_trace(vivado_path)
+    python = next(python_records, None)
+    vivado = next(vivado_records, None)
+    
+    while python is not None and vivado is not None:
+        if python[0] < vivado[0]:
+            result.python_only += 1
+            python = next(python_records, None)
+            continue
+        if vivado[0] < python[0]:
+            result.vivado_only += 1
+            vivado = next(vivado_records, None)
+            continue
+        
+        # 같은 사이클: 필드 비교
+        cycle = python[0]
+        if result.first_cycle is None:
+            result.first_cycle = cycle
+        result.last_cycle = cycle
+        result.compared += 1
+        for divergence in pending:
+            divergence.after.append((python, vivado))
+        pending = [d for d in pending if len(d.after) < context]
+        
+        fields = tuple(name for index, name in indexes if python[index] != vivado[index])
+        if fields:
+            result.mismatched += 1
+            if max_diffs is None or len(result.divergences) < max_diffs:
+                divergence = Divergence(cycle, fields, python, vivado, list(history))
+                result.divergences.append(divergence)
+                if context:
+                    pending.append(divergence)
+        history.append((python, vivado))
+        
+        if max_diffs is not None and len(result.divergences) >= max_diffs and not pending:
+            return result
+        python = next(python_records, None)
+        vivado = next(vivado_records, None)
+    
+    # 한쪽이 먼저 끝났으면 남은 레코드 수를 센다
+    while python is not None:
+        result.python_only += 1
+        python = next(python_records, None)
+    while vivado is not None:
+        result.vivado_only += 1
+        vivado = next(vivado_records, None)
+    return result
+
+
+def format_divergence(divergence):
+    """불일치 한 건을 보고서 텍스트로"""
+    lines = [f"사이클 {divergence.cycle}: {', '.join(divergence.fields)} 불일치"]
+    lines.append(f"  {'필드':<12} {'Python':>12} {'Vivado':>12}")
+    for index, name in enumerate(FIELD_NAMES[1:], 1):
+        mark = '  <--' if name in divergence.fields else ''
+        python_value, vivado_value = divergence.python[index], divergence.vivado[index]
+        if name == 'bus_we':
+            lines.append(f"  {name:<12} {python_value:>12} {vivado_value:>12}{mark}")
+        else:
+            lines.append(f"  {name:<12} {f'0x{python_value:08X}':>12} {f'0x{vivado_value:08X}':>12}{mark}")
+    lines.append("  문맥 (P: Python, V: Vivado):")
+    for python, vivado in divergence.before:
+        lines.append(f"    P {format_record(*python).rstrip()}")
+        lines.append(f"    V {format_record(*vivado).rstrip()}")
+    lines.append(f"  > P {format_record(*divergence.python).rstrip()}")
+    lines.append(f"  > V {format_record(*divergence.vivado).rstrip()}")
+    for python, vivado in divergence.after:
+        lines.append(f"    P {format_record(*python).rstrip()}")
+        lines.append(f"    V {format_record(*vivado).rstrip()}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """python riscv_diff.py PYTHON_TRACE VIVADO_TRACE [--offset N] [--context N] [--max-diffs N] [--ignore 필드 ...]"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Python 모델 / Vivado 트레이스 lockstep 비교")
+    parser.add_argument("python_trace", help="Python 트레이스 (python_simulation_log.txt 또는 바이너리)")
+    parser.add_argument("vivado_trace", help="Vivado 트레이스 (simulation_log.txt)")
+    parser.add_argument("--offset", type=int, default=0, help="Python 사이클 번호에 더할 값 (기본 0)")
+    parser.add_argument("--context", type=int, default=3, help="불일치 앞뒤로 보여 줄 사이클 수 (기본 3)")
+    parser.add_argument("--max-diffs", type=int, default=1, help="보고할 최대 불일치 수, 0이면 전부 (기본 1)")
+    parser.add_argument("--ignore", action="append", default=[], choices=COMPARE_FIELDS,
+                        help="비교하지 않을 필드 (여러 번 지정 가능)")
+    parser.add_argument("--strict", action="store_true",
+                        help="한쪽에만 있는 사이클도 불일치로 본다")
+    args = parser.parse_args(argv)
+    
+    try:
+        result = diff_traces(args.python_trace, args.vivado_trace, args.offset, max(args.context, 0),
+                             args.max_diffs or None, args.ignore)
+    except (OSError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    
+    for divergence in result.divergences:
+        print(format_divergence(divergence))
+        print()
+    if result.compared:
+        print(f"비교한 사이클: {result.compared} ({result.first_cycle}~{result.last_cycle})")
+    else:
+        print("비교한 사이클: 0 (겹치는 사이클이 없습니다)")
+    print(f"Python에만 있는 사이클: {result.python_only}, Vivado에만 있는 사이클: {result.vivado_only}")
+    
+    if not result.compared:
+        # 빈 로그 / 잘린 로그 / --offset이 맞지 않는 경우 - 비교한 것이 없으므로 통과가 아니다
+        print("실패: 두 트레이스에 겹치는 사이클이 없어 비교하지 못했습니다")
+        return 1
+    failed = not result.ok or (args.strict and (result.python_only or result.vivado_only))
+    if result.ok:
+        print("불일치 없음" if not failed else "불일치 없음 (한쪽에만 있는 사이클 있음)")
+    else:
+        print(f"불일치 사이클: {result.mismatched}개 이상" if args.max_diffs
+              else f"불일치 사이클: {result.mismatched}개")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""프로그램 이미지 로더 (.mem 텍스트 / flat binary / ELF32)
+
+flat binary와 ELF는 파일을 mmap으로 열고 세그먼트를 memoryview로 잘라
+그대로 ROM/RAM 저장소에 넘긴다. 파일 내용을 워드 단위로 파싱하는
+Python 루프가 없으므로 수 MB 이미지도 몇 ms 안에 적재된다.
+
+.mem 텍스트는 파싱 결과(워드 배열과 디코딩 레코드)를 소스 옆
+__rvcache__/ 에 바이너리로 저장해 두고, 파일이 바뀌지 않았으면
+캐시 파일 한 번 읽기로 끝낸다 (read_mem_cached).
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+from riscv_decode import DecodedInstruction, RECORD_FORMAT, pack_records, unpack_records
+
+# ELF32 (리틀 엔디안) 상수
+ELF_MAGIC = b'\x7fELF'
+ELFCLASS32 = 1
+ELFDATA2LSB = 1
+EM_RISCV = 243
+PT_LOAD = 1
+PF_X = 0x1
+
+_ELF_HEADER = struct.Struct('<HHIIIIIHHHHHH')   # e_ident 뒤 (오프셋 16)
+_ELF_PHDR = struct.Struct('<IIIIIIII')          # p_type ... p_align
+
+# 확장자로 형식을 정한다 (그 밖은 파일 앞부분으로 판단)
+TEXT_EXTENSIONS = ('.mem', '.hex', '.txt')
+
+# .mem 파싱 캐시 파일 (__rvcache__/<파일 이름>.rvimg)
+#   헤더: magic, version, flags, 소스 mtime_ns, 소스 크기, 소스 sha256, max_words, 워드 수
+#   본문: 워드 배열 ('<I' x 워드 수), [디코딩 레코드 (RECORD_FORMAT x 워드 수)]
+CACHE_DIR_NAME = '__rvcache__'
+CACHE_MAGIC = b'RVIM'
+CACHE_VERSION = 1
+CACHE_FLAG_RECORDS = 0x1
+_CACHE_HEADER = struct.Struct('<4sHHqQ32sII')
+
+
+class ImageSegment:
+    """메모리에 올릴 연속 구간 하나"""
+    __slots__ = ('address', 'data', 'mem_size', 'executable')
+    
+    def __init__(self, address, data, mem_size=None, executable=True):
+        self.address = address                    # 적재 주소
+        self.data = data                          # bytes / memoryview (파일 내용)
+        self.mem_size = len(data) if mem_size is None else mem_size  # .bss 포함 크기
+        self.executable = executable              # True면 ROM(명령어 버스)에 올린다
+    
+    def __repr__(self):
+        kind = 'X' if self.executable else 'RW'
+        return f"ImageSegment(0x{self.address:08X}, {len(self.data)} bytes, {kind})"
+
+
+class ProgramImage:
+    """열린 프로그램 이미지 (mmap은 close()까지 유지된다)"""
+    
+    def __init__(self, path, fmt, segments, entry=None, mapping=None):
+        self.path = path
+        self.format = fmt          # 'mem' / 'bin' / 'elf'
+        self.segments = segments
+        self.entry = entry         # ELF 시작 주소 (없으면 None)
+        self._mapping = mapping
+    
+    def close(self):
+        """mmap 해제 (저장소가 아직 세그먼트를 참조하면 나중에 GC가 해제한다)"""
+        mapping, self._mapping = self._mapping, None
+        self.segments = []
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # 코어가 아직 memoryview로 참조 중
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def detect_format(path):
+    """이미지 형식 판별: 'mem', 'elf', 'bin'"""
+    if path.lower().endswith(TEXT_EXTENSIONS):
+        return 'mem'
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    return 'elf' if head == ELF_MAGIC else 'bin'
+
+
+def words_to_bytes(words):
+    """워드 리스트 -> 리틀 엔디안 바이트열"""
+    return struct.pack(f'<{len(words)}I', *(word & 0xFFFFFFFF for word in words))
+
+
+def parse_mem_lines(lines, max_words=256):
+    """code.mem 형식($readmemh) 텍스트를 워드 리스트로 변환 (ROM 워드 수 max_words까지)"""
+    words = []
+    for line in lines:
+        line = line.strip()
+        # 주석이나 빈 줄 건너뛰기
+        if line.startswith('#') or not line:
+            continue
+        # 16진수 기계어 코드만 처리
+        if len(words) < max_words:  # 기본 256 워드 = 1024바이트
+            try:
+                words.append(int(line, 16))
+            except ValueError:
+                continue  # 잘못된 형식의 라인 무시
+    return words
+
+
+def cache_path(path):
+    """.mem 파일의 캐시 파일 경로"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR_NAME, name + '.rvimg')
+
+
+def _read_cache(path, st, max_words, want_records):
+    """유효한 캐시가 있으면 (words, records 또는 None), 없으면 (None, 소스 바이트 또는 None)"""
+    try:
+        with open(cache_path(path), 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return None, None
+    if len(blob) < _CACHE_HEADER.size:
+        return None, None
+    (magic, version, flags, mtime_ns, size, digest,
+     cached_max_words, count) = _CACHE_HEADER.unpack_from(blob)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or cached_max_words != max_words:
+        return None, None
+    if want_records and not flags & CACHE_FLAG_RECORDS:
+        return None, None
+    expected = _CACHE_HEADER.size + 4 * count + (RECORD_FORMAT.size * count if flags & CACHE_FLAG_RECORDS else 0)
+    if len(blob) != expected:
+        return None, None
+    
+    source = None
+    if (mtime_ns, size) != (st.st_mtime_ns, st.st_size):
+        # mtime만 바뀌었을 수 있으므로 내용 해시로 한 번 더 확인
+        with open(path, 'rb') as f:
+            source = f.read()
+        if hashlib.sha256(source).digest() != digest:
+            return None, source
+        _write_cache(path, st, digest, max_words, blob[_CACHE_HEADER.size:], flags, count)
+    
+    words = list(struct.unpack_from(f'<{count}I', blob, _CACHE_HEADER.size))
+    records = None
+    if want_records:
+        records = unpack_records(words, blob, _CACHE_HEADER.size + 4 * count)
+    return words, records
+
+
+def _write_cache(path, st, digest, max_words, body, flags, count):
+    """캐시 파일 기록 (임시 파일 후 교체, 쓸 수 없는 디렉터리면 조용히 건너뛴다)"""
+    target = cache_path(path)
+    header = _CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, flags, st.st_mtime_ns, st.st_size,
+                                digest, max_words, count)
+    temp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temp, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(temp, target)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def read_mem_cached(path, max_words=256, records=False):
+    """.mem 파일을 파싱해 (words, records) 반환 (__rvcache__ 캐시 사용)
+
+    records가 True이면 워드별 DecodedInstruction 리스트도 함께 반환한다
+    (False이면 None). 캐시는 소스 mtime/크기가 같으면 그대로 쓰고, 다르면
+    내용 sha256을 비교해 같을 때만 쓴다.
+    """
+    st = os.stat(path)
+    words, cached = _read_cache(path, st, max_words, records)
+    if words is not None:
+        return words, cached
+    
+    source = cached
+    if source is None:
+        with open(path, 'rb') as f:
+            source = f.read()
+    words = parse_mem_lines(source.decode('utf-8').splitlines(), max_words)
+    decoded = [DecodedInstruction(word) for word in words] if records else None
+    body = words_to_bytes(words)
+    flags = 0
+    if decoded is not None:
+        body += pack_records(decoded)
+        flags |= CACHE_FLAG_RECORDS
+    _write_cache(path, st, hashlib.sha256(source).digest(), max_words, body, flags, len(words))
+    return words, decoded
+
+
+def _map_file(path):
+    """파일 전체를 읽기 전용으로 mmap (빈 파일이면 None)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def open_image(path, fmt=None, base=0, max_words=None):
+    """이미지 파일을 열어 ProgramImage 반환
+
+    fmt가 None이면 detect_format()으로 정한다. base는 .mem / flat binary를
+    올릴 ROM 주소, max_words는 .mem 파싱 시 워드 수 제한이다.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'mem':
+        with open(path, 'r', encoding='utf-8') as f:
+            words = parse_mem_lines(f, max_words if max_words is not None else 1 << 30)
+        return ProgramImage(path, fmt, [ImageSegment(base, words_to_bytes(words))])
+    
+    mapping = _map_file(path)
+    if mapping is None:
+        return ProgramImage(path, fmt, [])
+    view = memoryview(mapping)
+    if fmt == 'bin':
+        return ProgramImage(path, fmt, [ImageSegment(base, view)], mapping=mapping)
+    if fmt == 'elf':
+        try:
+            segments, entry = _elf_segments(view)
+        except ValueError:
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # 잘라 둔 세그먼트 뷰가 GC된 뒤 해제된다
+            raise
+        return ProgramImage(path, fmt, segments, entry, mapping)
+    raise ValueError(f"알 수 없는 이미지 형식: {fmt}")
+
+
+def _elf_segments(view):
+    """ELF32 RISC-V 이미지의 PT_LOAD 세그먼트 목록과 시작 주소"""
+    if len(view) < 52 or bytes(view[:4]) != ELF_MAGIC:
+        raise ValueError("ELF 파일이 아닙니다")
+    if view[4] != ELFCLASS32 or view[5] != ELFDATA2LSB:
+        raise ValueError("32비트 리틀 엔디안 ELF만 지원합니다")
+    (e_type, e_machine, e_version, e_entry, e_phoff, e_shoff, e_flags,
+     e_ehsize, e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx) = _ELF_HEADER.unpack_from(view, 16)
+    if e_machine != EM_RISCV:
+        raise ValueError(f"RISC-V ELF가 아닙니다 (e_machine={e_machine})")
+    if e_phnum and e_phentsize < _ELF_PHDR.size:
+        raise ValueError("프로그램 헤더 크기가 잘못되었습니다")
+    
+    segments = []
+    for i in range(e_phnum):
+        offset = e_phoff + i * e_phentsize
+        if offset + _ELF_PHDR.size > len(view):
+            raise ValueError("프로그램 헤더가 파일 밖을 가리킵니다")
+        (p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz,
+         p_flags, p_align) = _ELF_PHDR.unpack_from(view, offset)
+        if p_type != PT_LOAD or p_memsz == 0:
+            continue
+        if p_offset + p_filesz > len(view):
+            raise ValueError("세그먼트가 파일 밖을 가리킵니다")
+        # 적재 주소는 물리 주소(p_paddr) 기준 (링커 스크립트의 AT())
+        segments.append(ImageSegment(p_paddr, view[p_offset:p_offset + p_filesz],
+                                     p_memsz, bool(p_flags & PF_X)))
+    return segments, e_entry
@@ -0,0 +1,290 @@
+"""메모리 맵 (ROM / 데이터 버스 영역 설정)
+
+MCU.sv처럼 ROM은 명령어 버스, RAM은 데이터 버스에 따로 붙어 있으므로
+ROM과 RAM 영역은 주소가 겹쳐도 된다. 데이터 버스 영역끼리는 겹칠 수 없다.
+크기가 FLAT_LIMIT보다 큰 영역은 페이지 단위로 필요할 때만 할당하는
+SparseMemory를 쓰므로 수 MB 주소 공간도 실제로 건드린 페이지만큼만 차지한다.
+"""
+import struct
+from bisect import bisect_right
+
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT  # 4 KiB
+
+# 이 크기 이하인 영역은 바이트 배열 하나로 만든다 (기존 Memory)
+FLAT_LIMIT = 64 * 1024
+
+# 기본 메모리 맵 (RAM.sv/ROM.sv와 같은 1 KiB)
+DEFAULT_ROM_BASE = 0x00000000
+DEFAULT_ROM_SIZE = 1024
+DEFAULT_RAM_BASE = 0x00000000
+DEFAULT_RAM_SIZE = 1024
+
+_unpack_word = struct.Struct('<I').unpack_from
+_pack_word = struct.Struct('<I').pack_into
+
+
+class SparseMemory:
+    """페이지 단위 지연 할당 메모리 (Memory와 같은 read_*/write_* 인터페이스)
+
+    한 번도 쓰지 않은 페이지는 0으로 읽히고 할당되지 않는다.
+    범위 밖 접근은 Memory와 같이 읽으면 0, 쓰면 무시된다.
+    map_image()로 올린 이미지는 복사하지 않고 그대로 읽다가, 처음 쓰는
+    페이지만 복사한다 (copy-on-write).
+    """
+    
+    def __init__(self, size_bytes, page_size=PAGE_SIZE):
+        if page_size <= 0 or page_size & (page_size - 1):
+            raise ValueError(f"페이지 크기는 2의 거듭제곱이어야 합니다: {page_size}")
+        self.size = size_bytes
+        self.page_size = page_size
+        self.page_shift = page_size.bit_length() - 1
+        self.page_mask = page_size - 1
+        self.pages = {}  # 페이지 번호 -> bytearray(page_size)
+        self.backings = []  # [(시작, 끝, 뷰 또는 None(.bss))], 뒤에 올린 것이 우선
+    
+    def __len__(self):
+        return self.size
+    
+    def _page_for_write(self, addr):
+        index = addr >> self.page_shift
+        page = self.pages.get(index)
+        if page is None:
+            page = self.pages[index] = bytearray(self.page_size)
+            if self.backings:
+                self._fill_page(page, index << self.page_shift)
+        return page
+    
+    def _fill_page(self, page, page_start, backings=None):
+        """페이지에 겹치는 이미지 내용 복사 (오래된 것부터 덮어쓴다)"""
+        page_end = page_start + self.page_size
+        for start, end, view in self.backings if backings is None else backings:
+            lo, hi = max(start, page_start), min(end, page_end)
+            if lo < hi:
+                if view is None:
+                    page[lo - page_start:hi - page_start] = bytes(hi - lo)
+                else:
+                    page[lo - page_start:hi - page_start] = view[lo - start:hi - start]
+    
+    def _backing_byte(self, addr):
+        for start, end, view in reversed(self.backings):
+            if start <= addr < end:
+                return 0 if view is None else view[addr - start]
+        return 0
+    
+    def _backing_word(self, addr):
+        for start, end, view in reversed(self.backings):
+            if start <= addr and addr + 4 <= end:
+                return 0 if view is None else _unpack_word(view, addr - start)[0]
+            if start < addr + 4 and addr < end:
+                # 이미지 경계에 걸친 접근
+                return (self._backing_byte(addr) |
+                        (self._backing_byte(addr + 1) << 8) |
+                        (self._backing_byte(addr + 2) << 16) |
+                        (self._backing_byte(addr + 3) << 24))
+        return 0
+    
+    def map_image(self, offset, data, size=None):
+        """offset부터 data를 올리고 size까지 남는 부분(.bss)은 0으로 둔다
+
+        data(mmap의 memoryview 등)는 복사하지 않고 참조만 한다.
+        이미 할당된 페이지는 새 내용으로 바로 덮어쓴다.
+        """
+        size = len(data) if size is None else size
+        end = min(offset + size, self.size)
+        data_end = min(offset + len(data), end)
+        if offset >= end:
+            return
+        added = []
+        if offset < data_end:
+            added.append((offset, data_end, data[:data_end - offset]))
+        if data_end < end:
+            added.append((max(offset, data_end), end, None))
+        self.backings.extend(added)
+        first, last = offset >> self.page_shift, (end - 1) >> self.page_shift
+        for index, page in self.pages.items():
+            if first <= index <= last:
+                self._fill_page(page, index << self.page_shift, added)
+    
+    def read_byte(self, addr):
+        if 0 <= addr < self.size:
+            page = self.pages.get(addr >> self.page_shift)
+            if page is not None:
+                return page[addr & self.page_mask]
+            if self.backings:
+                return self._backing_byte(addr)
+        return 0
+    
+    def read_half(self, addr):
+        if 0 <= addr and addr + 1 < self.size:
+            return self.read_byte(addr) | (self.read_byte(addr + 1) << 8)  # 리틀 엔디안
+        return 0
+    
+    def read_word(self, addr):
+        if 0 <= addr and addr + 3 < self.size:
+            offset = addr & self.page_mask
+            if offset <= self.page_size - 4:
+                page = self.pages.get(addr >> self.page_shift)
+                if page is not None:
+                    return _unpack_word(page, offset)[0]
+                return self._backing_word(addr) if self.backings else 0
+            # 페이지 경계에 걸친 접근
+            return (self.read_byte(addr) |
+                    (self.read_byte(addr + 1) << 8) |
+                    (self.read_byte(addr + 2) << 16) |
+                    (self.read_byte(addr + 3) << 24))
+        return 0
+    
+    def write_byte(self, addr, value):
+        if 0 <= addr < self.size:
+            self._page_for_write(addr)[addr & self.page_mask] = value & 0xFF
+    
+    def write_half(self, addr, value):
+        if 0 <= addr and addr + 1 < self.size:
+            self.write_byte(addr, value)
+            self.write_byte(addr + 1, value >> 8)
+    
+    def write_word(self, addr, value):
+        if 0 <= addr and addr + 3 < self.size:
+            offset = addr & self.page_mask
+            if offset <= self.page_size - 4:
+                _pack_word(self._page_for_write(addr), offset, value & 0xFFFFFFFF)
+            else:
+                for i in range(4):
+                    self.write_byte(addr + i, value >> (8 * i))
+    
+    def iter_chunks(self):
+        """(오프셋, 바이트열) 페이지 조각을 주소 순으로 반환 (스냅샷 파일용)
+
+        할당된 페이지와 이미지가 걸친 페이지만 내놓는다 (나머지는 0).
+        이미지 내용은 복사해 내놓으므로 원본 파일과 무관하다.
+        """
+        indexes = set(self.pages)
+        for start, end, view in self.backings:
+            indexes.update(range(start >> self.page_shift, ((end - 1) >> self.page_shift) + 1))
+        for index in sorted(indexes):
+            page = self.pages.get(index)
+            if page is None:
+                page = bytearray(self.page_size)
+                self._fill_page(page, index << self.page_shift)
+            start = index << self.page_shift
+            yield start, bytes(page[:self.size - start])
+    
+    def write_bytes(self, offset, data):
+        """offset부터 data를 그대로 기록 (범위 밖은 잘라낸다)"""
+        end = min(offset + len(data), self.size)
+        while offset < end:
+            page_offset = offset & self.page_mask
+            count = min(self.page_size - page_offset, end - offset)
+            self._page_for_write(offset)[page_offset:page_offset + count] = data[:count]
+            data = data[count:]
+            offset += count
+    
+    def clear(self):
+        self.pages = {}
+        self.backings = []
+    
+    def snapshot(self):
+        """현재 내용 복사본 (restore()에 그대로 넘긴다, 이미지 뷰는 공유)"""
+        return {index: bytes(page) for index, page in self.pages.items()}, tuple(self.backings)
+    
+    def restore(self, snapshot):
+        pages, backings = snapshot
+        self.pages = {index: bytearray(page) for index, page in pages.items()}
+        self.backings = list(backings)
+    
+    @property
+    def allocated_bytes(self):
+        """실제로 할당된 페이지 바이트 수"""
+        return len(self.pages) * self.page_size
+
+
+class MemoryRegion:
+    """메모리 맵의 한 영역 (이름, 시작 주소, 크기)"""
+    __slots__ = ('name', 'base', 'size', 'end')
+    
+    def __init__(self, name, base, size):
+        if size <= 0 or size & 0x3:
+            raise ValueError(f"{name}: 크기는 4의 배수인 양수여야 합니다 (0x{size:X})")
+        if base < 0 or base & 0x3 or base + size > 0x100000000:
+            raise ValueError(f"{name}: 시작 주소가 잘못되었습니다 (0x{base:X})")
+        self.name = name
+        self.base = base
+        self.size = size
+        self.end = base + size  # 마지막 주소 + 1
+    
+    def contains(self, addr):
+        return self.base <= addr < self.end
+    
+    def __repr__(self):
+        return f"MemoryRegion({self.name!r}, 0x{self.base:08X}, 0x{self.size:X})"
+
+
+def make_memory(size, memory_class, page_size=PAGE_SIZE):
+    """영역 크기에 맞는 저장소 생성 (작으면 memory_class, 크면 SparseMemory)"""
+    if size <= FLAT_LIMIT:
+        return memory_class(size)
+    return SparseMemory(size, page_size)
+
+
+class MemoryMap:
+    """ROM 영역과 데이터 버스 영역(RAM + 추가 영역) 설정"""
+    
+    def __init__(self, rom=None, ram=None, extra_regions=(), page_size=PAGE_SIZE):
+        self.rom = rom or MemoryRegion('rom', DEFAULT_ROM_BASE, DEFAULT_ROM_SIZE)
+        self.ram = ram or MemoryRegion('ram', DEFAULT_RAM_BASE, DEFAULT_RAM_SIZE)
+        self.page_size = page_size
+        self.extra_regions = tuple(extra_regions)
+        
+        # 데이터 버스 영역은 주소 순으로 정렬해 두고 겹치는지 확인
+        self.data_regions = sorted((self.ram,) + self.extra_regions, key=lambda r: r.base)
+        names = set()
+        for prev, region in zip(self.data_regions, self.data_regions[1:]):
+            if region.base < prev.end:
+                raise ValueError(f"데이터 버스 영역이 겹칩니다: {prev} / {region}")
+        for region in (self.rom,) + tuple(self.data_regions):
+            if region.name in names:
+                raise ValueError(f"영역 이름이 중복되었습니다: {region.name}")
+            names.add(region.name)
+        self._bases = [region.base for region in self.data_regions]
+    
+    def find(self, addr):
+        """데이터 버스 주소가 속한 영역 (없으면 None)"""
+        index = bisect_right(self._bases, addr) - 1
+        if index >= 0 and addr < self.data_regions[index].end:
+            return self.data_regions[index]
+        return None
+    
+    @classmethod
+    def from_specs(cls, specs, page_size=PAGE_SIZE):
+        """'이름:시작주소:크기' 문자열 목록으로 메모리 맵 생성
+
+        이름이 rom/ram이면 기본 영역을 바꾸고, 그 밖의 이름은 추가 RAM 영역이 된다.
+        숫자는 int(x, 0) 형식 (0x400, 1024 등), 크기에는 K/M 접미사를 쓸 수 있다.
+        """
+        rom = ram = None
+        extra = []
+        for spec in specs:
+            try:
+                name, base, size = spec.split(':')
+                region = MemoryRegion(name, int(base, 0), _parse_size(size))
+            except ValueError as e:
+                raise ValueError(f"잘못된 영역 설정 '{spec}': {e}") from None
+            if name == 'rom':
+                rom = region
+            elif name == 'ram':
+                ram = region
+            else:
+                extra.append(region)
+        return cls(rom, ram, extra, page_size)
+
+
+def _parse_size(text):
+    """크기 문자열 (예: 1024, 0x400, 64K, 4M)"""
+    text = text.strip().upper()
+    scale = 1
+    if text.endswith('K'):
+        text, scale = text[:-1], 1024
+    elif text.endswith('M'):
+        text, scale = text[:-1], 1024 * 1024
+    return int(text, 0) * scale
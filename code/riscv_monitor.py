@@ -1,50 +1,179 @@
+import queue
+import struct
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk
 import threading
 import time
-import struct
 
-# 개선된 메모리 모델
-class Memory:
-    def __init__(self, size_bytes):
-        self.data = bytearray(size_bytes)  # 바이트 단위
-    
-    def read_byte(self, addr):
-        if addr < len(self.data):
-            return self.data[addr]
-        return 0
-    
-    def read_half(self, addr):
-        if addr + 1 < len(self.data):
-            return self.data[addr] | (self.data[addr+1] << 8)  # 리틀 엔디안
-        return 0
-    
-    def read_word(self, addr):
-        if addr + 3 < len(self.data):
-            return (self.data[addr] | 
-                    (self.data[addr+1] << 8) | 
-                    (self.data[addr+2] << 16) | 
-                    (self.data[addr+3] << 24))
-        return 0
-    
-    def write_byte(self, addr, value):
-        if addr < len(self.data):
-            self.data[addr] = value & 0xFF
-    
-    def write_half(self, addr, value):
-        if addr + 1 < len(self.data):
-            self.data[addr] = value & 0xFF
-            self.data[addr+1] = (value >> 8) & 0xFF
-    
-    def write_word(self, addr, value):
-        if addr + 3 < len(self.data):
-            self.data[addr] = value & 0xFF
-            self.data[addr+1] = (value >> 8) & 0xFF
-            self.data[addr+2] = (value >> 16) & 0xFF
-            self.data[addr+3] = (value >> 24) & 0xFF
-    
-    def clear(self):
-        self.data = bytearray(len(self.data))
+from riscv_core import RISCVCore, PipelineRegisters, ControlSignals
+from riscv_defines import REG_NAMES
+from riscv_diff import diff_traces, format_divergence
+from riscv_trace import TextTrace
+
+# 실행 모드 (콤보박스 표시 이름 -> 내부 키)
+RUN_MODES = {
+    "속도 제한": "throttle",           # 초당 사이클 수 제한
+    "연속 실행 (터보)": "turbo",       # 제한 없이 최대 속도
+    "브레이크포인트까지": "breakpoint",  # 브레이크포인트 PC에서 정지
+    "명령어 단위 고속 실행": "fast_forward",  # ISA 수준 실행 (브레이크포인트에서 정지)
+}
+
+FRAME_INTERVAL_MS = 50  # 실행 중 화면 갱신 주기 (사이클 수와 무관)
+RUN_CHUNK_CYCLES = 2000  # 워커가 한 번에 실행하는 최대 사이클 수
+DEFAULT_VIEW_ROWS = 16  # RAM/ROM 창 기본 표시 줄 수 (창 크기가 바뀌면 다시 계산)
+LOG_PAGE_LINES = 50  # Vivado 로그 창 한 페이지 줄 수
+FRAME_QUEUE_SIZE = 4  # 워커 -> 메인 스레드 프레임 큐 크기 (차 있으면 워커는 프레임을 건너뛴다)
+
+
+class FrameState:
+    """워커가 메인 스레드로 넘기는 한 프레임 분량의 코어 상태 (만든 뒤에는 바꾸지 않는다)"""
+    __slots__ = ('cycle_count', 'instruction_count', 'control_state', 'pipeline_registers',
+                 'control_signals', 'aluControl', 'ramControl', 'current_instruction',
+                 'regfile', 'pc_in_rom', 'reload', 'dirty_registers', 'ram_words', 'message')
+
+
+def capture_frame(core, full=False, message=None):
+    """코어 상태를 FrameState로 복사하고 dirty 목록을 비운다 (코어 잠금을 잡고 호출)
+
+    reload가 True인 프레임은 전체를 다시 그리고, 아니면 dirty_registers와
+    ram_words({RAM 오프셋: 값})에 있는 줄만 고쳐 쓴다.
+    """
+    everything, registers, words = core.take_dirty()
+    frame = FrameState()
+    frame.cycle_count = core.cycle_count
+    frame.instruction_count = core.instruction_count
+    frame.control_state = core.control_state
+    frame.pipeline_registers = dict(zip(PipelineRegisters.__slots__, core.pipe.values()))
+    frame.control_signals = dict(zip(ControlSignals.__slots__, core.signals.values()))
+    frame.aluControl = core.aluControl
+    frame.ramControl = core.ramControl
+    frame.current_instruction = core.current_instruction
+    frame.regfile = tuple(core.regfile)
+    frame.pc_in_rom = core.in_rom(core.pipe.PCOutData)
+    frame.reload = everything or full
+    frame.dirty_registers = frozenset(registers)
+    ram = core.ram
+    frame.ram_words = {} if frame.reload else {
+        offset: ram.read_word(offset) for memory, offset in words if memory is ram}
+    frame.message = message
+    return frame
+
+
+def merge_frames(older, newer):
+    """밀린 두 프레임을 하나로 합친다 (값은 newer, 바뀐 줄 목록은 둘 다)"""
+    frame = FrameState()
+    for name in FrameState.__slots__:
+        setattr(frame, name, getattr(newer, name))
+    frame.reload = older.reload or newer.reload
+    if not frame.reload:
+        frame.dirty_registers = older.dirty_registers | newer.dirty_registers
+        frame.ram_words = {**older.ram_words, **newer.ram_words}
+    if frame.message is None:
+        frame.message = older.message
+    return frame
+
+
+def nonzero_word_offsets(memory):
+    """0이 아닌 워드의 오프셋 리스트 (ROM 창 표시용, 이미지가 있는 조각만 훑는다)"""
+    offsets = []
+    for start, data in memory.iter_chunks():
+        if not any(data):
+            continue
+        usable = len(data) - len(data) % 4
+        for index, (word,) in enumerate(struct.iter_unpack('<I', data[:usable])):
+            if word:
+                offsets.append(start + index * 4)
+    return offsets
+
+
+class VirtualMemoryView:
+    """메모리 영역을 워드 한 줄씩 보여 주되 화면에 보이는 줄만 그리는 Text 래퍼
+
+    영역 크기와 상관없이 한 번에 그리는 줄은 visible개다. 실행 중에는
+    patch()로 바뀐 워드 중 화면 안에 있는 줄만 고쳐 쓴다.
+    저장소를 직접 읽는 render()는 lock(코어 잠금)을 잡고 읽는다.
+    """
+    
+    def __init__(self, text, scrollbar, lock):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.lock = lock
+        self.memory = None
+        self.base = 0
+        self.size = 0
+        self.offsets = None  # 표시할 워드 오프셋 리스트 (None이면 영역 전체)
+        self.top = 0  # 맨 위 줄 번호
+        self.visible = DEFAULT_VIEW_ROWS
+        scrollbar.configure(command=self.on_scroll)
+        text.bind("<MouseWheel>", lambda e: self.scroll_to(self.top - (3 if e.delta > 0 else -3)))
+        text.bind("<Button-4>", lambda e: self.scroll_to(self.top - 3))
+        text.bind("<Button-5>", lambda e: self.scroll_to(self.top + 3))
+        text.bind("<Configure>", self.on_resize)
+    
+    def attach(self, memory, base, size, offsets=None):
+        """표시할 저장소를 바꾸고 다시 그린다"""
+        self.memory = memory
+        self.base = base
+        self.size = size
+        self.offsets = offsets
+        self.scroll_to(self.top)
+    
+    @property
+    def row_count(self):
+        return len(self.offsets) if self.offsets is not None else self.size // 4
+    
+    def _format(self, offset, value):
+        return f"0x{self.base + offset:04X}: 0x{value:08X}"
+    
+    def _line(self, row):
+        offset = self.offsets[row] if self.offsets is not None else row * 4
+        return self._format(offset, self.memory.read_word(offset))
+    
+    def render(self):
+        """보이는 줄 전체를 다시 그린다"""
+        last = min(self.top + self.visible, self.row_count)
+        with self.lock:
+            lines = "\n".join(self._line(row) for row in range(self.top, last))
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, lines)
+        count = max(self.row_count, 1)
+        self.scrollbar.set(self.top / count, last / count)
+    
+    def patch(self, words):
+        """바뀐 워드 {오프셋: 값} 중 화면에 보이는 줄만 고쳐 쓴다 (영역 전체 표시일 때)"""
+        if self.offsets is not None:
+            self.render()
+            return
+        last = min(self.top + self.visible, self.row_count)
+        for offset, value in words.items():
+            row = offset >> 2
+            if self.top <= row < last:
+                line = row - self.top + 1
+                self.text.delete(f"{line}.0", f"{line}.end")
+                self.text.insert(f"{line}.0", self._format(offset, value))
+    
+    def scroll_to(self, top):
+        self.top = max(0, min(top, self.row_count - self.visible))
+        if self.memory is not None:
+            self.render()
+    
+    def on_scroll(self, *args):
+        """스크롤바 명령 ('moveto', 비율) / ('scroll', 수, 'units' 또는 'pages')"""
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+    
+    def on_resize(self, event):
+        """창 크기에 맞춰 표시 줄 수를 다시 계산"""
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+        visible = max(1, event.height // max(linespace, 1))
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.top)
+
 
 class RISCVMemoryMonitor:
     def __init__(self, root):
@@ -52,53 +181,16 @@ class RISCVMemoryMonitor:
         self.root.title("RISC-V 멀티사이클 파이프라인 시뮬레이터")
         self.root.geometry("1400x900")
         
-        # 메모리 상태 (시뮬레이션용)
-        self.regfile = [0] * 32  # x0-x31 레지스터 (각 32비트)
-        self.ram = Memory(1024)  # 1024바이트 RAM (바이트 어드레서블)
-        self.rom = Memory(1024)  # 1024바이트 ROM (바이트 어드레서블)
-        
-        # 멀티사이클 파이프라인 상태
-        self.cycle_count = 0
-        self.instruction_count = 0
-        self.current_instruction = 0
-        self.control_state = 'FETCH'
-        
-        # 파이프라인 레지스터 (하드웨어와 동일)
-        self.pipeline_registers = {
-            'PCOutData': 0x00000000,  # PC 출력
-            'DecReg_RFData1': 0,      # Decode 단계 RF Data1
-            'DecReg_RFData2': 0,      # Decode 단계 RF Data2
-            'DecReg_immExt': 0,       # Decode 단계 Immediate
-            'ExeReg_RFData2': 0,      # Execute 단계 RF Data2
-            'ExeReg_aluResult': 0,    # Execute 단계 ALU 결과
-            'ExeReg_PCSrcMuxOut': 0,  # Execute 단계 PC 소스
-            'MemAccReg_busRData': 0,  # Memory 단계 버스 읽기 데이터
-            'MemAccReg_busAddr': 0,   # Memory 단계 버스 주소
-            'MemAccReg_busWData': 0   # Memory 단계 버스 쓰기 데이터
-        }
-        
-        # 제어 신호 (하드웨어와 동일)
-        self.control_signals = {
-            'PCEn': 0,           # PC Enable
-            'regFileWe': 0,      # Register File Write Enable
-            'aluSrcMuxSel': 0,   # ALU Source Mux Select
-            'busWe': 0,          # Bus Write Enable
-            'RFWDSrcMuxSel': 0,  # RF Write Data Source Mux Select
-            'branch': 0,         # Branch
-            'jal': 0,            # JAL
-            'jalr': 0            # JALR
-        }
-        
-        # ALU 및 메모리 제어
-        self.aluControl = 0
-        self.ramControl = 0
-        
-        # 실행 히스토리 (되돌리기 기능용)
-        self.history = []  # (regfile, ram, pc, cycle_count) 튜플들의 리스트
-        self.max_history = 100  # 최대 히스토리 개수     
-        
-        # 로그 파일 핸들
-        self.log_file = None
+        # 시뮬레이션 엔진 (GUI와 분리된 헤드리스 코어)
+        self.core = RISCVCore(max_cycles=1000, keep_history=True)
+        self.core.track_dirty()  # 바뀐 레지스터/메모리 줄만 다시 그린다
+        
+        # 워커 스레드는 코어 잠금을 잡고 청크를 실행하고, 위젯은 건드리지 않는다.
+        # 화면에 필요한 상태는 FrameState로 복사해 큐에 넣고 메인 스레드가 꺼내 그린다.
+        self._core_lock = threading.RLock()
+        self._running = threading.Event()
+        self.frames = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
+        self._frame = None  # 마지막으로 그린 프레임
         
         self.setup_gui()
         self.start_monitoring()
@@ -161,26 +253,30 @@ class RISCVMemoryMonitor:
         self.reg_text.configure(yscrollcommand=reg_scroll.set)
         self.reg_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         reg_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.reg_text.insert(tk.END, "\n" * 31)  # 32줄을 만들어 두고 줄 단위로 고쳐 쓴다
+        self._reg_lines = [None] * 32
+        self._pipeline_info = None
         
-        # RAM 메모리 표시
-        ram_frame = ttk.LabelFrame(display_frame, text="RAM 메모리 (0x000-0x3FF)")
+        # RAM/ROM 메모리 표시 (보이는 줄만 그리는 가상 뷰, 스크롤바는 뷰가 직접 처리)
+        memory_map = self.core.memory_map
+        ram_frame = ttk.LabelFrame(display_frame, text=f"RAM 메모리 (0x{memory_map.ram.base:03X}-0x{memory_map.ram.end - 1:03X})")
         ram_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
         
         self.ram_text = tk.Text(ram_frame, width=35, height=15, font=("Consolas", 9))
-        ram_scroll = ttk.Scrollbar(ram_frame, orient=tk.VERTICAL, command=self.ram_text.yview)
-        self.ram_text.configure(yscrollcommand=ram_scroll.set)
+        ram_scroll = ttk.Scrollbar(ram_frame, orient=tk.VERTICAL)
         self.ram_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         ram_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.ram_view = VirtualMemoryView(self.ram_text, ram_scroll, self._core_lock)
         
-        # ROM 메모리 표시
-        rom_frame = ttk.LabelFrame(display_frame, text="ROM 메모리 (0x000-0x3FF)")
+        # ROM 메모리 표시 (0이 아닌 워드만)
+        rom_frame = ttk.LabelFrame(display_frame, text=f"ROM 메모리 (0x{memory_map.rom.base:03X}-0x{memory_map.rom.end - 1:03X})")
         rom_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
         
         self.rom_text = tk.Text(rom_frame, width=35, height=15, font=("Consolas", 9))
-        rom_scroll = ttk.Scrollbar(rom_frame, orient=tk.VERTICAL, command=self.rom_text.yview)
-        self.rom_text.configure(yscrollcommand=rom_scroll.set)
+        rom_scroll = ttk.Scrollbar(rom_frame, orient=tk.VERTICAL)
         self.rom_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         rom_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rom_view = VirtualMemoryView(self.rom_text, rom_scroll, self._core_lock)
         
         # 컨트롤 패널
         control_frame = ttk.Frame(self.root)
@@ -191,63 +287,64 @@ class RISCVMemoryMonitor:
         ttk.Button(control_frame, text="시뮬레이션 시작", command=self.start_simulation).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="시뮬레이션 정지", command=self.stop_simulation).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="단계 실행", command=self.step_execution).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="명령어 실행", command=self.step_instruction).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="되돌리기", command=self.undo_step).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="로그 시작", command=self.start_logging).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="로그 정지", command=self.stop_logging).pack(side=tk.LEFT, padx=5)
         ttk.Button(control_frame, text="Vivado 로그 읽기", command=self.read_vivado_log).pack(side=tk.LEFT, padx=5)
+        ttk.Button(control_frame, text="로그 비교", command=self.compare_logs).pack(side=tk.LEFT, padx=5)
         
         # 상태 표시
         self.status_label = ttk.Label(control_frame, text="대기 중...")
         self.status_label.pack(side=tk.RIGHT, padx=5)
         
+        # 실행 모드 패널
+        run_frame = ttk.Frame(self.root)
+        run_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        ttk.Label(run_frame, text="실행 모드:").pack(side=tk.LEFT, padx=(5, 5))
+        self.run_mode_var = tk.StringVar(value="속도 제한")
+        ttk.Combobox(run_frame, textvariable=self.run_mode_var, values=list(RUN_MODES),
+                     state="readonly", width=16).pack(side=tk.LEFT, padx=(0, 15))
+        
+        ttk.Label(run_frame, text="사이클/초:").pack(side=tk.LEFT, padx=(0, 5))
+        self.cps_var = tk.StringVar(value="10")
+        ttk.Spinbox(run_frame, textvariable=self.cps_var, from_=1, to=1000000, increment=10,
+                    width=10).pack(side=tk.LEFT, padx=(0, 15))
+        
+        ttk.Label(run_frame, text="브레이크포인트 PC:").pack(side=tk.LEFT, padx=(0, 5))
+        self.breakpoint_var = tk.StringVar(value="")
+        ttk.Entry(run_frame, textvariable=self.breakpoint_var, width=24).pack(side=tk.LEFT, padx=(0, 15))
+        
+        ttk.Label(run_frame, text="최대 사이클 (0=무제한):").pack(side=tk.LEFT, padx=(0, 5))
+        self.max_cycles_var = tk.StringVar(value="1000")
+        ttk.Entry(run_frame, textvariable=self.max_cycles_var, width=10).pack(side=tk.LEFT)
+        
         self.simulation_running = False
+        self.run_mode = "throttle"
+        self.cycles_per_second = 10
+        self._frame_scheduled = False
+    
+    @property
+    def simulation_running(self):
+        """워커 실행 여부 (스레드 간 공유하므로 Event로 둔다)"""
+        return self._running.is_set()
+    
+    @simulation_running.setter
+    def simulation_running(self, running):
+        if running:
+            self._running.set()
+        else:
+            self._running.clear()
     
     def reset_system(self):
         """시스템 초기화"""
         # 시뮬레이션 정지
         self.simulation_running = False
         
-        # 카운터 초기화
-        self.cycle_count = 0
-        self.instruction_count = 0
-        
-        # 레지스터 파일 초기화
-        self.regfile = [0] * 32
-        self.regfile[0] = 0  # x0는 항상 0
-        self.regfile[1] = 0x64  # ra = 0x64
-        
-        # 메모리 초기화
-        self.ram = Memory(1024)
-        self.rom = Memory(1024)
-        
-        # 파이프라인 레지스터 초기화
-        self.pipeline_registers = {
-            'PCOutData': 0x00000000,
-            'DecReg_RFData1': 0,
-            'DecReg_RFData2': 0,
-            'DecReg_immExt': 0,
-            'ExeReg_RFData2': 0,
-            'ExeReg_aluResult': 0,
-            'ExeReg_PCSrcMuxOut': 0,
-            'MemAccReg_busRData': 0,
-            'MemAccReg_busAddr': 0,
-            'MemAccReg_busWData': 0
-        }
-        
-        # 제어 신호 초기화
-        self.control_signals = {
-            'PCEn': 0, 'regFileWe': 0, 'aluSrcMuxSel': 0, 'busWe': 0,
-            'RFWDSrcMuxSel': 0, 'branch': 0, 'jal': 0, 'jalr': 0
-        }
-        
-        # 상태 초기화
-        self.control_state = 'FETCH'
-        self.current_instruction = 0
-        self.aluControl = 0
-        self.ramControl = 0
-        
-        # 히스토리 초기화
-        self.history.clear()
+        # 코어 초기화 (레지스터, 메모리, 파이프라인, 히스토리)
+        with self._core_lock:
+            self.core.reset()
         
         # 디스플레이 업데이트
         self.update_displays()
@@ -258,30 +355,13 @@ class RISCVMemoryMonitor:
         print("멀티사이클 파이프라인 시뮬레이터 초기화 완료")
         
         # 로그 파일 초기화
-        if self.log_file:
-            self.log_file.close()
-            self.log_file = None
+        with self._core_lock:
+            self.core.stop_trace()
     
     def load_code(self):
         try:
-            with open("code.mem", "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                rom_index = 0
-                for line in lines:
-                    line = line.strip()
-                    # 주석이나 빈 줄 건너뛰기
-                    if line.startswith('#') or not line:
-                        continue
-                    # 16진수 기계어 코드만 처리
-                    if line and rom_index < 256:  # 256 워드 = 1024바이트
-                        try:
-                            instruction = int(line, 16)
-                            # 4바이트씩 ROM에 저장 (리틀 엔디안)
-                            addr = rom_index * 4
-                            self.rom.write_word(addr, instruction)
-                            rom_index += 1
-                        except ValueError:
-                            continue  # 잘못된 형식의 라인 무시
+            with self._core_lock:
+                rom_index = self.core.load_image("code.mem")
             self.status_label.config(text=f"코드 로드 완료 ({rom_index}개 명령어)")
             self.update_displays()
         except FileNotFoundError:
@@ -292,24 +372,8 @@ class RISCVMemoryMonitor:
     def load_test_code(self):
         """테스트 코드 로드"""
         try:
-            with open("test_code.mem", "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                rom_index = 0
-                for line in lines:
-                    line = line.strip()
-                    # 주석이나 빈 줄 건너뛰기
-                    if line.startswith('#') or not line:
-                        continue
-                    # 16진수 기계어 코드만 처리
-                    if line and rom_index < 256:  # 256 워드 = 1024바이트
-                        try:
-                            instruction = int(line, 16)
-                            # 4바이트씩 ROM에 저장 (리틀 엔디안)
-                            addr = rom_index * 4
-                            self.rom.write_word(addr, instruction)
-                            rom_index += 1
-                        except ValueError:
-                            continue  # 잘못된 형식의 라인 무시
+            with self._core_lock:
+                rom_index = self.core.load_image("test_code.mem")
             self.status_label.config(text=f"테스트 코드 로드 완료 ({rom_index}개 명령어)")
             self.update_displays()
         except FileNotFoundError:
@@ -318,8 +382,37 @@ class RISCVMemoryMonitor:
             self.status_label.config(text=f"테스트 코드 로드 오류: {str(e)}")
     
     def start_simulation(self):
-        self.simulation_running = True
+        core = self.core
+        try:
+            self.run_mode = RUN_MODES[self.run_mode_var.get()]
+            self.cycles_per_second = max(1, int(self.cps_var.get()))
+            max_cycles = int(self.max_cycles_var.get(), 0)
+            breakpoints = {int(pc, 16) for pc in self.breakpoint_var.get().replace(',', ' ').split()}
+        except (KeyError, ValueError) as e:
+            self.status_label.config(text=f"실행 설정 오류: {str(e)}")
+            return
+        
+        with self._core_lock:
+            core.max_cycles = max_cycles if max_cycles > 0 else None
+            core.breakpoints = breakpoints
+            # 최대 사이클 수를 늘려서 이어서 실행하는 경우
+            if core.halted and core.halt_reason == "최대 사이클 수 도달 - 시뮬레이션 종료":
+                if core.max_cycles is not None and core.cycle_count > core.max_cycles:
+                    self.status_label.config(text="최대 사이클 수 도달 - 최대 사이클을 늘리거나 초기화하세요")
+                    return
+                core.halted = False
+                core.halt_reason = None
+            
+            self.drain_frames()  # 이전 실행에서 남은 프레임 버리기
+            self._run_started = time.perf_counter()
+            self._run_cycles = 0
+            self.simulation_running = True
         self.status_label.config(text="시뮬레이션 실행 중...")
+        
+        # 화면은 사이클마다가 아니라 프레임 주기마다 갱신
+        if not self._frame_scheduled:
+            self._frame_scheduled = True
+            self.root.after(FRAME_INTERVAL_MS, self.refresh_frame)
     
     def stop_simulation(self):
         self.simulation_running = False
@@ -327,562 +420,276 @@ class RISCVMemoryMonitor:
     
     def step_execution(self):
         """멀티사이클 파이프라인 단계 실행"""
-        try:
-            # 현재 상태를 히스토리에 저장
-            self.save_state()
-            
-            # 사이클 카운터 증가
-            self.cycle_count += 1
-            
-            # ROM 범위 체크 - PC가 ROM 범위를 벗어나면 시뮬레이션 정지
-            rom_addr = self.pipeline_registers['PCOutData']
-            
-            # 디버그 출력 (처음 10사이클만)
-            if self.cycle_count <= 10:
-                print(f"사이클 {self.cycle_count}: PC=0x{rom_addr:08X}, 상태={self.control_state}")
+        core = self.core
+        with self._core_lock:
+            try:
+                # 디버그 출력 (처음 10사이클만)
+                if core.cycle_count < 10:
+                    print(f"사이클 {core.cycle_count + 1}: PC=0x{core.pipeline_registers['PCOutData']:08X}, 상태={core.control_state}")
+                
+                # 코어에서 한 사이클 실행
+                if not core.step():
+                    self.simulation_running = False
+                    if core.halt_reason:
+                        self.status_label.config(text=core.halt_reason)
+                        print(core.halt_reason)
+                    return
+                
+                # 디스플레이 업데이트
+                self.update_displays()
+                
+                # 상태 메시지 업데이트
+                self.update_status()
             
-            # PC가 유효한 ROM 주소인지 확인 (0x00000000 ~ 0x000003FC)
-            if rom_addr > 0x3FC:  # 1024 bytes - 4 = 0x3FC
+            except Exception as e:
+                print(f"시뮬레이션 오류 발생: {e}")
                 self.simulation_running = False
-                self.status_label.config(text=f"ROM 범위 초과 - 시뮬레이션 종료 (PC: 0x{rom_addr:08X})")
-                print(f"ROM 범위 초과로 시뮬레이션 종료: PC=0x{rom_addr:08X}")
+                self.status_label.config(text=f"시뮬레이션 오류: {str(e)}")
                 return
+    
+    def step_instruction(self):
+        """명령어 하나를 한 번에 실행 (명령어 경계까지)"""
+        core = self.core
+        with self._core_lock:
+            try:
+                if not core.step_instruction():
+                    self.simulation_running = False
+                    if core.halt_reason:
+                        self.status_label.config(text=core.halt_reason)
+                        print(core.halt_reason)
+                    return
+                
+                self.update_displays()
+                self.update_status()
             
-            # 무한 루프 방지 - 같은 PC에서 너무 오래 머물면 정지
-            if hasattr(self, '_last_pc'):
-                if self._last_pc == rom_addr:
-                    self._pc_stall_count += 1
-                    if self._pc_stall_count > 100:  # 100사이클 이상 같은 PC에 머물면 정지
-                        self.simulation_running = False
-                        self.status_label.config(text=f"무한 루프 감지 - 시뮬레이션 종료 (PC: 0x{rom_addr:08X})")
-                        print(f"무한 루프 감지로 시뮬레이션 종료: PC=0x{rom_addr:08X}")
-                        return
-                else:
-                    self._pc_stall_count = 0
-            else:
-                self._last_pc = rom_addr
-                self._pc_stall_count = 0
-            
-            # Control Unit 상태 머신 실행
-            self.execute_control_unit_state()
-            
-            # DataPath 실행
-            self.execute_datapath()
-            
-            # 명령어 완료 체크 (FETCH로 돌아왔을 때)
-            if self.control_state == 'FETCH' and hasattr(self, '_instruction_completed'):
-                self.instruction_count += 1
-                delattr(self, '_instruction_completed')
-            
-            # 로그 기록
-            self.write_log(self.cycle_count, self.pipeline_registers['PCOutData'], 
-                          self.current_instruction, self.pipeline_registers['MemAccReg_busAddr'],
-                          self.pipeline_registers['MemAccReg_busWData'], 
-                          self.pipeline_registers['MemAccReg_busRData'], 
-                          self.control_signals['busWe'])
-            
-            # 디스플레이 업데이트
-            self.update_displays()
-            
-            # 상태 메시지 업데이트
-            if rom_addr <= 0x3FC:
-                instruction = self.rom.read_word(rom_addr)
-                self.status_label.config(text=f"사이클 {self.cycle_count}: {self.control_state} - PC: 0x{rom_addr:04X}")
-            else:
-                self.status_label.config(text=f"사이클 {self.cycle_count}: {self.control_state} - PC: 0x{rom_addr:04X} (ROM 범위 초과)")
-            
-            # 최대 사이클 수 제한 (안전장치)
-            if self.cycle_count > 1000:
+            except Exception as e:
+                print(f"시뮬레이션 오류 발생: {e}")
                 self.simulation_running = False
-                self.status_label.config(text="최대 사이클 수 도달 - 시뮬레이션 종료")
-                print("최대 사이클 수(1000) 도달로 시뮬레이션 종료")
+                self.status_label.config(text=f"시뮬레이션 오류: {str(e)}")
+    
+    def update_status(self):
+        """상태 표시줄에 마지막으로 그린 프레임의 사이클/상태/PC 표시"""
+        frame = self._frame
+        rom_addr = frame.pipeline_registers['PCOutData']
+        if frame.pc_in_rom:
+            self.status_label.config(text=f"사이클 {frame.cycle_count}: {frame.control_state} - PC: 0x{rom_addr:04X}")
+        else:
+            self.status_label.config(text=f"사이클 {frame.cycle_count}: {frame.control_state} - PC: 0x{rom_addr:04X} (ROM 범위 초과)")
+    
+    def drain_frames(self):
+        """큐에 밀린 프레임을 모두 꺼내 하나로 합친다 (없으면 None)"""
+        frame = None
+        while True:
+            try:
+                newer = self.frames.get_nowait()
+            except queue.Empty:
+                return frame
+            frame = newer if frame is None else merge_frames(frame, newer)
+    
+    def refresh_frame(self):
+        """워커가 보낸 프레임을 그린다 (메인 스레드에서 FRAME_INTERVAL_MS마다 호출)
+
+        밀린 프레임은 합쳐서 한 번만 그린다. 워커가 스스로 멈추면 마지막
+        프레임에 메시지가 실려 오고, 사용자가 멈추면 워커가 청크를 마칠 때까지
+        기다렸다가 코어에서 직접 마지막 상태를 그린다.
+        """
+        frame = self.drain_frames()
+        if frame is not None:
+            self.apply_frame(frame)
+            if frame.message is not None:
+                self.status_label.config(text=frame.message)
+                self._frame_scheduled = False
                 return
-                
-        except Exception as e:
-            print(f"시뮬레이션 오류 발생: {e}")
-            self.simulation_running = False
-            self.status_label.config(text=f"시뮬레이션 오류: {str(e)}")
+            self.update_status()
+        
+        if not self.simulation_running:
+            with self._core_lock:
+                frame = self.drain_frames()
+                self.update_displays(full=True)
+            if frame is not None and frame.message is not None:
+                self.status_label.config(text=frame.message)
+            self._frame_scheduled = False
             return
+        self.root.after(FRAME_INTERVAL_MS, self.refresh_frame)
     
-    def execute_control_unit_state(self):
-        """Control Unit 상태 머신 실행"""
-        opcode = self.current_instruction & 0x7F
-        operator = ((self.current_instruction >> 30) & 0x1) << 3 | ((self.current_instruction >> 12) & 0x7)
-        func3 = (self.current_instruction >> 12) & 0x7
-        
-        # 제어 신호 초기화
-        self.control_signals = {
-            'PCEn': 0, 'regFileWe': 0, 'aluSrcMuxSel': 0, 'busWe': 0,
-            'RFWDSrcMuxSel': 0, 'branch': 0, 'jal': 0, 'jalr': 0
-        }
-        self.aluControl = 0
-        self.ramControl = 0
-        
-        if self.control_state == 'FETCH':
-            # PC Enable - 첫 사이클부터 활성화
-            self.control_signals['PCEn'] = 1
-            
-            # 명령어 페치
-            self.current_instruction = self.rom.read_word(self.pipeline_registers['PCOutData'])
-            self.next_state = 'DECODE'
-            
-        elif self.control_state == 'DECODE':
-            # 명령어 타입에 따른 다음 상태 결정
-            if opcode == 0x33:  # R-type
-                self.next_state = 'R_EXE'
-            elif opcode == 0x23:  # S-type
-                self.next_state = 'S_EXE'
-            elif opcode == 0x03:  # L-type
-                self.next_state = 'L_EXE'
-            elif opcode == 0x13:  # I-type
-                self.next_state = 'I_EXE'
-            elif opcode == 0x63:  # B-type
-                self.next_state = 'B_EXE'
-            elif opcode == 0x37:  # LUI
-                self.next_state = 'LU_EXE'
-            elif opcode == 0x17:  # AUIPC
-                self.next_state = 'AU_EXE'
-            elif opcode == 0x6F:  # JAL
-                self.next_state = 'J_EXE'
-            elif opcode == 0x67:  # JALR
-                self.next_state = 'JL_EXE'
-            else:
-                self.next_state = 'FETCH'
-                
-        elif self.control_state == 'R_EXE':
-            self.aluControl = operator
-            self.control_signals['regFileWe'] = 1
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'I_EXE':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['aluSrcMuxSel'] = 1
-            if operator == 0xD:  # SRAI
-                self.aluControl = operator
-            else:
-                self.aluControl = operator & 0x7
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'B_EXE':
-            self.control_signals['branch'] = 1
-            self.aluControl = operator
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'LU_EXE':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 2
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'AU_EXE':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 3
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'J_EXE':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 4
-            self.control_signals['jal'] = 1
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'JL_EXE':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 4
-            self.control_signals['jal'] = 1
-            self.control_signals['jalr'] = 1
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'S_EXE':
-            self.control_signals['aluSrcMuxSel'] = 1
-            self.next_state = 'S_MEM'
-            
-        elif self.control_state == 'S_MEM':
-            self.control_signals['aluSrcMuxSel'] = 1
-            self.control_signals['busWe'] = 1
-            # Store 명령어에 따른 ramControl 설정
-            if func3 == 0:  # sb
-                self.ramControl = 1
-            elif func3 == 1:  # sh
-                self.ramControl = 2
-            elif func3 == 2:  # sw
-                self.ramControl = 0
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-            
-        elif self.control_state == 'L_EXE':
-            self.control_signals['aluSrcMuxSel'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 1
-            self.next_state = 'L_MEM'
-            
-        elif self.control_state == 'L_MEM':
-            self.control_signals['aluSrcMuxSel'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 1
-            # Load 명령어에 따른 ramControl 설정
-            if func3 == 0:  # lb
-                self.ramControl = 1
-            elif func3 == 1:  # lh
-                self.ramControl = 2
-            elif func3 == 2:  # lw
-                self.ramControl = 0
-            elif func3 == 4:  # lbu
-                self.ramControl = 5
-            elif func3 == 5:  # lhu
-                self.ramControl = 6
-            self.next_state = 'L_WB'
-            
-        elif self.control_state == 'L_WB':
-            self.control_signals['regFileWe'] = 1
-            self.control_signals['aluSrcMuxSel'] = 1
-            self.control_signals['RFWDSrcMuxSel'] = 1
-            self.next_state = 'FETCH'
-            self._instruction_completed = True
-        
-        # 상태 전환
-        self.control_state = self.next_state
-    
-    def execute_datapath(self):
-        """DataPath 실행 (하드웨어와 동일)"""
-        opcode = self.current_instruction & 0x7F
-        rs1 = (self.current_instruction >> 15) & 0x1F
-        rs2 = (self.current_instruction >> 20) & 0x1F
-        rd = (self.current_instruction >> 7) & 0x1F
-        
-        # Register File 읽기 (x0는 항상 0)
-        RFData1 = 0 if rs1 == 0 else self.regfile[rs1]
-        RFData2 = 0 if rs2 == 0 else self.regfile[rs2]
-        
-        # Immediate 확장
-        immExt = self.extract_immediate(self.current_instruction)
-        
-        # 파이프라인 레지스터 업데이트 (Decode 단계)
-        if self.control_state == 'DECODE':
-            self.pipeline_registers['DecReg_RFData1'] = RFData1
-            self.pipeline_registers['DecReg_RFData2'] = RFData2
-            self.pipeline_registers['DecReg_immExt'] = immExt
-        
-        # ALU 소스 멀티플렉서
-        if self.control_signals['aluSrcMuxSel']:
-            aluSrcMuxOut = self.pipeline_registers['DecReg_immExt']
-        else:
-            aluSrcMuxOut = self.pipeline_registers['DecReg_RFData2']
-        
-        # ALU 실행
-        aluResult = self.execute_alu(self.pipeline_registers['DecReg_RFData1'], 
-                                   aluSrcMuxOut, self.aluControl)
-        
-        # PC 관련 계산
-        PC_4_AdderResult = self.pipeline_registers['PCOutData'] + 4
-        PC_Imm_AdderSrcMuxOut = (self.pipeline_registers['PCOutData'] 
-                                if not self.control_signals['jalr'] 
-                                else self.pipeline_registers['DecReg_RFData1'])
-        PC_Imm_AdderResult = self.pipeline_registers['DecReg_immExt'] + PC_Imm_AdderSrcMuxOut
-        
-        # PC 소스 멀티플렉서
-        PCSrcMuxSel = self.control_signals['jal'] or (aluResult and self.control_signals['branch'])
-        PCSrcMuxOut = PC_Imm_AdderResult if PCSrcMuxSel else PC_4_AdderResult
-        
-        # 메모리 접근 (Memory 단계)
-        if self.control_signals['busWe']:  # Store
-            addr = self.pipeline_registers['ExeReg_aluResult']
-            data = self.pipeline_registers['ExeReg_RFData2']
-            self.pipeline_registers['MemAccReg_busAddr'] = addr
-            self.pipeline_registers['MemAccReg_busWData'] = data
-            
-            if 0 <= addr < 1024:
-                if self.ramControl == 0:  # sw
-                    self.ram.write_word(addr, data)
-                elif self.ramControl == 1:  # sb
-                    self.ram.write_byte(addr, data)
-                elif self.ramControl == 2:  # sh
-                    self.ram.write_half(addr, data)
-        else:  # Load
-            addr = self.pipeline_registers['ExeReg_aluResult']
-            self.pipeline_registers['MemAccReg_busAddr'] = addr
-            
-            if 0 <= addr < 1024:
-                if self.ramControl == 0:  # lw
-                    self.pipeline_registers['MemAccReg_busRData'] = self.ram.read_word(addr)
-                elif self.ramControl == 1:  # lb
-                    value = self.ram.read_byte(addr)
-                    if value & 0x80:
-                        value |= 0xFFFFFF00
-                    self.pipeline_registers['MemAccReg_busRData'] = value
-                elif self.ramControl == 2:  # lh
-                    value = self.ram.read_half(addr)
-                    if value & 0x8000:
-                        value |= 0xFFFF0000
-                    self.pipeline_registers['MemAccReg_busRData'] = value
-                elif self.ramControl == 5:  # lbu
-                    self.pipeline_registers['MemAccReg_busRData'] = self.ram.read_byte(addr)
-                elif self.ramControl == 6:  # lhu
-                    self.pipeline_registers['MemAccReg_busRData'] = self.ram.read_half(addr)
-        
-        # Register File Write Data 소스 멀티플렉서
-        RFWDSrcMuxOut = 0
-        if self.control_signals['RFWDSrcMuxSel'] == 0:
-            RFWDSrcMuxOut = aluResult
-        elif self.control_signals['RFWDSrcMuxSel'] == 1:
-            RFWDSrcMuxOut = self.pipeline_registers['MemAccReg_busRData']
-        elif self.control_signals['RFWDSrcMuxSel'] == 2:
-            RFWDSrcMuxOut = self.pipeline_registers['DecReg_immExt']
-        elif self.control_signals['RFWDSrcMuxSel'] == 3:
-            RFWDSrcMuxOut = PC_Imm_AdderResult
-        elif self.control_signals['RFWDSrcMuxSel'] == 4:
-            RFWDSrcMuxOut = PC_4_AdderResult
-        
-        # Register File 쓰기 (Writeback 단계) - 즉시 실행
-        if self.control_signals['regFileWe'] and rd != 0:
-            self.regfile[rd] = RFWDSrcMuxOut
-        
-        # 파이프라인 레지스터 업데이트 (Execute 단계)
-        if self.control_state in ['R_EXE', 'I_EXE', 'B_EXE', 'LU_EXE', 'AU_EXE', 'J_EXE', 'JL_EXE', 'S_EXE', 'L_EXE']:
-            self.pipeline_registers['ExeReg_aluResult'] = aluResult
-            self.pipeline_registers['ExeReg_RFData2'] = self.pipeline_registers['DecReg_RFData2']
-            self.pipeline_registers['ExeReg_PCSrcMuxOut'] = PCSrcMuxOut
-        
-        # PC 업데이트 - 즉시 실행 (PCEn이 1일 때)
-        if self.control_signals['PCEn']:
-            self.pipeline_registers['PCOutData'] = PCSrcMuxOut
-        
-        # x0 레지스터는 항상 0
-        self.regfile[0] = 0
-    
-    def extract_immediate(self, instruction):
-        """Immediate 값 추출 (immExtend 모듈과 동일)"""
-        opcode = instruction & 0x7F
-        func3 = (instruction >> 12) & 0x7
-        
-        if opcode == 0x33:  # R-type
-            return 0
-        elif opcode == 0x03:  # L-type
-            imm = ((instruction >> 20) & 0xFFF)
-            if imm & 0x800:
-                imm |= 0xFFFFF000
-            return imm
-        elif opcode == 0x23:  # S-type
-            imm = ((instruction >> 25) & 0x7F) << 5 | ((instruction >> 7) & 0x1F)
-            if imm & 0x800:
-                imm |= 0xFFFFF000
-            return imm
-        elif opcode == 0x13:  # I-type
-            if func3 in [1, 5]:  # SLLI, SRLI, SRAI
-                return (instruction >> 20) & 0x1F
-            elif func3 == 3:  # SLTIU
-                return (instruction >> 20) & 0xFFF
-            else:
-                imm = ((instruction >> 20) & 0xFFF)
-                if imm & 0x800:
-                    imm |= 0xFFFFF000
-                return imm
-        elif opcode == 0x63:  # B-type
-            imm_12 = (instruction >> 31) & 0x1
-            imm_11 = (instruction >> 7) & 0x1
-            imm_10_5 = (instruction >> 25) & 0x3F
-            imm_4_1 = (instruction >> 8) & 0xF
-            imm = (imm_12 << 12) | (imm_11 << 11) | (imm_10_5 << 5) | (imm_4_1 << 1)
-            if imm & 0x1000:
-                imm |= 0xFFFFE000
-            return imm
-        elif opcode in [0x37, 0x17]:  # LUI, AUIPC
-            return (instruction >> 12) & 0xFFFFF
-        elif opcode == 0x6F:  # JAL
-            imm_20 = (instruction >> 31) & 0x1
-            imm_19_12 = (instruction >> 12) & 0xFF
-            imm_11 = (instruction >> 20) & 0x1
-            imm_10_1 = (instruction >> 21) & 0x3FF
-            imm = (imm_20 << 20) | (imm_19_12 << 12) | (imm_11 << 11) | (imm_10_1 << 1)
-            if imm & 0x100000:
-                imm |= 0xFFE00000
-            return imm
-        elif opcode == 0x67:  # JALR
-            imm = ((instruction >> 20) & 0xFFF)
-            if imm & 0x800:
-                imm |= 0xFFFFF000
-            return imm
-        return 0
-    
-    def execute_alu(self, a, b, aluControl):
-        """ALU 실행 (alu 모듈과 동일)"""
-        # 32비트 부호 있는 정수로 처리
-        a_signed = a if a < 0x80000000 else a - 0x100000000
-        b_signed = b if b < 0x80000000 else b - 0x100000000
-        
-        if aluControl == 0:  # ADD
-            result = (a + b) & 0xFFFFFFFF
-        elif aluControl == 8:  # SUB
-            result = (a - b) & 0xFFFFFFFF
-        elif aluControl == 1:  # SLL
-            result = (a << (b & 0x1F)) & 0xFFFFFFFF
-        elif aluControl == 5:  # SRL
-            result = (a >> (b & 0x1F)) & 0xFFFFFFFF
-        elif aluControl == 13:  # SRA
-            if a & 0x80000000:  # 음수인 경우
-                result = ((a >> (b & 0x1F)) | (0xFFFFFFFF << (32 - (b & 0x1F)))) & 0xFFFFFFFF
-            else:
-                result = (a >> (b & 0x1F)) & 0xFFFFFFFF
-        elif aluControl == 2:  # SLT
-            result = 1 if a_signed < b_signed else 0
-        elif aluControl == 3:  # SLTU
-            result = 1 if a < b else 0
-        elif aluControl == 4:  # XOR
-            result = a ^ b
-        elif aluControl == 6:  # OR
-            result = a | b
-        elif aluControl == 7:  # AND
-            result = a & b
-        elif aluControl == 0x10:  # BEQ
-            result = 1 if a == b else 0
-        elif aluControl == 0x11:  # BNE
-            result = 1 if a != b else 0
-        elif aluControl == 0x14:  # BLT
-            result = 1 if a_signed < b_signed else 0
-        elif aluControl == 0x15:  # BGE
-            result = 1 if a_signed >= b_signed else 0
-        elif aluControl == 0x16:  # BLTU
-            result = 1 if a < b else 0
-        elif aluControl == 0x17:  # BGEU
-            result = 1 if a >= b else 0
-        else:
-            result = 0
-            
-        return result
-      
-    def update_displays(self):
+    def update_displays(self, full=False):
+        """코어에서 바로 프레임을 만들어 그린다 (메인 스레드에서 코어를 바꾼 뒤)"""
+        with self._core_lock:
+            frame = capture_frame(self.core, full)
+        self.apply_frame(frame)
+    
+    def apply_frame(self, frame):
+        """프레임을 화면에 반영 (바뀐 줄만 고쳐 쓰고, reload 프레임이면 전부 다시 그린다)"""
+        self._frame = frame
+        everything = frame.reload
+        pipeline_registers = frame.pipeline_registers
+        control_signals = frame.control_signals
+        
         # 상단 정보 업데이트
-        self.cycle_label.config(text=str(self.cycle_count))
-        self.instruction_label.config(text=str(self.instruction_count))
-        self.state_label.config(text=self.control_state)
-        self.pc_label.config(text=f"0x{self.pipeline_registers['PCOutData']:08X}")
+        self.cycle_label.config(text=str(frame.cycle_count))
+        self.instruction_label.config(text=str(frame.instruction_count))
+        self.state_label.config(text=frame.control_state)
+        self.pc_label.config(text=f"0x{pipeline_registers['PCOutData']:08X}")
         
         # 파이프라인 레지스터 정보 업데이트
-        self.pipeline_text.delete(1.0, tk.END)
-        pipeline_info = f"PC: 0x{self.pipeline_registers['PCOutData']:08X} | "
-        pipeline_info += f"RF1: 0x{self.pipeline_registers['DecReg_RFData1']:08X} | "
-        pipeline_info += f"RF2: 0x{self.pipeline_registers['DecReg_RFData2']:08X} | "
-        pipeline_info += f"IMM: 0x{self.pipeline_registers['DecReg_immExt']:08X} | "
-        pipeline_info += f"ALU: 0x{self.pipeline_registers['ExeReg_aluResult']:08X} | "
-        pipeline_info += f"PC_SRC: 0x{self.pipeline_registers['ExeReg_PCSrcMuxOut']:08X} | "
-        pipeline_info += f"BUS_ADDR: 0x{self.pipeline_registers['MemAccReg_busAddr']:08X} | "
-        pipeline_info += f"BUS_WDATA: 0x{self.pipeline_registers['MemAccReg_busWData']:08X} | "
-        pipeline_info += f"BUS_RDATA: 0x{self.pipeline_registers['MemAccReg_busRData']:08X}\n\n"
+        pipeline_info = f"PC: 0x{pipeline_registers['PCOutData']:08X} | "
+        pipeline_info += f"RF1: 0x{pipeline_registers['DecReg_RFData1']:08X} | "
+        pipeline_info += f"RF2: 0x{pipeline_registers['DecReg_RFData2']:08X} | "
+        pipeline_info += f"IMM: 0x{pipeline_registers['DecReg_immExt']:08X} | "
+        pipeline_info += f"ALU: 0x{pipeline_registers['ExeReg_aluResult']:08X} | "
+        pipeline_info += f"PC_SRC: 0x{pipeline_registers['ExeReg_PCSrcMuxOut']:08X} | "
+        pipeline_info += f"BUS_ADDR: 0x{pipeline_registers['MemAccReg_busAddr']:08X} | "
+        pipeline_info += f"BUS_WDATA: 0x{pipeline_registers['MemAccReg_busWData']:08X} | "
+        pipeline_info += f"BUS_RDATA: 0x{pipeline_registers['MemAccReg_busRData']:08X}\n\n"
         
         # 제어 신호 정보
         control_info = "제어신호: "
-        control_info += f"PCEn={self.control_signals['PCEn']} "
-        control_info += f"regFileWe={self.control_signals['regFileWe']} "
-        control_info += f"aluSrcMuxSel={self.control_signals['aluSrcMuxSel']} "
-        control_info += f"busWe={self.control_signals['busWe']} "
-        control_info += f"RFWDSrcMuxSel={self.control_signals['RFWDSrcMuxSel']} "
-        control_info += f"branch={self.control_signals['branch']} "
-        control_info += f"jal={self.control_signals['jal']} "
-        control_info += f"jalr={self.control_signals['jalr']} "
-        control_info += f"aluControl=0x{self.aluControl:02X} "
-        control_info += f"ramControl={self.ramControl}\n\n"
+        control_info += f"PCEn={control_signals['PCEn']} "
+        control_info += f"regFileWe={control_signals['regFileWe']} "
+        control_info += f"aluSrcMuxSel={control_signals['aluSrcMuxSel']} "
+        control_info += f"busWe={control_signals['busWe']} "
+        control_info += f"RFWDSrcMuxSel={control_signals['RFWDSrcMuxSel']} "
+        control_info += f"branch={control_signals['branch']} "
+        control_info += f"jal={control_signals['jal']} "
+        control_info += f"jalr={control_signals['jalr']} "
+        control_info += f"aluControl=0x{frame.aluControl:02X} "
+        control_info += f"ramControl={frame.ramControl}\n\n"
         
         # 현재 명령어 정보
-        instruction_info = f"현재명령어: 0x{self.current_instruction:08X} "
-        if self.current_instruction != 0:
-            opcode = self.current_instruction & 0x7F
-            rs1 = (self.current_instruction >> 15) & 0x1F
-            rs2 = (self.current_instruction >> 20) & 0x1F
-            rd = (self.current_instruction >> 7) & 0x1F
+        instruction_info = f"현재명령어: 0x{frame.current_instruction:08X} "
+        if frame.current_instruction != 0:
+            opcode = frame.current_instruction & 0x7F
+            rs1 = (frame.current_instruction >> 15) & 0x1F
+            rs2 = (frame.current_instruction >> 20) & 0x1F
+            rd = (frame.current_instruction >> 7) & 0x1F
             instruction_info += f"(opcode=0x{opcode:02X}, rs1=x{rs1}, rs2=x{rs2}, rd=x{rd})"
         
-        self.pipeline_text.insert(tk.END, pipeline_info + control_info + instruction_info)
-        
-        # 레지스터 파일 업데이트
-        self.reg_text.delete(1.0, tk.END)
-        reg_names = ["zero", "ra", "sp", "gp", "tp", "t0", "t1", "t2", "s0", "s1", 
-                    "a0", "a1", "a2", "a3", "a4", "a5", "a6", "a7", "s2", "s3", "s4",
-                    "s5", "s6", "s7", "s8", "s9", "s10", "s11", "t3", "t4", "t5", "t6"]
+        pipeline_info += control_info + instruction_info
+        if everything or pipeline_info != self._pipeline_info:
+            self._pipeline_info = pipeline_info
+            self.pipeline_text.delete(1.0, tk.END)
+            self.pipeline_text.insert(tk.END, pipeline_info)
         
-        for i in range(32):
-            value = self.regfile[i]
+        # 레지스터 파일 업데이트 (바뀐 레지스터 줄만)
+        for i in range(32) if everything else sorted(frame.dirty_registers):
+            value = frame.regfile[i]
             if i == 0:  # x0는 항상 0
                 value = 0
             # 부호 있는 값 계산
             signed_value = value
             if value & 0x80000000:  # 음수인 경우
                 signed_value = value - 0x100000000
-            self.reg_text.insert(tk.END, f"x{i:2d}({reg_names[i]:4s}): 0x{value:08X} ({signed_value:10d})\n")
-        
-        # RAM 메모리 업데이트
-        self.ram_text.delete(1.0, tk.END)
-        for i in range(0, 1024, 4):  # 4바이트씩 표시 (256개 워드)
-            word = self.ram.read_word(i)
-            # 모든 주소의 값을 표시 (0이어도 표시)
-            self.ram_text.insert(tk.END, f"0x{i:04X}: 0x{word:08X}\n")
-        
-        # ROM 메모리 업데이트
-        self.rom_text.delete(1.0, tk.END)
-        for i in range(0, 1024, 4):  # 4바이트씩 표시 (256개 워드)
-            word = self.rom.read_word(i)
-            if word != 0:  # 0이 아닌 값만 표시
-                self.rom_text.insert(tk.END, f"0x{i:04X}: 0x{word:08X}\n")
+            line = f"x{i:2d}({REG_NAMES[i]:4s}): 0x{value:08X} ({signed_value:10d})"
+            if line != self._reg_lines[i]:
+                self._reg_lines[i] = line
+                self.reg_text.delete(f"{i + 1}.0", f"{i + 1}.end")
+                self.reg_text.insert(f"{i + 1}.0", line)
+        
+        # RAM/ROM 메모리 업데이트 (화면에 보이는 줄만)
+        if everything:
+            core = self.core
+            memory_map = core.memory_map
+            with self._core_lock:
+                self.ram_view.attach(core.ram, memory_map.ram.base, memory_map.ram.size)
+                self.rom_view.attach(core.rom, memory_map.rom.base, memory_map.rom.size,
+                                     nonzero_word_offsets(core.rom))
+        else:
+            self.ram_view.patch(frame.ram_words)
+    
+    def publish_final(self, frame):
+        """워커가 멈출 때의 마지막 프레임은 버리지 않는다 (큐가 차 있으면 밀린 프레임을 비운다)"""
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()  # 마지막 프레임은 전체를 다시 그리므로 버려도 된다
+                except queue.Empty:
+                    pass
     
     def start_monitoring(self):
         def monitor_loop():
+            core = self.core
+            frame_interval = FRAME_INTERVAL_MS / 1000
+            last_frame = 0.0
             while True:
-                if self.simulation_running:
-                    self.step_execution()
+                if not self._running.wait(0.1):
+                    continue
+                
+                idle = 0
+                with self._core_lock:
+                    # 잠금을 기다리는 동안 정지/초기화되었을 수 있다
+                    if not self.simulation_running:
+                        continue
+                    
+                    message = None
+                    try:
+                        if self.run_mode == "throttle":
+                            # 목표 속도 기준으로 밀린 사이클만큼만 실행
+                            elapsed = time.perf_counter() - self._run_started
+                            due = int(elapsed * self.cycles_per_second) - self._run_cycles
+                            if due <= 0:
+                                idle = min(0.01, 1.0 / self.cycles_per_second)
+                            else:
+                                self._run_cycles += core.run(min(due, RUN_CHUNK_CYCLES))
+                        elif self.run_mode == "fast_forward":
+                            # 명령어 단위 실행 - 사이클 수는 명령어 종류별 상태 수로 누적
+                            self._run_cycles += core.run_instructions(RUN_CHUNK_CYCLES // 3,
+                                                                      until_breakpoint=True)
+                        else:
+                            # 터보/브레이크포인트 모드 - 쉬지 않고 청크 단위로 실행
+                            self._run_cycles += core.run(RUN_CHUNK_CYCLES,
+                                                         until_breakpoint=(self.run_mode == "breakpoint"))
+                    except Exception as e:
+                        print(f"시뮬레이션 오류 발생: {e}")
+                        message = f"시뮬레이션 오류: {str(e)}"
                     
                     # 시뮬레이션이 정지되었는지 확인
-                    if not self.simulation_running:
-                        # GUI 업데이트를 메인 스레드에서 실행
-                        self.root.after(0, lambda: self.status_label.config(text="시뮬레이션 완료"))
-                        print("시뮬레이션 자동 종료됨")
-                        break
+                    if message is None and (core.halted or core.breakpoint_hit or core.watch_hit is not None):
+                        if core.watch_hit is not None:
+                            message = core.watch_hit.describe()
+                        elif core.breakpoint_hit:
+                            message = f"브레이크포인트 도달 (PC: 0x{core.pipeline_registers['PCOutData']:04X})"
+                        else:
+                            message = core.halt_reason or "시뮬레이션 완료"
+                        print(f"시뮬레이션 자동 종료됨: {message}")
                     
-                    time.sleep(0.1)  # 100ms 딜레이
-                time.sleep(0.01)
+                    # 화면은 메인 스레드가 그린다 - 워커는 프레임 주기마다 상태만 복사해 넘긴다
+                    now = time.perf_counter()
+                    if message is not None:
+                        self.simulation_running = False
+                        self.publish_final(capture_frame(core, full=True, message=message))
+                    elif now - last_frame >= frame_interval and not self.frames.full():
+                        # 큐가 차 있으면 건너뛴다 (dirty 목록은 코어에 쌓여 다음 프레임에 합쳐진다)
+                        self.frames.put_nowait(capture_frame(core))
+                        last_frame = now
+                
+                if idle:
+                    time.sleep(idle)
         
         monitor_thread = threading.Thread(target=monitor_loop, daemon=True)
         monitor_thread.start()
     
-    def save_state(self):
-        """현재 상태를 히스토리에 저장"""
-        # 깊은 복사로 현재 상태 저장
-        regfile_copy = self.regfile.copy()
-        ram_copy = Memory(1024)
-        ram_copy.data = self.ram.data.copy()  # 바이트어레이 복사
-        pc_copy = self.pipeline_registers['PCOutData'] # PC 복사
-        cycle_copy = self.cycle_count # 사이클 카운터 복사
-        
-        self.history.append((regfile_copy, ram_copy, pc_copy, cycle_copy))
-        
-        # 히스토리 크기 제한
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
-    
     def undo_step(self):
         """이전 단계로 되돌리기"""
-        if len(self.history) > 0:
-            # 히스토리에서 이전 상태 복원
-            prev_regfile, prev_ram, prev_pc, prev_cycle = self.history.pop()
-            
-            self.regfile = prev_regfile
-            self.ram.data = prev_ram.data.copy()  # 바이트어레이 복사
-            self.pipeline_registers['PCOutData'] = prev_pc # PC 복원
-            self.cycle_count = prev_cycle # 사이클 카운터 복원
-            
+        core = self.core
+        self.simulation_running = False
+        with self._core_lock:
+            undone = core.undo_step()
+            pc = core.pipeline_registers['PCOutData']
+            instruction = core.rom.read_word(pc - core.rom_base) if core.in_rom(pc) else None
+        if undone:
             # 디스플레이 업데이트
             self.update_displays()
             
             # 상태 메시지 업데이트
-            rom_index = self.pipeline_registers['PCOutData'] // 4
-            if rom_index < 256:  # ROM 크기: 1024바이트 = 256워드
-                instruction = self.rom.read_word(self.pipeline_registers['PCOutData'])
-                self.status_label.config(text=f"되돌림: PC: 0x{self.pipeline_registers['PCOutData']:04X} (다음 명령어: 0x{instruction:08X})")
+            if instruction is not None:
+                self.status_label.config(text=f"되돌림: PC: 0x{pc:04X} (다음 명령어: 0x{instruction:08X})")
             else:
-                self.status_label.config(text=f"되돌림: PC: 0x{self.pipeline_registers['PCOutData']:04X} (ROM 범위 초과)")
+                self.status_label.config(text=f"되돌림: PC: 0x{pc:04X} (ROM 범위 초과)")
             
-            print(f"되돌리기 완료: PC 0x{self.pipeline_registers['PCOutData']:04X}")
+            print(f"되돌리기 완료: PC 0x{pc:04X}")
         else:
             self.status_label.config(text="되돌릴 단계가 없습니다")
             print("되돌릴 단계가 없습니다")
@@ -890,8 +697,8 @@ class RISCVMemoryMonitor:
     def start_logging(self):
         """로그 파일 시작"""
         try:
-            self.log_file = open("python_simulation_log.txt", "w")
-            self.log_file.write("cycle PC Instruction BusAddr BusWData BusRData BusWe\n")
+            with self._core_lock:
+                self.core.start_trace("python_simulation_log.txt")
             self.status_label.config(text="로그 기록 시작")
             print("로그 파일 시작: python_simulation_log.txt")
         except Exception as e:
@@ -899,68 +706,76 @@ class RISCVMemoryMonitor:
     
     def stop_logging(self):
         """로그 파일 정지"""
-        if self.log_file:
-            self.log_file.close()
-            self.log_file = None
+        if self.core.log_file:
+            with self._core_lock:
+                self.core.stop_trace()
             self.status_label.config(text="로그 기록 정지")
             print("로그 파일 정지")
     
-    def write_log(self, cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we):
-        """로그 파일에 한 줄 기록"""
-        if self.log_file:
-            self.log_file.write(f"{cycle} 0x{pc:08X} 0x{instruction:08X} 0x{bus_addr:08X} 0x{bus_wdata:08X} 0x{bus_rdata:08X} {bus_we}\n")
-            self.log_file.flush()  # 즉시 파일에 쓰기
-    
     def read_vivado_log(self):
-        """Vivado 테스트벤치 로그 파일 읽기"""
+        """Vivado 테스트벤치 로그 파일 열기 (mmap + 희소 인덱스, 보이는 페이지만 파싱)"""
         try:
-            with open("simulation_log.txt", "r") as f:
-                lines = f.readlines()
-                
-            # 헤더 건너뛰기
-            if lines and "cycle" in lines[0]:
-                lines = lines[1:]
-            
-            # 로그 분석
-            vivado_data = []
-            for line in lines:
-                parts = line.strip().split()
-                if len(parts) >= 7:
-                    cycle = int(parts[0])
-                    pc = int(parts[1], 16)
-                    instruction = int(parts[2], 16)
-                    bus_addr = int(parts[3], 16)
-                    bus_wdata = int(parts[4], 16)
-                    bus_rdata = int(parts[5], 16)
-                    bus_we = int(parts[6])
-                    
-                    vivado_data.append({
-                        'cycle': cycle,
-                        'pc': pc,
-                        'instruction': instruction,
-                        'bus_addr': bus_addr,
-                        'bus_wdata': bus_wdata,
-                        'bus_rdata': bus_rdata,
-                        'bus_we': bus_we
-                    })
-            
-            # 결과 표시
-            self.show_vivado_log(vivado_data)
-            
+            log = TextTrace("simulation_log.txt")
         except FileNotFoundError:
             self.status_label.config(text="Vivado 로그 파일을 찾을 수 없습니다")
             print("simulation_log.txt 파일이 없습니다")
+            return
         except Exception as e:
             self.status_label.config(text=f"로그 읽기 오류: {str(e)}")
             print(f"로그 읽기 오류: {e}")
+            return
+        
+        # 결과 표시
+        self.show_vivado_log(log)
+    
+    def compare_logs(self):
+        """python_simulation_log.txt와 simulation_log.txt를 사이클 단위로 비교"""
+        with self._core_lock:
+            if self.core.log_file:
+                self.core.log_file.flush()  # 기록 중이면 버퍼에 남은 레코드부터 쓴다
+        try:
+            result = diff_traces("python_simulation_log.txt", "simulation_log.txt")
+        except Exception as e:
+            self.status_label.config(text=f"로그 비교 오류: {str(e)}")
+            print(f"로그 비교 오류: {e}")
+            return
+        
+        if not result.compared:
+            message = "로그 비교 실패: 겹치는 사이클이 없습니다"
+            self.status_label.config(text=message)
+            print(message)
+            return
+        if result.ok:
+            message = f"로그 일치: {result.compared}개 사이클 비교"
+            self.status_label.config(text=message)
+            print(message)
+            return
+        
+        divergence = result.divergences[0]
+        self.status_label.config(text=f"로그 불일치: 사이클 {divergence.cycle} ({', '.join(divergence.fields)})")
+        report = format_divergence(divergence)
+        print(report)
+        
+        # 불일치 보고서를 새 창에 표시
+        diff_window = tk.Toplevel(self.root)
+        diff_window.title("Python / Vivado 로그 비교")
+        diff_window.geometry("800x400")
+        text_widget = tk.Text(diff_window, font=("Consolas", 10))
+        text_widget.pack(fill=tk.BOTH, expand=True)
+        text_widget.insert(tk.END, report + "\n")
+        text_widget.config(state=tk.DISABLED)  # 읽기 전용
     
-    def show_vivado_log(self, vivado_data):
-        """Vivado 로그 데이터를 새 창에 표시"""
+    def show_vivado_log(self, log):
+        """Vivado 로그를 새 창에 페이지 단위로 표시 (창을 닫으면 로그도 닫는다)"""
         # 새 창 생성
         log_window = tk.Toplevel(self.root)
         log_window.title("Vivado 테스트벤치 로그")
         log_window.geometry("800x600")
         
+        # 페이지 이동 패널
+        nav_frame = ttk.Frame(log_window)
+        nav_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        
         # 텍스트 위젯
         text_widget = tk.Text(log_window, font=("Consolas", 10))
         scrollbar = ttk.Scrollbar(log_window, orient=tk.VERTICAL, command=text_widget.yview)
@@ -969,27 +784,54 @@ class RISCVMemoryMonitor:
         text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # 헤더
-        text_widget.insert(tk.END, "Vivado 테스트벤치 로그 분석\n")
-        text_widget.insert(tk.END, "=" * 80 + "\n")
-        text_widget.insert(tk.END, f"총 {len(vivado_data)}개 사이클\n\n")
+        position = {'line': 0}
+        
+        def show_page(line):
+            line = max(0, min(line, max(len(log) - LOG_PAGE_LINES, 0)))
+            position['line'] = line
+            text_widget.config(state=tk.NORMAL)
+            text_widget.delete("1.0", tk.END)
+            
+            # 헤더
+            text_widget.insert(tk.END, "Vivado 테스트벤치 로그 분석\n")
+            text_widget.insert(tk.END, "=" * 80 + "\n")
+            last = min(line + LOG_PAGE_LINES, len(log))
+            text_widget.insert(tk.END, f"총 {len(log)}줄 중 {line + 1}~{last}줄\n\n")
+            
+            # 데이터 표시
+            for cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we in log.page(line, LOG_PAGE_LINES):
+                text_widget.insert(tk.END, f"사이클 {cycle:3d}: ")
+                text_widget.insert(tk.END, f"PC=0x{pc:08X} ")
+                text_widget.insert(tk.END, f"Inst=0x{instruction:08X} ")
+                text_widget.insert(tk.END, f"Addr=0x{bus_addr:08X} ")
+                text_widget.insert(tk.END, f"WData=0x{bus_wdata:08X} ")
+                text_widget.insert(tk.END, f"RData=0x{bus_rdata:08X} ")
+                text_widget.insert(tk.END, f"We={bus_we}\n")
+            
+            text_widget.config(state=tk.DISABLED)  # 읽기 전용
+        
+        def goto_cycle():
+            try:
+                cycle = int(cycle_var.get(), 0)
+            except ValueError:
+                return
+            show_page(log.find_cycle(cycle))
         
-        # 데이터 표시
-        for i, data in enumerate(vivado_data[:50]):  # 처음 50개만 표시
-            text_widget.insert(tk.END, f"사이클 {data['cycle']:3d}: ")
-            text_widget.insert(tk.END, f"PC=0x{data['pc']:08X} ")
-            text_widget.insert(tk.END, f"Inst=0x{data['instruction']:08X} ")
-            text_widget.insert(tk.END, f"Addr=0x{data['bus_addr']:08X} ")
-            text_widget.insert(tk.END, f"WData=0x{data['bus_wdata']:08X} ")
-            text_widget.insert(tk.END, f"RData=0x{data['bus_rdata']:08X} ")
-            text_widget.insert(tk.END, f"We={data['bus_we']}\n")
+        def close():
+            log.close()
+            log_window.destroy()
         
-        if len(vivado_data) > 50:
-            text_widget.insert(tk.END, f"\n... (총 {len(vivado_data)}개 중 50개만 표시)\n")
+        ttk.Button(nav_frame, text="◀ 이전", command=lambda: show_page(position['line'] - LOG_PAGE_LINES)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="다음 ▶", command=lambda: show_page(position['line'] + LOG_PAGE_LINES)).pack(side=tk.LEFT, padx=5)
+        ttk.Label(nav_frame, text="사이클:").pack(side=tk.LEFT, padx=(15, 5))
+        cycle_var = tk.StringVar(value="")
+        ttk.Entry(nav_frame, textvariable=cycle_var, width=12).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="이동", command=goto_cycle).pack(side=tk.LEFT, padx=5)
+        log_window.protocol("WM_DELETE_WINDOW", close)
         
-        text_widget.config(state=tk.DISABLED)  # 읽기 전용
+        show_page(0)
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = RISCVMemoryMonitor(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
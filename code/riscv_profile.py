@@ -0,0 +1,214 @@
+"""사이클 프로파일러: python riscv_profile.py [code.mem] [--folded PATH] [--top N] [--cycle-model]
+
+RISCVCore.start_profile()로 켜면 step()은 사이클마다, step_instruction()은
+명령어마다 Profiler에 기록한다. 집계는 미리 잡아 둔 리스트에 인덱스로 더한다.
+    PC별 (ROM 워드 인덱스)        실행 횟수 / 사이클
+    FSM 상태별                    사이클 (FETCH/DECODE 대 L_MEM/L_WB 등)
+    명령어 종류별 (exe_state)     실행 횟수 / 사이클
+    메모리 접근 종류별            lw/lb/lh/lbu/lhu, sw/sb/sh 횟수
+
+호출 그래프는 JAL/JALR의 ra 규약으로 추적한다: rd가 ra(x1) 또는 t0(x5)이면
+호출(호출 대상 주소를 프레임으로 쌓는다), rd가 x0이고 rs1이 ra/t0인 JALR은
+복귀다. 스택별 사이클은 flamegraph.pl / speedscope / inferno가 읽는
+folded 형식("프레임;프레임;... 사이클")으로 내보낸다.
+"""
+import sys
+
+from riscv_defines import (
+    FETCH, DECODE, R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE,
+    S_EXE, S_MEM, L_EXE, L_MEM, L_WB, NUM_STATES, STATE_NAMES,
+)
+
+# 명령어 종류 이름 (DECODE 다음 상태로 인덱싱, FETCH = 알 수 없는 opcode)
+CLASS_NAMES = [None] * NUM_STATES
+CLASS_NAMES[FETCH] = 'unknown'
+CLASS_NAMES[R_EXE] = 'R'
+CLASS_NAMES[I_EXE] = 'I'
+CLASS_NAMES[B_EXE] = 'B'
+CLASS_NAMES[LU_EXE] = 'LUI'
+CLASS_NAMES[AU_EXE] = 'AUIPC'
+CLASS_NAMES[J_EXE] = 'JAL'
+CLASS_NAMES[JL_EXE] = 'JALR'
+CLASS_NAMES[S_EXE] = 'S'
+CLASS_NAMES[L_EXE] = 'L'
+CLASS_NAMES = tuple(CLASS_NAMES)
+
+# 명령어 종류별로 거치는 FSM 상태 (명령어 단위 실행의 상태별 사이클 계산용)
+STATE_SEQUENCE = [(FETCH, DECODE)] * NUM_STATES
+for _state in (R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE):
+    STATE_SEQUENCE[_state] = (FETCH, DECODE, _state)
+STATE_SEQUENCE[S_EXE] = (FETCH, DECODE, S_EXE, S_MEM)
+STATE_SEQUENCE[L_EXE] = (FETCH, DECODE, L_EXE, L_MEM, L_WB)
+STATE_SEQUENCE = tuple(STATE_SEQUENCE)
+
+LOAD_NAMES = {0: 'lw', 1: 'lb', 2: 'lh', 5: 'lbu', 6: 'lhu'}  # load_ram_control -> 이름
+STORE_NAMES = {0: 'sw', 1: 'sb', 2: 'sh'}                     # store_ram_control -> 이름
+
+LINK_REGISTERS = (1, 5)  # ra, t0 (RISC-V 호출 규약의 링크 레지스터)
+
+
+def _frame_name(addr):
+    return f"0x{addr:08X}"
+
+
+class Profiler:
+    """코어 하나의 사이클 집계 (core.profiler로 붙여 쓴다)"""
+    
+    def __init__(self, core):
+        self.core = core
+        self.rom_base = core.rom_base
+        words = (core.rom_last - core.rom_base) // 4 + 1
+        
+        # PC별 (ROM 워드 인덱스)
+        self.pc_counts = [0] * words
+        self.pc_cycles = [0] * words
+        # FSM 상태별 / 명령어 종류별 (상태 번호로 인덱싱)
+        self.state_cycles = [0] * NUM_STATES
+        self.class_counts = [0] * NUM_STATES
+        self.class_cycles = [0] * NUM_STATES
+        # 메모리 접근 종류별 (ramControl로 인덱싱)
+        self.load_counts = [0] * 8
+        self.store_counts = [0] * 4
+        
+        # 호출 스택 (프레임 이름 튜플)과 스택별 사이클
+        self.stack = (_frame_name(core.pipe.PCOutData),)
+        self.stack_cycles = {}
+        
+        # 사이클 모델: 지금 실행 중인 명령어 (명령어 중간에 켰으면 FETCH한 PC는 PC-4)
+        pc = core.pipe.PCOutData
+        self._pc = pc if core.state == FETCH else pc - 4
+        self._index = min(max((self._pc - self.rom_base) >> 2, 0), words - 1)
+        self._decoded = core.current_decoded
+    
+    @property
+    def total_cycles(self):
+        return sum(self.state_cycles)
+    
+    def record_instruction(self, pc, decoded):
+        """step_instruction()이 명령어 하나를 끝낸 뒤 호출"""
+        index = (pc - self.rom_base) >> 2
+        cycles = decoded.cycles
+        exe_state = decoded.exe_state
+        self.pc_counts[index] += 1
+        self.pc_cycles[index] += cycles
+        self.class_counts[exe_state] += 1
+        self.class_cycles[exe_state] += cycles
+        state_cycles = self.state_cycles
+        for state in STATE_SEQUENCE[exe_state]:
+            state_cycles[state] += 1
+        if exe_state == L_EXE:
+            self.load_counts[decoded.load_ram_control] += 1
+        elif exe_state == S_EXE:
+            self.store_counts[decoded.store_ram_control] += 1
+        stack = self.stack
+        self.stack_cycles[stack] = self.stack_cycles.get(stack, 0) + cycles
+        if exe_state == J_EXE or exe_state == JL_EXE:
+            self._track_call(pc, decoded)
+    
+    def record_cycle(self, state, pc):
+        """step()이 사이클 하나를 실행한 뒤 호출 (state는 실행한 상태, pc는 사이클 시작 시 PC)"""
+        if state == FETCH:
+            decoded = self._decoded = self.core.current_decoded
+            self._pc = pc
+            self._index = index = (pc - self.rom_base) >> 2
+            self.pc_counts[index] += 1
+            self.class_counts[decoded.exe_state] += 1
+        else:
+            decoded = self._decoded
+        self.pc_cycles[self._index] += 1
+        self.state_cycles[state] += 1
+        self.class_cycles[decoded.exe_state] += 1
+        stack = self.stack
+        self.stack_cycles[stack] = self.stack_cycles.get(stack, 0) + 1
+        if state == L_MEM:
+            self.load_counts[decoded.load_ram_control] += 1
+        elif state == S_MEM:
+            self.store_counts[decoded.store_ram_control] += 1
+        elif state == J_EXE or state == JL_EXE:
+            self._track_call(self._pc, decoded)
+    
+    def _track_call(self, pc, decoded):
+        """JAL/JALR 실행 후 호출/복귀에 따라 스택 갱신 (JALR 대상은 DecReg_RFData1 기준)"""
+        if decoded.exe_state == J_EXE:
+            target = (pc + decoded.imm) & 0xFFFFFFFF
+        else:
+            target = (self.core.pipe.DecReg_RFData1 + decoded.imm) & 0xFFFFFFFE
+        if decoded.rd in LINK_REGISTERS:
+            self.stack = self.stack + (_frame_name(target),)
+        elif decoded.rd == 0 and decoded.exe_state == JL_EXE and decoded.rs1 in LINK_REGISTERS:
+            if len(self.stack) > 1:
+                self.stack = self.stack[:-1]
+    
+    def flat_profile(self):
+        """PC별 [(pc, 명령어 워드, 실행 횟수, 사이클)] (사이클 내림차순)"""
+        rom = self.core.decode_cache
+        rows = [(self.rom_base + 4 * index, rom.lookup(self.rom_base + 4 * index).word, count, cycles)
+                for index, (count, cycles) in enumerate(zip(self.pc_counts, self.pc_cycles)) if count]
+        rows.sort(key=lambda row: (-row[3], row[0]))
+        return rows
+    
+    def folded_stacks(self):
+        """folded 형식 줄 목록 ("프레임;프레임 사이클", flamegraph.pl 입력)"""
+        return [f"{';'.join(stack)} {cycles}" for stack, cycles in sorted(self.stack_cycles.items())]
+    
+    def write_folded(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.folded_stacks():
+                f.write(line + "\n")
+    
+    def format_report(self, top=20):
+        """사람이 읽는 요약 (상태 / 명령어 종류 / 메모리 접근 / 상위 PC)"""
+        total = self.total_cycles or 1
+        instructions = sum(self.pc_counts) - self.class_counts[FETCH]
+        lines = [f"총 {self.total_cycles} 사이클 / {instructions} 명령어", "", "FSM 상태별 사이클"]
+        for state, cycles in enumerate(self.state_cycles):
+            if cycles:
+                lines.append(f"  {STATE_NAMES[state]:<8} {cycles:>10} {100 * cycles / total:6.2f}%")
+        lines += ["", "명령어 종류별"]
+        for state, cycles in enumerate(self.class_cycles):
+            if self.class_counts[state]:
+                lines.append(f"  {CLASS_NAMES[state]:<8} {self.class_counts[state]:>8}회 "
+                             f"{cycles:>10} 사이클 {100 * cycles / total:6.2f}%")
+        lines += ["", "메모리 접근"]
+        accesses = ([(name, self.load_counts[control]) for control, name in LOAD_NAMES.items()]
+                    + [(name, self.store_counts[control]) for control, name in STORE_NAMES.items()])
+        lines += [f"  {name:<8} {count:>8}회" for name, count in accesses if count]
+        lines += ["", f"상위 PC (사이클 기준 {top}개)"]
+        for pc, word, count, cycles in self.flat_profile()[:top]:
+            lines.append(f"  0x{pc:08X}  0x{word:08X} {count:>8}회 {cycles:>10} 사이클 "
+                         f"{100 * cycles / total:6.2f}%")
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+    from riscv_core import RISCVCore
+    
+    parser = argparse.ArgumentParser(description="RISC-V 사이클 프로파일 (PC/상태/명령어 종류/메모리 접근)")
+    parser.add_argument("program", nargs="?", default="code.mem", help="프로그램 이미지 (.mem / flat binary / ELF)")
+    parser.add_argument("--max-cycles", type=int, default=None, help="최대 사이클 수 (기본: 제한 없음)")
+    parser.add_argument("--top", type=int, default=20, help="보고서에 보일 상위 PC 수")
+    parser.add_argument("--folded", metavar="PATH", help="호출 스택별 사이클을 folded 형식으로 기록 (flamegraph.pl)")
+    parser.add_argument("--cycle-model", action="store_true",
+                        help="명령어 단위 대신 사이클 모델(step)로 실행하며 집계")
+    args = parser.parse_args(argv)
+    
+    core = RISCVCore(max_cycles=args.max_cycles)
+    core.load_image(args.program)
+    profiler = core.start_profile()
+    if args.cycle_model:
+        core.run()
+    else:
+        core.run_instructions()
+    core.stop_profile()
+    
+    print(profiler.format_report(args.top))
+    print(f"\n정지 사유: {core.halt_reason}")
+    if args.folded:
+        profiler.write_folded(args.folded)
+        print(f"folded 스택 기록: {args.folded}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
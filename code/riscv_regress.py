@@ -0,0 +1,250 @@
+"""회귀 테스트 러너: python riscv_regress.py regression.json [--jobs N] [--json PATH] [--junit PATH]
+
+매니페스트(JSON)에 적힌 프로그램들을 프로세스 풀에 나눠 헤드리스 코어로
+실행하고, 정지 사유 / 사이클 수 / 레지스터 / RAM 서명이 기대값과 같은지
+확인한다. 프로그램마다 프로세스 하나가 통째로 맡으므로 코어 수만큼 빨라진다.
+
+매니페스트 형식 (경로는 매니페스트 파일 기준):
+    {
+      "max_cycles": 100000,
+      "programs": [
+        {"name": "bubble_sort", "image": "code.mem", "max_cycles": 1000,
+         "regions": ["ram:0:4K"],
+         "expect": {"halt": "...", "cycles": 708, "instructions": 107,
+                    "registers": {"sp": "0x40", "x10": 5},
+                    "ram": {"0x3C": "0x00000005"},
+                    "ram_digest": "<sha256>"}}
+      ]
+    }
+expect의 항목은 모두 선택이다. --record로 지금 실행 결과를 기대값으로 저장할 수 있다.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from riscv_core import RISCVCore
+from riscv_defines import REG_NAMES
+from riscv_memmap import MemoryMap
+
+DEFAULT_MAX_CYCLES = 1000000  # 매니페스트에 제한이 없을 때 프로그램당 최대 사이클 수
+
+REGISTER_INDEX = {name: index for index, name in enumerate(REG_NAMES)}
+REGISTER_INDEX.update({f"x{index}": index for index in range(32)})
+REGISTER_INDEX['fp'] = 8  # s0 별칭
+
+
+def _number(value):
+    """매니페스트 숫자 (정수 또는 '0x40' 같은 문자열)"""
+    return value if isinstance(value, int) else int(value, 0)
+
+
+def ram_digest(memory):
+    """RAM 내용 서명: 0이 아닌 워드의 (오프셋, 값) 목록의 sha256 (저장소 종류와 무관)"""
+    digest = hashlib.sha256()
+    for start, data in memory.iter_chunks():
+        if not any(data):
+            continue
+        usable = len(data) - len(data) % 4
+        for index, (word,) in enumerate(struct.iter_unpack('<I', data[:usable])):
+            if word:
+                digest.update(struct.pack('<QI', start + index * 4, word))
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """매니페스트를 읽어 프로그램 설정 리스트로 반환 (이미지 경로는 절대 경로로 바꾼다)"""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    default_cycles = manifest.get('max_cycles', DEFAULT_MAX_CYCLES)
+    programs = []
+    for entry in manifest['programs']:
+        spec = dict(entry)
+        spec['image'] = os.path.join(base, entry['image'])
+        spec.setdefault('name', os.path.splitext(os.path.basename(entry['image']))[0])
+        spec.setdefault('max_cycles', default_cycles)
+        programs.append(spec)
+    return programs
+
+
+def check_expectations(core, expect):
+    """기대값과 다른 항목의 설명 리스트 (모두 같으면 빈 리스트)"""
+    failures = []
+    if 'halt' in expect and core.halt_reason != expect['halt']:
+        failures.append(f"정지 사유: {core.halt_reason!r} (기대값 {expect['halt']!r})")
+    for key, actual in (('cycles', core.cycle_count), ('instructions', core.instruction_count)):
+        if key in expect and actual != expect[key]:
+            failures.append(f"{key}: {actual} (기대값 {expect[key]})")
+    for name, value in expect.get('registers', {}).items():
+        index = REGISTER_INDEX[name]
+        actual = core.regfile[index] if index else 0
+        if actual != _number(value) & 0xFFFFFFFF:
+            failures.append(f"{name}: 0x{actual:08X} (기대값 0x{_number(value) & 0xFFFFFFFF:08X})")
+    for addr, value in expect.get('ram', {}).items():
+        memory, offset = core.data_memory(_number(addr))
+        if memory is None:
+            failures.append(f"RAM 0x{_number(addr):08X}: 데이터 버스 영역 밖")
+            continue
+        actual = memory.read_word(offset)
+        if actual != _number(value) & 0xFFFFFFFF:
+            failures.append(f"RAM 0x{_number(addr):08X}: 0x{actual:08X} (기대값 0x{_number(value) & 0xFFFFFFFF:08X})")
+    if 'ram_digest' in expect and ram_digest(core.ram) != expect['ram_digest']:
+        failures.append("RAM 서명 불일치")
+    return failures
+
+
+def record_expectations(core):
+    """지금 코어 상태를 매니페스트 expect 형식으로 (0이 아닌 레지스터만)"""
+    return {
+        'halt': core.halt_reason,
+        'cycles': core.cycle_count,
+        'instructions': core.instruction_count,
+        'registers': {f"x{index}": f"0x{value:08X}" for index, value in enumerate(core.regfile)
+                      if index and value},
+        'ram_digest': ram_digest(core.ram),
+    }
+
+
+def run_program(spec, record=False):
+    """프로그램 하나 실행 (작업 프로세스에서 호출, 결과는 JSON으로 바로 쓸 수 있는 dict)
+
+    status는 'passed' / 'failed'(기대값 불일치) / 'error'(로드 또는 실행 중 예외).
+    """
+    result = {'name': spec['name'], 'image': spec['image'], 'status': 'passed',
+              'cycles': 0, 'instructions': 0, 'wall_time': 0.0, 'halt_reason': None,
+              'failures': []}
+    start = time.perf_counter()
+    try:
+        memory_map = MemoryMap.from_specs(spec.get('regions', ()))
+        core = RISCVCore(max_cycles=spec['max_cycles'], memory_map=memory_map)
+        core.load_image(spec['image'])
+        core.run()
+        result['failures'] = check_expectations(core, spec.get('expect', {}))
+        if record:
+            result['expect'] = record_expectations(core)
+        result.update(cycles=core.cycle_count, instructions=core.instruction_count,
+                      halt_reason=core.halt_reason)
+    except Exception as e:
+        result['status'] = 'error'
+        result['failures'] = [f"{type(e).__name__}: {e}"]
+    result['wall_time'] = time.perf_counter() - start
+    if result['status'] == 'passed' and result['failures']:
+        result['status'] = 'failed'
+    return result
+
+
+def run_all(programs, jobs=None, record=False):
+    """프로그램들을 jobs개 프로세스로 나눠 실행, 결과는 매니페스트 순서대로
+
+    jobs가 1이면 풀 없이 현재 프로세스에서 차례로 실행한다.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(programs) <= 1:
+        return [run_program(spec, record) for spec in programs]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(programs))) as executor:
+        return list(executor.map(run_program, programs, [record] * len(programs)))
+
+
+def summarize(results, wall_time, jobs):
+    """JSON 요약 (프로그램별 결과 + 합계)"""
+    counts = {status: sum(1 for r in results if r['status'] == status)
+              for status in ('passed', 'failed', 'error')}
+    return {
+        'programs': results,
+        'total': len(results),
+        **counts,
+        'cycles': sum(r['cycles'] for r in results),
+        'instructions': sum(r['instructions'] for r in results),
+        'wall_time': wall_time,
+        'jobs': jobs,
+    }
+
+
+def write_junit(summary, path, suite_name='riscv-regress'):
+    """JUnit XML 기록 (CI 테스트 리포트용, 사이클/명령어 수는 system-out에 적는다)"""
+    suite = ET.Element('testsuite', name=suite_name, tests=str(summary['total']),
+                       failures=str(summary['failed']), errors=str(summary['error']),
+                       time=f"{summary['wall_time']:.3f}")
+    for result in summary['programs']:
+        case = ET.SubElement(suite, 'testcase', classname=suite_name, name=result['name'],
+                             time=f"{result['wall_time']:.3f}")
+        if result['status'] != 'passed':
+            tag = 'failure' if result['status'] == 'failed' else 'error'
+            node = ET.SubElement(case, tag, message=result['failures'][0])
+            node.text = "\n".join(result['failures'])
+        ET.SubElement(case, 'system-out').text = (
+            f"cycles={result['cycles']} instructions={result['instructions']} "
+            f"halt={result['halt_reason']}")
+    ET.ElementTree(suite).write(path, encoding='utf-8', xml_declaration=True)
+
+
+def main(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="RISC-V 회귀 테스트 (프로세스 풀 병렬 실행)")
+    parser.add_argument("manifest", help="회귀 테스트 매니페스트 (.json)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="작업 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--only", action="append", default=[], metavar="NAME", help="이 이름의 프로그램만 실행")
+    parser.add_argument("--json", metavar="PATH", help="JSON 요약 기록")
+    parser.add_argument("--junit", metavar="PATH", help="JUnit XML 기록")
+    parser.add_argument("--record", action="store_true",
+                        help="실행 결과를 기대값으로 매니페스트에 다시 쓴다")
+    args = parser.parse_args(argv)
+    
+    try:
+        programs = load_manifest(args.manifest)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"매니페스트를 읽을 수 없습니다: {e}")
+    if args.only:
+        unknown = sorted(set(args.only) - {spec['name'] for spec in programs})
+        if unknown:
+            parser.error(f"매니페스트에 없는 프로그램입니다: {', '.join(unknown)}")
+        programs = [spec for spec in programs if spec['name'] in args.only]
+    if not programs:
+        parser.error("실행할 프로그램이 없습니다")
+    
+    jobs = args.jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = run_all(programs, jobs, record=args.record)
+    summary = summarize(results, time.perf_counter() - start, jobs)
+    
+    for result in results:
+        print(f"[{result['status'].upper():6}] {result['name']:<24} {result['cycles']:>10} 사이클 "
+              f"{result['instructions']:>9} 명령어 {result['wall_time']:8.3f}s")
+        for failure in result['failures']:
+            print(f"         {failure}")
+    print(f"{summary['total']}개 중 통과 {summary['passed']}, 실패 {summary['failed']}, "
+          f"오류 {summary['error']} ({summary['wall_time']:.3f}s, 프로세스 {jobs}개)")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    if args.junit:
+        write_junit(summary, args.junit)
+    if args.record:
+        _record_manifest(args.manifest, results)
+        print(f"기대값 기록: {args.manifest}")
+    return 0 if summary['passed'] == summary['total'] else 1
+
+
+def _record_manifest(path, results):
+    """실행 결과의 expect를 매니페스트의 같은 이름 항목에 써 넣는다"""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    recorded = {result['name']: result['expect'] for result in results if 'expect' in result}
+    for entry in manifest['programs']:
+        name = entry.get('name', os.path.splitext(os.path.basename(entry['image']))[0])
+        if name in recorded:
+            entry['expect'] = recorded[name]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""전체 머신 상태 스냅샷 파일 (저장 / 복원)
+
+초기화 구간을 한 번만 실행해 두고 그 뒤 상태를 파일로 남겨 두면,
+회귀 테스트 변형들을 매번 처음부터 시뮬레이션하지 않고 그 스냅샷에서
+바로 시작할 수 있다.
+
+파일 형식 (리틀 엔디안):
+  헤더: magic 'RVSN', version, flags (FLAG_ZLIB이면 본문이 zlib 압축)
+  본문: 메모리 맵 -> 코어 상태 -> 영역별 메모리 조각 -> 주변장치
+    메모리 맵: page_size, 영역 수, 영역마다 (이름, 시작 주소, 크기)
+               (rom, ram, 추가 영역 순)
+    코어 상태: regfile, 파이프라인 레지스터, 제어 신호, 상태 번호,
+               aluControl/ramControl, 카운터, 현재 명령어, 정지 사유
+    메모리: 영역 순서대로 (조각 수, 조각마다 오프셋/길이/내용)
+            전부 0인 조각은 기록하지 않는다
+    주변장치: 장치 수, 장치마다 (시작 주소, 클래스 이름, snapshot() 값)
+              값은 None / 정수 / bytes / 튜플을 태그 한 바이트로 구분해 기록
+              (version 1 파일은 주변장치 없이 읽는다)
+"""
+import struct
+import zlib
+
+from riscv_decode import decode
+from riscv_memmap import MemoryMap, MemoryRegion
+
+SNAPSHOT_MAGIC = b'RVSN'
+SNAPSHOT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+FLAG_ZLIB = 0x1
+
+_HEADER = struct.Struct('<4sHH')
+_REGION = struct.Struct('<QQ')               # 시작 주소, 크기 (이름은 따로)
+_CORE = struct.Struct('<32Q10Q8B4BQQIBBqI')  # 아래 _pack_core() 순서
+_COUNT = struct.Struct('<I')
+_CHUNK = struct.Struct('<QI')                # 영역 내 오프셋, 길이
+_DEVICE = struct.Struct('<Q')                # 장치 시작 주소 (클래스 이름은 따로)
+_INT = struct.Struct('<q')
+
+
+def _pack_text(text):
+    data = text.encode('utf-8')
+    return struct.pack('<H', len(data)) + data
+
+
+def _unpack_text(body, offset):
+    (length,) = struct.unpack_from('<H', body, offset)
+    offset += 2
+    return bytes(body[offset:offset + length]).decode('utf-8'), offset + length
+
+
+def _pack_value(value):
+    """장치 snapshot() 값 인코딩 (None / 정수 / bytes / 튜플만)"""
+    if value is None:
+        return b'N'
+    if isinstance(value, int):
+        return b'I' + _INT.pack(value)
+    if isinstance(value, (bytes, bytearray)):
+        return b'B' + _COUNT.pack(len(value)) + bytes(value)
+    if isinstance(value, tuple):
+        return b'T' + _COUNT.pack(len(value)) + b''.join(_pack_value(item) for item in value)
+    raise TypeError(f"스냅샷에 기록할 수 없는 장치 상태입니다: {type(value).__name__}")
+
+
+def _unpack_value(body, offset):
+    tag = bytes(body[offset:offset + 1])
+    offset += 1
+    if tag == b'N':
+        return None, offset
+    if tag == b'I':
+        return _INT.unpack_from(body, offset)[0], offset + _INT.size
+    (length,) = _COUNT.unpack_from(body, offset)
+    offset += _COUNT.size
+    if tag == b'B':
+        return bytes(body[offset:offset + length]), offset + length
+    if tag == b'T':
+        items = []
+        for _ in range(length):
+            item, offset = _unpack_value(body, offset)
+            items.append(item)
+        return tuple(items), offset
+    raise ValueError(f"알 수 없는 장치 상태 태그입니다: {tag!r}")
+
+
+def _regions(memory_map):
+    return (memory_map.rom, memory_map.ram) + memory_map.extra_regions
+
+
+def _memories(core):
+    return [core.rom, core.ram] + [memory for _, _, memory in core.extra_memories]
+
+
+def _pack_core(core):
+    pipe = core.pipe
+    halt_reason = core.halt_reason
+    return _CORE.pack(
+        *core.regfile, *pipe.values(), *core.signals.values(),
+        core.state, core.next_state, core.aluControl, core.ramControl,
+        core.cycle_count, core.instruction_count, core.current_instruction,
+        core._instruction_completed, core.halted,
+        -1 if core._last_pc is None else core._last_pc, core._pc_stall_count,
+    ) + _pack_text(halt_reason or '') + struct.pack('<B', halt_reason is not None)
+
+
+def save_snapshot(core, path, compress=False, level=6):
+    """core의 전체 상태를 path에 저장 (compress가 True이면 zlib 압축)"""
+    parts = []
+    regions = _regions(core.memory_map)
+    parts.append(struct.pack('<II', core.memory_map.page_size, len(regions)))
+    for region in regions:
+        parts.append(_pack_text(region.name) + _REGION.pack(region.base, region.size))
+    parts.append(_pack_core(core))
+    
+    for memory in _memories(core):
+        chunks = [(offset, data) for offset, data in memory.iter_chunks() if any(data)]
+        parts.append(_COUNT.pack(len(chunks)))
+        for offset, data in chunks:
+            parts.append(_CHUNK.pack(offset, len(data)))
+            parts.append(data)
+    
+    parts.append(_COUNT.pack(len(core.devices)))
+    for base, _, device in core.devices:
+        parts.append(_DEVICE.pack(base) + _pack_text(type(device).__name__))
+        parts.append(_pack_value(device.snapshot()))
+    
+    body = b''.join(parts)
+    flags = 0
+    if compress:
+        body = zlib.compress(body, level)
+        flags |= FLAG_ZLIB
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags))
+        f.write(body)
+
+
+def _read_body(path):
+    with open(path, 'rb') as f:
+        blob = f.read()
+    if len(blob) < _HEADER.size:
+        raise ValueError(f"스냅샷 파일이 아닙니다: {path}")
+    magic, version, flags = _HEADER.unpack_from(blob)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"스냅샷 파일이 아닙니다: {path}")
+    if version not in READABLE_VERSIONS:
+        raise ValueError(f"지원하지 않는 스냅샷 버전입니다: {version}")
+    body = memoryview(blob)[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = memoryview(zlib.decompress(body))
+    return version, body
+
+
+def read_memory_map(path):
+    """스냅샷 파일에 기록된 메모리 맵"""
+    _, body = _read_body(path)
+    memory_map, _ = _unpack_memory_map(body)
+    return memory_map
+
+
+def _unpack_memory_map(body):
+    page_size, count = struct.unpack_from('<II', body)
+    offset = 8
+    regions = []
+    for _ in range(count):
+        name, offset = _unpack_text(body, offset)
+        base, size = _REGION.unpack_from(body, offset)
+        offset += _REGION.size
+        regions.append(MemoryRegion(name, base, size))
+    return MemoryMap(regions[0], regions[1], regions[2:], page_size), offset
+
+
+def load_snapshot(path, core=None, **core_options):
+    """스냅샷을 core에 복원하고 core를 반환
+
+    core가 None이면 스냅샷의 메모리 맵으로 RISCVCore(**core_options)를 새로 만든다.
+    core가 주어지면 메모리 맵(영역 이름/주소/크기)이 같아야 한다.
+    주변장치는 만들지 않으므로, 스냅샷에 장치가 있으면 같은 주소에 같은
+    클래스의 장치를 붙인 core를 넘겨야 한다. 되돌리기 히스토리는 비운다.
+    """
+    version, body = _read_body(path)
+    try:
+        memory_map, offset = _unpack_memory_map(body)
+        if core is None:
+            from riscv_core import RISCVCore
+            core = RISCVCore(memory_map=memory_map, **core_options)
+        elif ([(r.name, r.base, r.size) for r in _regions(core.memory_map)] !=
+              [(r.name, r.base, r.size) for r in _regions(memory_map)]):
+            raise ValueError("스냅샷의 메모리 맵이 코어 설정과 다릅니다")
+        
+        values = _CORE.unpack_from(body, offset)
+        offset += _CORE.size
+        halt_reason, offset = _unpack_text(body, offset)
+        has_halt_reason = body[offset]
+        offset += 1
+        
+        memories = _memories(core)
+        contents = []
+        for _ in memories:
+            (count,) = _COUNT.unpack_from(body, offset)
+            offset += _COUNT.size
+            chunks = []
+            for _ in range(count):
+                chunk_offset, length = _CHUNK.unpack_from(body, offset)
+                offset += _CHUNK.size
+                chunks.append((chunk_offset, body[offset:offset + length]))
+                offset += length
+            contents.append(chunks)
+        
+        devices = []
+        if version >= 2:
+            (count,) = _COUNT.unpack_from(body, offset)
+            offset += _COUNT.size
+            for _ in range(count):
+                (base,) = _DEVICE.unpack_from(body, offset)
+                name, offset = _unpack_text(body, offset + _DEVICE.size)
+                value, offset = _unpack_value(body, offset)
+                devices.append((base, name, value))
+    except (struct.error, IndexError) as e:
+        raise ValueError(f"스냅샷 파일이 손상되었습니다: {e}") from None
+    if ([(base, type(device).__name__) for base, _, device in core.devices] !=
+            [(base, name) for base, name, _ in devices]):
+        raise ValueError("스냅샷의 주변장치 구성이 코어와 다릅니다 (--peripherals 여부 확인)")
+    
+    # 파일을 끝까지 읽은 뒤에 코어를 바꾼다
+    for memory, chunks in zip(memories, contents):
+        memory.clear()
+        for chunk_offset, data in chunks:
+            memory.write_bytes(chunk_offset, data)
+    core.image = None
+    core.decode_cache.invalidate()
+    for (_, _, device), (_, _, value) in zip(core.devices, devices):
+        device.restore(value)
+    
+    core.regfile[:] = values[0:32]
+    core.pipe.load(values[32:42])
+    core.signals.load(values[42:50])
+    (core.state, core.next_state, core.aluControl, core.ramControl,
+     core.cycle_count, core.instruction_count, core.current_instruction,
+     completed, halted, last_pc, core._pc_stall_count) = values[50:]
+    core.current_decoded = decode(core.current_instruction)
+    core._instruction_completed = bool(completed)
+    core.halted = bool(halted)
+    core._last_pc = None if last_pc < 0 else last_pc
+    core.halt_reason = halt_reason if has_halt_reason else None
+    core.breakpoint_hit = False
+    core.watch_hit = None
+    core.history.clear()
+    core._journal = None
+    core.dirty_all = True
+    return core
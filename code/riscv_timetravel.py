@@ -0,0 +1,134 @@
+"""체크포인트 + 재실행 기반 사이클 이동 (time travel)
+
+undo_step()은 한 단계씩만 되돌아갈 수 있다. Timeline은 interval 사이클마다
+capture_state()로 전체 상태 체크포인트를 남기고, "K 사이클로 이동"은
+K 이하에서 가장 가까운 체크포인트를 복원한 뒤 사이클 모델로 다시 실행한다.
+코어는 결정적이므로 재실행 결과는 처음 실행과 같다.
+
+체크포인트는 첫 체크포인트(시작 사이클)에서 interval 간격으로 남기고,
+수가 max_checkpoints를 넘으면 간격을 두 배로 늘리고 그 간격에 맞지 않는
+체크포인트를 버린다 (스냅샷에서 시작해 시작 사이클이 0이 아니어도 같다). 따라서 천만 사이클을 실행해도
+메모리는 체크포인트 max_checkpoints개, 이동 한 번의 재실행은 현재
+간격 이하의 사이클로 제한된다.
+"""
+from bisect import bisect_right
+
+DEFAULT_INTERVAL = 10000
+DEFAULT_MAX_CHECKPOINTS = 256
+
+
+class Checkpoint:
+    """특정 사이클의 전체 상태"""
+    __slots__ = ('cycle', 'state')
+    
+    def __init__(self, cycle, state):
+        self.cycle = cycle
+        self.state = state  # RISCVCore.capture_state() 결과
+    
+    def __repr__(self):
+        return f"Checkpoint(cycle={self.cycle})"
+
+
+class Timeline:
+    """RISCVCore 실행 기록 (체크포인트 목록)
+
+    실행은 Timeline.run()으로 해야 체크포인트가 남는다. GUI처럼 코어를
+    직접 한 사이클씩 돌리는 경우에는 매 단계 뒤에 checkpoint_due()를 호출한다.
+    """
+    
+    def __init__(self, core, interval=DEFAULT_INTERVAL, max_checkpoints=DEFAULT_MAX_CHECKPOINTS):
+        if interval <= 0:
+            raise ValueError(f"체크포인트 간격은 양수여야 합니다: {interval}")
+        if max_checkpoints < 2:
+            raise ValueError(f"체크포인트는 2개 이상 유지해야 합니다: {max_checkpoints}")
+        self.core = core
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+        self.checkpoints = []  # 사이클 순 (첫 항목은 시작 상태, 버리지 않는다)
+        self.checkpoint()
+    
+    @property
+    def first_cycle(self):
+        """이동할 수 있는 가장 이른 사이클"""
+        return self.checkpoints[0].cycle
+    
+    @property
+    def last_cycle(self):
+        """마지막 체크포인트 사이클"""
+        return self.checkpoints[-1].cycle
+    
+    def checkpoint(self):
+        """현재 상태를 체크포인트로 남긴다 (마지막 체크포인트보다 뒤일 때만)"""
+        cycle = self.core.cycle_count
+        if self.checkpoints and cycle <= self.checkpoints[-1].cycle:
+            return False
+        self.checkpoints.append(Checkpoint(cycle, self.core.capture_state()))
+        if len(self.checkpoints) > self.max_checkpoints:
+            self._thin()
+        return True
+    
+    def checkpoint_due(self):
+        """간격이 찼으면 체크포인트를 남긴다 (코어를 직접 실행할 때 매 단계 뒤 호출)"""
+        if self.core.cycle_count >= self.checkpoints[-1].cycle + self.interval:
+            return self.checkpoint()
+        return False
+    
+    def _thin(self):
+        """간격을 두 배로 늘리고, 첫 체크포인트부터 직전에 남긴 것과 새 간격 이상
+        떨어진 체크포인트만 남긴다
+
+        run()이 남긴 체크포인트는 첫 체크포인트 기준 interval 간격에 있으므로
+        하나 걸러 하나씩 남고, 남는 것은 새 간격에 맞는다.
+        """
+        while len(self.checkpoints) > self.max_checkpoints:
+            self.interval *= 2
+            kept = self.checkpoints[:1]
+            for checkpoint in self.checkpoints[1:]:
+                if checkpoint.cycle - kept[-1].cycle >= self.interval:
+                    kept.append(checkpoint)
+            self.checkpoints = kept
+    
+    def run(self, max_cycles=None):
+        """최대 max_cycles 사이클 실행하며 첫 체크포인트부터 interval 간격마다 체크포인트를 남긴다
+
+        정지 조건은 RISCVCore.run()과 같다. 실제로 실행한 사이클 수를 반환한다.
+        """
+        core = self.core
+        base = self.first_cycle
+        start = core.cycle_count
+        end = None if max_cycles is None else start + max_cycles
+        while not core.halted and (end is None or core.cycle_count < end):
+            count = self.interval - (core.cycle_count - base) % self.interval
+            if end is not None:
+                count = min(count, end - core.cycle_count)
+            executed = core.run(count)
+            if (core.cycle_count - base) % self.interval == 0:
+                self.checkpoint()
+            if executed < count:
+                break
+        return core.cycle_count - start
+    
+    def goto(self, cycle):
+        """cycle 사이클 직후 상태로 이동 (도달하면 True)
+
+        가장 가까운 체크포인트를 복원하고 사이클 모델로 다시 실행한다.
+        현재 위치가 그 체크포인트와 목표 사이면 복원 없이 앞으로만 실행한다.
+        목표 전에 프로그램이 정지하면 정지한 사이클에 머물고 False를 반환한다.
+        재실행 중에는 사이클 로그 기록, 프로파일러 집계, 워치포인트 검사를 멈춘다
+        (이미 한 번 실행한 사이클이므로 다시 세거나 다시 멈추지 않는다).
+        """
+        if cycle < self.first_cycle:
+            raise ValueError(f"첫 체크포인트({self.first_cycle}) 이전으로는 이동할 수 없습니다: {cycle}")
+        core = self.core
+        index = bisect_right([cp.cycle for cp in self.checkpoints], cycle) - 1
+        checkpoint = self.checkpoints[index]
+        if not (checkpoint.cycle <= core.cycle_count <= cycle and not core.halted):
+            core.restore_state(checkpoint.state)
+        
+        suspended = core.log_file, core.profiler, core.watch
+        core.log_file = core.profiler = core.watch = None
+        try:
+            self.run(cycle - core.cycle_count)
+        finally:
+            core.log_file, core.profiler, core.watch = suspended
+        return core.cycle_count == cycle
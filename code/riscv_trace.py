@@ -0,0 +1,380 @@
+"""사이클 트레이스 기록 / 읽기 (텍스트 / 바이너리)
+
+write_log가 매 사이클 한 줄씩 쓰고 flush하던 것을 버퍼에 모아 한꺼번에 쓴다.
+
+텍스트 형식은 python_simulation_log.txt (TB_SIM.sv의 simulation_log.txt와
+같은 열 순서)이고, 바이너리 형식은 고정 길이 레코드를 미리 잡아 둔 버퍼에
+struct.pack_into로 채운다. 바이너리 트레이스는 convert_trace()
+(또는 python riscv_trace.py TRACE -o LOG)로 텍스트 형식으로 바꿀 수 있다.
+
+바이너리 파일:
+  헤더: magic 'RVTR', version, 레코드 크기
+  레코드: cycle, PC, Instruction, BusAddr, BusWData, BusRData, BusWe
+
+텍스트 로그는 TextTrace가 mmap으로 열어 필요한 줄만 파싱한다.
+INDEX_STRIDE 줄마다 (사이클, 바이트 오프셋)을 적은 희소 인덱스를
+로그 옆 __rvcache__/ 에 저장해 두므로 사이클 N으로 이동하거나 페이지를
+넘길 때 파일 크기와 상관없이 최대 INDEX_STRIDE 줄만 읽는다.
+"""
+import mmap
+import os
+import struct
+import sys
+from bisect import bisect_right
+
+from riscv_loader import CACHE_DIR_NAME
+
+TEXT_HEADER = "cycle PC Instruction BusAddr BusWData BusRData BusWe\n"
+
+# 레코드 튜플 필드 순서 (텍스트 열 순서와 같다)
+FIELD_NAMES = ('cycle', 'pc', 'instruction', 'bus_addr', 'bus_wdata', 'bus_rdata', 'bus_we')
+
+TRACE_MAGIC = b'RVTR'
+TRACE_VERSION = 1
+_HEADER = struct.Struct('<4sHH')
+# PC는 JAL 음수 오프셋 등으로 32비트를 넘을 수 있어 64비트로 둔다
+RECORD = struct.Struct('<QQIIIIB')
+
+DEFAULT_BUFFER_RECORDS = 8192
+
+# 텍스트 로그 희소 인덱스 (__rvcache__/<로그 이름>.rvidx)
+#   헤더: magic, version, stride, 로그 mtime_ns, 로그 크기, 데이터 줄 수, 항목 수
+#   항목: (사이클, 바이트 오프셋) x 항목 수, 항목 i는 데이터 줄 i*stride
+INDEX_STRIDE = 1024
+INDEX_MAGIC = b'RVLX'
+INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct('<4sHHqQQQ')
+_INDEX_ENTRY = struct.Struct('<qQ')
+
+
+def format_record(cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we):
+    """레코드 한 개 -> 텍스트 로그 한 줄"""
+    return f"{cycle} 0x{pc:08X} 0x{instruction:08X} 0x{bus_addr:08X} 0x{bus_wdata:08X} 0x{bus_rdata:08X} {bus_we}\n"
+
+
+def detect_binary(path):
+    """바이너리 트레이스 파일인지 (앞 4바이트로 판단)"""
+    with open(path, 'rb') as f:
+        return f.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+
+
+class TraceWriter:
+    """버퍼에 모았다가 buffer_records개마다 파일에 쓰는 트레이스 기록기
+
+    binary가 False이면 python_simulation_log.txt 형식 텍스트를 쓴다.
+    close()(또는 with 블록 종료) 때 남은 레코드를 모두 쓴다.
+    """
+    
+    def __init__(self, path, binary=False, buffer_records=DEFAULT_BUFFER_RECORDS):
+        self.path = path
+        self.binary = binary
+        self.buffer_records = buffer_records
+        self.records = 0  # 지금까지 기록한 레코드 수
+        if binary:
+            self._file = open(path, 'wb')
+            self._file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size))
+            self._buffer = bytearray(RECORD.size * buffer_records)
+            self._offset = 0
+            self.record = self._record_binary
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+            self._file.write(TEXT_HEADER)
+            self._lines = []
+            self.record = self._record_text
+    
+    def _record_binary(self, cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we):
+        RECORD.pack_into(self._buffer, self._offset, cycle, pc, instruction,
+                         bus_addr, bus_wdata, bus_rdata, bus_we)
+        self._offset += RECORD.size
+        self.records += 1
+        if self._offset == len(self._buffer):
+            self._file.write(self._buffer)
+            self._offset = 0
+    
+    def _record_text(self, cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we):
+        self._lines.append(format_record(cycle, pc, instruction, bus_addr, bus_wdata, bus_rdata, bus_we))
+        self.records += 1
+        if len(self._lines) >= self.buffer_records:
+            self._file.write(''.join(self._lines))
+            self._lines.clear()
+    
+    def flush(self):
+        """버퍼에 남은 레코드를 파일에 쓴다"""
+        if self._file is None:
+            return
+        if self.binary:
+            if self._offset:
+                self._file.write(memoryview(self._buffer)[:self._offset])
+                self._offset = 0
+        elif self._lines:
+            self._file.write(''.join(self._lines))
+            self._lines.clear()
+        self._file.flush()
+    
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+    
+    @property
+    def closed(self):
+        return self._file is None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_binary_trace(path, chunk_records=DEFAULT_BUFFER_RECORDS):
+    """바이너리 트레이스의 레코드 튜플을 차례로 반환 (제너레이터)"""
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"트레이스 파일이 아닙니다: {path}")
+        magic, version, record_size = _HEADER.unpack(header)
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"트레이스 파일이 아닙니다: {path}")
+        if version != TRACE_VERSION or record_size != RECORD.size:
+            raise ValueError(f"지원하지 않는 트레이스 버전입니다: {version}")
+        while True:
+            chunk = f.read(RECORD.size * chunk_records)
+            if not chunk:
+                break
+            usable = len(chunk) - len(chunk) % RECORD.size  # 기록 도중 끊긴 마지막 레코드는 버린다
+            yield from RECORD.iter_unpack(memoryview(chunk)[:usable])
+            if usable < len(chunk):
+                break
+
+
+def convert_trace(binary_path, text_path):
+    """바이너리 트레이스 -> python_simulation_log.txt 형식 텍스트, 변환한 레코드 수 반환"""
+    count = 0
+    with open(text_path, 'w', encoding='utf-8') as out:
+        out.write(TEXT_HEADER)
+        lines = []
+        for record in read_binary_trace(binary_path):
+            lines.append(format_record(*record))
+            if len(lines) >= DEFAULT_BUFFER_RECORDS:
+                out.write(''.join(lines))
+                count += len(lines)
+                lines.clear()
+        out.write(''.join(lines))
+        count += len(lines)
+    return count
+
+
+def iter_trace(path):
+    """텍스트/바이너리 트레이스 레코드를 처음부터 차례로 반환 (형식은 파일 앞부분으로 판단)
+
+    파일을 한 번 순서대로 읽기만 하므로 인덱스를 만들지 않고 메모리도 일정하다.
+    """
+    if detect_binary(path):
+        yield from read_binary_trace(path)
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            record = parse_line(line)
+            if record is not None:
+                yield record
+
+
+def parse_line(line):
+    """텍스트 로그 한 줄 -> 레코드 튜플 (헤더나 X/Z가 섞인 줄이면 None)"""
+    parts = line.split()
+    if len(parts) < 7:
+        return None
+    try:
+        return (int(parts[0]), int(parts[1], 16), int(parts[2], 16), int(parts[3], 16),
+                int(parts[4], 16), int(parts[5], 16), int(parts[6], 2))
+    except ValueError:
+        return None
+
+
+def _line_cycle(line):
+    """텍스트 로그 한 줄의 사이클 번호 (첫 열만 본다, 숫자가 아니면 None)"""
+    head = line.split(None, 1)
+    if head and head[0].isdigit():
+        return int(head[0])
+    return None
+
+
+def index_path(path):
+    """텍스트 로그의 인덱스 파일 경로"""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR_NAME, name + '.rvidx')
+
+
+class TextTrace:
+    """mmap으로 연 텍스트 로그 (python_simulation_log.txt / simulation_log.txt)
+
+    레코드는 필요할 때 한 줄씩 파싱하므로 메모리 사용량은 파일 크기와
+    무관하다. 줄 번호는 헤더 줄을 뺀 데이터 줄 기준이다.
+    """
+    
+    def __init__(self, path, stride=INDEX_STRIDE, save_index=True):
+        self.path = path
+        self.stride = stride
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self._mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+        self._data_start = 0
+        if self._mapping is not None and parse_line(self._mapping.readline()) is None:
+            # 첫 줄이 헤더(cycle PC ...)이면 건너뛴다
+            self._data_start = self._mapping.tell()
+        if not self._load_index(st):
+            self._build_index()
+            if save_index:
+                self._save_index(st)
+    
+    def _load_index(self, st):
+        try:
+            with open(index_path(self.path), 'rb') as f:
+                blob = f.read()
+        except OSError:
+            return False
+        if len(blob) < _INDEX_HEADER.size:
+            return False
+        magic, version, stride, mtime_ns, size, lines, count = _INDEX_HEADER.unpack_from(blob)
+        if (magic != INDEX_MAGIC or version != INDEX_VERSION or stride != self.stride
+                or (mtime_ns, size) != (st.st_mtime_ns, st.st_size)
+                or len(blob) != _INDEX_HEADER.size + count * _INDEX_ENTRY.size):
+            return False
+        entries = list(_INDEX_ENTRY.iter_unpack(memoryview(blob)[_INDEX_HEADER.size:]))
+        self.lines = lines
+        self._cycles = [cycle for cycle, _ in entries]
+        self._offsets = [offset for _, offset in entries]
+        return True
+    
+    def _build_index(self):
+        """파일을 한 번 훑어 stride 줄마다 (사이클, 오프셋) 기록"""
+        cycles, offsets = [], []
+        lines = 0
+        mapping = self._mapping
+        if mapping is not None:
+            mapping.seek(self._data_start)
+            readline, tell, stride = mapping.readline, mapping.tell, self.stride
+            last_cycle = -1
+            while True:
+                offset = tell()
+                line = readline()
+                if not line:
+                    break
+                if lines % stride == 0:
+                    cycle = _line_cycle(line)
+                    if cycle is not None:
+                        last_cycle = cycle
+                    cycles.append(last_cycle)  # 파싱할 수 없는 줄은 앞 항목 사이클을 쓴다
+                    offsets.append(offset)
+                lines += 1
+        self.lines = lines
+        self._cycles = cycles
+        self._offsets = offsets
+    
+    def _save_index(self, st):
+        """인덱스 파일 기록 (임시 파일 후 교체, 쓸 수 없으면 조용히 건너뛴다)"""
+        target = index_path(self.path)
+        temp = f"{target}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(temp, 'wb') as f:
+                f.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, self.stride, st.st_mtime_ns,
+                                           st.st_size, self.lines, len(self._offsets)))
+                f.write(b''.join(_INDEX_ENTRY.pack(cycle, offset)
+                                 for cycle, offset in zip(self._cycles, self._offsets)))
+            os.replace(temp, target)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+    
+    def __len__(self):
+        """데이터 줄 수"""
+        return self.lines
+    
+    def _lines_from(self, line):
+        """데이터 줄 line부터 원시 줄을 차례로 반환"""
+        if self._mapping is None or not 0 <= line < self.lines:
+            return
+        mapping = self._mapping
+        mapping.seek(self._offsets[line // self.stride])
+        readline = mapping.readline
+        for _ in range(line % self.stride):
+            readline()
+        while True:
+            raw = readline()
+            if not raw:
+                return
+            yield raw
+    
+    def records(self, start_line=0):
+        """start_line부터 레코드 튜플을 차례로 반환 (파싱할 수 없는 줄은 건너뛴다)"""
+        for raw in self._lines_from(start_line):
+            record = parse_line(raw)
+            if record is not None:
+                yield record
+    
+    def __iter__(self):
+        return self.records()
+    
+    def page(self, start_line, count):
+        """데이터 줄 start_line부터 count줄의 레코드 리스트 (파싱할 수 없는 줄은 빠진다)"""
+        result = []
+        for index, raw in enumerate(self._lines_from(start_line)):
+            if index >= count:
+                break
+            record = parse_line(raw)
+            if record is not None:
+                result.append(record)
+        return result
+    
+    def find_cycle(self, cycle):
+        """사이클 번호가 cycle 이상인 첫 데이터 줄 번호 (없으면 len(self))"""
+        if not self._cycles:
+            return 0
+        entry = max(bisect_right(self._cycles, cycle) - 1, 0)
+        line = entry * self.stride
+        # 다음 인덱스 항목 전까지만 읽는다 (사이클이 줄 순서대로 증가한다고 가정)
+        for raw in self._lines_from(line):
+            line_cycle = _line_cycle(raw)
+            if line_cycle is not None and line_cycle >= cycle:
+                return line
+            line += 1
+            if line >= (entry + 1) * self.stride and entry + 1 < len(self._cycles):
+                return line
+        return self.lines
+    
+    def close(self):
+        mapping, self._mapping = self._mapping, None
+        if mapping is not None:
+            mapping.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    """python riscv_trace.py TRACE [-o python_simulation_log.txt]"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="바이너리 트레이스를 텍스트 로그로 변환")
+    parser.add_argument("trace", help="바이너리 트레이스 파일")
+    parser.add_argument("-o", "--output", default="python_simulation_log.txt", help="텍스트 로그 파일")
+    args = parser.parse_args(argv)
+    
+    try:
+        count = convert_trace(args.trace, args.output)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    print(f"{count}개 레코드 -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
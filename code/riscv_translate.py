@@ -0,0 +1,306 @@
+"""기본 블록 번역 (ROM 명령어 구간 -> Python 함수 하나)
+
+ROM에서 B-type / JAL / JALR까지의 직선 구간을 찾아 compile()/exec로
+함수 하나로 만든다. 블록 안에서는 step_instruction()이 명령어마다 하던
+디코딩 레코드 조회, 핸들러 호출, 파이프라인 레지스터 갱신을 하지 않고
+상수로 펼친 코드를 실행한 뒤 블록 끝에서 파이프라인 레지스터를 한 번에
+기록한다. 사이클 수는 명령어 종류별 상태 수의 합을 블록 단위로 더한다.
+
+블록은 시작 PC로 캐시하고, ROM을 바꾸는 경로(load_*, reset, 스냅샷 적재)는
+모두 decode_cache.invalidate()를 부르므로 그 세대가 바뀌면 비운다.
+이 모델은 분기를 하지 않으므로(PC+4) 한 번 적재한 ROM의 블록은 한 번씩만
+실행되고, 블록 하나를 compile()/exec하는 비용은 그 블록을 한 번 실행하는
+비용보다 훨씬 크다. 그래서 시작 PC가 TRANSLATE_THRESHOLD번 디스패치되기
+전까지는 step_instruction()으로 실행하고, 그 뒤에만 번역한다. 디스패치
+횟수는 ROM을 다시 적재해도 유지하므로, 같은 코어에서 이미지를 여러 번
+실행할 때(reset 후 다시 적재) 자주 실행된 블록부터 번역된다. 한 번만
+실행하는 경우에는 번역되는 블록이 없고, 디스패치 횟수를 세는 만큼 명령어
+단위 실행보다 조금 느리다.
+
+컴파일한 함수는 (시작 PC, 명령어 워드들)을 키로 프로세스 전체에서 공유해,
+같은 이미지를 다른 코어에서 실행할 때 다시 컴파일하지 않는다.
+"""
+from riscv_core import LAST_STATE_SIGNALS, ALU_OPERATIONS
+from riscv_decode import decode
+from riscv_defines import (
+    FETCH, R_EXE, I_EXE, B_EXE, LU_EXE, AU_EXE, J_EXE, JL_EXE, S_EXE, L_EXE,
+    ADD, SUB, SLL, SRL, SLTU, XOR, OR, AND,
+)
+
+MAX_BLOCK_INSTRUCTIONS = 64  # 블록 하나의 최대 명령어 수
+MAX_COMPILED_BLOCKS = 4096   # 프로세스 전체 컴파일 캐시 크기 (넘치면 오래된 것부터 버린다)
+TRANSLATE_THRESHOLD = 16     # 시작 PC가 이만큼 디스패치된 뒤에 번역한다
+
+BLOCK_END_STATES = (B_EXE, J_EXE, JL_EXE)
+
+# 인라인으로 펼치는 ALU 연산 (ALU_OPERATIONS와 같은 식, 나머지는 표의 함수를 호출)
+_ALU_EXPRESSIONS = {
+    ADD: "({a} + {b}) & 0xFFFFFFFF",
+    SUB: "({a} - {b}) & 0xFFFFFFFF",
+    SLL: "({a} << ({b} & 0x1F)) & 0xFFFFFFFF",
+    SRL: "({a} >> ({b} & 0x1F)) & 0xFFFFFFFF",
+    SLTU: "1 if {a} < {b} else 0",
+    XOR: "{a} ^ {b}",
+    OR: "{a} | {b}",
+    AND: "{a} & {b}",
+}
+
+_STORE_METHODS = {0: 'write_word', 1: 'write_byte', 2: 'write_half'}  # ramControl -> 메서드
+
+_compiled = {}  # (시작 PC, 워드 튜플) -> 블록 함수
+
+
+class TranslatedBlock:
+    """번역된 기본 블록 (run(core)이 블록 전체를 실행한다)"""
+    __slots__ = ('start', 'end', 'count', 'cycles', 'run')
+    
+    def __init__(self, start, count, cycles, run):
+        self.start = start
+        self.end = start + 4 * count  # 블록 다음 명령어 주소
+        self.count = count            # 명령어 수
+        self.cycles = cycles          # 사이클 모델 기준 사이클 수
+        self.run = run
+
+
+def _alu(operation, a, b):
+    template = _ALU_EXPRESSIONS.get(operation)
+    if template is None:
+        return f"ALU[{operation}]({a}, {b})"
+    return template.format(a=a, b=b)
+
+
+def generate_source(start, entries, name):
+    """디코딩 레코드 목록으로 블록 함수 소스 생성 (step_instruction()과 같은 결과)"""
+    lines = [
+        f"def {name}(core):",
+        "    x = core.regfile",
+        "    pipe = core.pipe",
+        "    ram = core.ram",
+        "    RB = core.ram_base",
+        "    RS = core.ram_size",
+        "    RW = ram.read_word",
+        "    DM = core.data_memory",
+        "    C0 = core.cycle_count",
+        "    if core._last_pc is None:",
+        f"        core._last_pc = {start}",
+        "    a = pipe.ExeReg_aluResult",
+        "    r = pipe.MemAccReg_busRData",
+    ]
+    emit = lines.append
+    last_exe = max((i for i, d in enumerate(entries) if d.exe_state != FETCH), default=None)
+    stores = [i for i, d in enumerate(entries) if d.exe_state == S_EXE]
+    cycles = 0
+    for i, d in enumerate(entries):
+        pc = start + 4 * i
+        state = d.exe_state
+        emit(f"    # 0x{pc:08X}: 0x{d.word:08X}")
+        emit(f"    d1 = x[{d.rs1}]")
+        emit(f"    d2 = x[{d.rs2}]")
+        
+        # 버스 읽기: 새 ExeReg 주소(RF1+RF2)가 매핑되어 있으면 그 값, 아니면 이전 주소의 값
+        # (장치 읽기에는 부수 효과가 없으므로 순서를 바꿔도 같다)
+        if state != FETCH:
+            emit("    pa = a")
+            emit("    a = (d1 + d2) & 0xFFFFFFFF")
+        emit("    o = a - RB")
+        emit("    if 0 <= o < RS:")
+        emit("        r = RW(o)")
+        emit("    else:")
+        emit(f"        core.cycle_count = C0 + {cycles}")
+        emit("        m, o = DM(a)")
+        emit("        if m is not None:")
+        emit("            r = m.read_word(o)")
+        if state != FETCH:
+            emit("        else:")
+            emit("            m, o = DM(pa)")
+            emit("            if m is not None:")
+            emit("                r = m.read_word(o)")
+        
+        # 실행 (명령어 종류별 핸들러와 같은 동작)
+        value = None
+        if state == R_EXE:
+            value = _alu(d.operator, "d1", "d2")
+        elif state == I_EXE:
+            value = _alu(d.alu_control, "d1", str(d.imm))
+        elif state == LU_EXE:
+            value = str(d.imm)
+        elif state == AU_EXE:
+            value = str(d.imm + pc + 4)
+        elif state in (J_EXE, JL_EXE):
+            value = str(pc + 8)
+        elif state == L_EXE:
+            value = "r"
+        elif state == S_EXE:
+            method = _STORE_METHODS[d.store_ram_control]
+            emit("    o = a - RB")
+            emit("    if 0 <= o < RS:")
+            emit(f"        ram.{method}(o, d2)")
+            emit("    else:")
+            emit(f"        core.cycle_count = C0 + {cycles}")
+            emit("        m, o = DM(a)")
+            emit("        if m is not None:")
+            emit(f"            m.{method}(o, d2)")
+            if i == stores[-1]:
+                emit("    w = d2")
+        if value is not None and d.rd != 0:
+            emit(f"    x[{d.rd}] = {value}")
+        if i == last_exe and i != len(entries) - 1:
+            emit("    e2 = d2")
+        cycles += d.cycles
+    
+    # 블록 끝: 마지막 명령어 기준으로 파이프라인 레지스터/제어 신호 기록
+    last = entries[-1]
+    last_pc = start + 4 * (len(entries) - 1)
+    if last.exe_state in (R_EXE, B_EXE):
+        alu_control = last.operator
+    elif last.exe_state == I_EXE:
+        alu_control = last.alu_control
+    else:
+        alu_control = 0
+    emit("    core.cycle_count = C0 + %d" % cycles)
+    emit(f"    core.instruction_count += {sum(1 for d in entries if d.exe_state != FETCH)}")
+    emit(f"    pipe.PCOutData = {last_pc + 4}")
+    emit("    pipe.DecReg_RFData1 = d1")
+    emit("    pipe.DecReg_RFData2 = d2")
+    emit(f"    pipe.DecReg_immExt = {last.imm}")
+    if last_exe is not None:
+        emit("    pipe.ExeReg_aluResult = a")
+        emit(f"    pipe.ExeReg_RFData2 = {'d2' if last_exe == len(entries) - 1 else 'e2'}")
+        emit(f"    pipe.ExeReg_PCSrcMuxOut = {start + 4 * last_exe + 8}")
+    emit("    pipe.MemAccReg_busAddr = a")
+    emit("    pipe.MemAccReg_busRData = r")
+    if stores:
+        emit("    pipe.MemAccReg_busWData = w")
+    emit(f"    core.current_instruction = {last.word}")
+    emit("    core.current_decoded = LAST")
+    emit(f"    core.aluControl = {alu_control}")
+    emit(f"    core.ramControl = {last.store_ram_control if last.exe_state == S_EXE else 0}")
+    emit(f"    core.signals.load({LAST_STATE_SIGNALS[last.exe_state]!r})")
+    emit(f"    core.state = core.next_state = {FETCH}")
+    return "\n".join(lines) + "\n", cycles
+
+
+def compile_block(start, words):
+    """명령어 워드들을 블록 함수로 컴파일 (같은 키면 캐시된 것을 돌려준다)"""
+    key = (start, words)
+    block = _compiled.get(key)
+    if block is not None:
+        return block
+    entries = [decode(word) for word in words]
+    name = f"block_{start:08X}"
+    source, cycles = generate_source(start, entries, name)
+    namespace = {'ALU': ALU_OPERATIONS, 'LAST': entries[-1]}
+    exec(compile(source, f"<rv-block 0x{start:08X}>", 'exec'), namespace)
+    block = TranslatedBlock(start, len(words), cycles, namespace[name])
+    if len(_compiled) >= MAX_COMPILED_BLOCKS:
+        del _compiled[next(iter(_compiled))]
+    _compiled[key] = block
+    return block
+
+
+class BlockTranslator:
+    """코어 하나의 PC -> 번역 블록 캐시와 블록 단위 실행 루프
+
+    블록은 사이클 로그 기록, 프로파일러, 되돌리기 히스토리, 화면 변경 추적이 모두 꺼져
+    있을 때만 쓰고, 그렇지 않거나 시작 PC가 아직 TRANSLATE_THRESHOLD번 디스패치되지
+    않았거나 블록이 최대 사이클 수 / 명령어 수 / 브레이크포인트에 걸리면 그 자리에서
+    step_instruction()으로 실행한다.
+    """
+    
+    def __init__(self, core):
+        self.core = core
+        self.blocks = {}
+        self.hits = {}   # 시작 PC -> 번역 전 디스패치 횟수 (ROM을 다시 적재해도 유지)
+        self.split = {}  # 시작 PC -> 블록 안(시작 PC 제외)에 브레이크포인트가 있는지
+        self._breakpoints = frozenset()
+        self._decode_cache = None
+        self._generation = None
+    
+    def _check_rom(self):
+        """ROM이 다시 적재되었으면 블록 캐시를 비운다"""
+        decode_cache = self.core.decode_cache
+        if decode_cache is not self._decode_cache or decode_cache.generation != self._generation:
+            self.blocks.clear()
+            self.split.clear()
+            self._decode_cache = decode_cache
+            self._generation = decode_cache.generation
+    
+    def lookup(self, pc):
+        """pc에서 시작하는 블록 (처음이면 ROM에서 찾아 번역)"""
+        block = self.blocks.get(pc)
+        if block is None:
+            core = self.core
+            lookup = core.decode_cache.lookup
+            words = []
+            addr = pc
+            while addr <= core.rom_last and len(words) < MAX_BLOCK_INSTRUCTIONS:
+                decoded = lookup(addr)
+                words.append(decoded.word)
+                addr += 4
+                if decoded.exe_state in BLOCK_END_STATES:
+                    break
+            block = self.blocks[pc] = compile_block(pc, tuple(words))
+        return block
+    
+    def _check_breakpoints(self, breakpoints):
+        """브레이크포인트 집합이 바뀌었으면 블록별 판정을 비운다 (run() 호출마다 한 번)"""
+        breakpoints = frozenset(breakpoints) if breakpoints else frozenset()
+        if breakpoints != self._breakpoints:
+            self._breakpoints = breakpoints
+            self.split.clear()
+    
+    def _has_breakpoint(self, pc, block):
+        inside = self.split.get(pc)
+        if inside is None:
+            breakpoints = self._breakpoints
+            inside = self.split[pc] = any(addr in breakpoints for addr in range(pc + 4, block.end, 4))
+        return inside
+    
+    def run(self, max_instructions=None, until_breakpoint=False):
+        """RISCVCore.run_instructions()와 같은 의미로 실행하고 실행한 사이클 수를 반환"""
+        core = self.core
+        self._check_rom()
+        step_instruction = core.step_instruction
+        start = core.cycle_count
+        breakpoints = core.breakpoints if until_breakpoint else None
+        self._check_breakpoints(breakpoints)
+        # 실행 중에 바뀌지 않는 조건은 한 번만 본다
+        translate = (core.log_file is None and core.profiler is None
+                     and not core.keep_history and core.dirty_registers is None)
+        blocks = self.blocks
+        hits = self.hits
+        rom_base = core.rom_base
+        rom_last = core.rom_last
+        
+        # 직전 실행이 브레이크포인트에서 멈췄다면 그 자리는 한 번 건너뛴다
+        resume = core.breakpoint_hit
+        core.breakpoint_hit = False
+        
+        executed = 0
+        while max_instructions is None or executed < max_instructions:
+            pc = core.pipe.PCOutData
+            if breakpoints and core.state == FETCH and pc in breakpoints:
+                if not resume:
+                    core.breakpoint_hit = True
+                    break
+            resume = False
+            
+            if translate and core.state == FETCH and not core.halted and rom_base <= pc <= rom_last:
+                block = blocks.get(pc)
+                if block is None:
+                    count = hits[pc] = hits.get(pc, 0) + 1
+                    if count >= TRANSLATE_THRESHOLD:
+                        block = self.lookup(pc)
+                if (block is not None
+                        and (max_instructions is None or executed + block.count <= max_instructions)
+                        and (core.max_cycles is None
+                             or core.cycle_count + block.cycles <= core.max_cycles)
+                        and not (breakpoints and self._has_breakpoint(pc, block))):
+                    block.run(core)
+                    executed += block.count
+                    continue
+            
+            if not step_instruction():
+                break
+            executed += 1
+        return core.cycle_count - start
@@ -0,0 +1,309 @@
+"""브레이크포인트 / 워치포인트 / 조건 정지: python riscv_watch.py [code.mem] --watch w:0x3C ...
+
+RISCVCore.watch에 WatchEngine을 붙이면 코어는 해당 경로에서만 엔진을 부른다.
+    PC 브레이크포인트   core.breakpoints 집합 (FETCH 직전, 조건식이 있으면 그때만 평가)
+    쓰기 워치포인트     Store의 busWe 경로에서만 (워드 인덱스 dict 조회)
+    읽기 워치포인트     Load의 L_MEM 경로에서만 (이 모델은 매 사이클 버스를 읽지만
+                        실제 로드 명령어의 읽기만 센다)
+    레지스터 워치       레지스터 쓰기 경로에서 32칸 표 조회 (값이 바뀐 경우만)
+    조건 정지           명령어 경계마다 Python 식 평가, 거짓에서 참이 될 때 정지
+                        (add_condition()으로 넣은 것이 있을 때만)
+조회는 워치포인트 수와 무관하게 한 번이므로 워치포인트를 많이 걸어도 자유 실행
+속도는 같다. 정지는 run(until_breakpoint=True) / run_instructions(until_breakpoint=True)
+에서만 하며 맞은 항목은 core.watch_hit(WatchHit)에 남는다.
+
+조건식은 eval로 평가하고 이름 공간에는 x(레지스터 리스트), 레지스터 ABI 이름,
+pc, cycle, mem(addr)(워드 읽기), core가 있다. 워치포인트 조건에는 addr, value(새 값),
+old(레지스터 워치의 이전 값)도 들어간다.
+"""
+import sys
+
+from riscv_defines import REG_NAMES
+
+# ramControl -> 접근 바이트 수 (Store: sw/sb/sh, Load: lw/lb/lh/lbu/lhu)
+STORE_WIDTH = {0: 4, 1: 1, 2: 2}
+LOAD_WIDTH = {0: 4, 1: 1, 2: 2, 5: 1, 6: 2}
+
+REGISTER_INDEX = {name: index for index, name in enumerate(REG_NAMES)}
+REGISTER_INDEX.update({f"x{index}": index for index in range(32)})
+REGISTER_INDEX['fp'] = 8  # s0 별칭
+
+
+class Watchpoint:
+    """워치포인트 한 개 (kind: 'read' / 'write' / 'register')"""
+    __slots__ = ('kind', 'address', 'size', 'condition', 'source', 'hits')
+    
+    def __init__(self, kind, address, size=4, condition=None):
+        self.kind = kind
+        self.address = address  # 메모리 워치는 버스 주소, 레지스터 워치는 레지스터 번호
+        self.size = size
+        self.source = condition
+        self.condition = None if condition is None else compile(condition, '<watch>', 'eval')
+        self.hits = 0
+    
+    def __repr__(self):
+        if self.kind == 'register':
+            target = REG_NAMES[self.address]
+        else:
+            target = f"0x{self.address:08X}+{self.size}"
+        return f"Watchpoint({self.kind} {target}{' if ' + self.source if self.source else ''})"
+
+
+class WatchHit:
+    """정지 원인 한 건"""
+    __slots__ = ('kind', 'pc', 'cycle', 'address', 'value', 'old', 'watchpoint')
+    
+    def __init__(self, kind, pc, cycle, address=None, value=None, old=None, watchpoint=None):
+        self.kind = kind        # 'breakpoint' / 'read' / 'write' / 'register' / 'condition'
+        self.pc = pc            # 명령어 주소
+        self.cycle = cycle
+        self.address = address  # 버스 주소 또는 레지스터 번호 (조건 정지는 조건식)
+        self.value = value
+        self.old = old
+        self.watchpoint = watchpoint
+    
+    def describe(self):
+        """상태 표시줄용 설명"""
+        where = f"PC 0x{self.pc:08X}, 사이클 {self.cycle}"
+        if self.kind == 'breakpoint':
+            return f"조건 브레이크포인트 ({where})"
+        if self.kind == 'condition':
+            return f"조건 정지: {self.address} ({where})"
+        if self.kind == 'register':
+            return (f"레지스터 워치 {REG_NAMES[self.address]}: 0x{self.old:08X} -> "
+                    f"0x{self.value:08X} ({where})")
+        action = '쓰기' if self.kind == 'write' else '읽기'
+        value = '' if self.value is None else f" = 0x{self.value:08X}"
+        return f"{action} 워치 0x{self.address:08X}{value} ({where})"
+
+
+class WatchEngine:
+    """코어 하나의 워치포인트 / 조건부 브레이크포인트 / 조건 정지 표"""
+    
+    def __init__(self, core):
+        self.core = core
+        self.read_words = {}        # 워드 인덱스(addr >> 2) -> [Watchpoint]
+        self.write_words = {}
+        self.registers = [None] * 32  # 레지스터 번호 -> [Watchpoint] 또는 None
+        self.breakpoint_conditions = {}  # PC -> (조건식 원문, 코드)
+        self.conditions = []        # [[조건식 원문, 코드, 직전 값]] 명령어 경계마다 평가
+    
+    # --- 등록 -----------------------------------------------------------------
+    
+    def add_breakpoint(self, pc, condition=None):
+        """PC 브레이크포인트 (condition이 있으면 참일 때만 멈춘다)"""
+        self.core.breakpoints.add(pc)
+        if condition is not None:
+            self.breakpoint_conditions[pc] = (condition, compile(condition, '<breakpoint>', 'eval'))
+        else:
+            self.breakpoint_conditions.pop(pc, None)
+    
+    def remove_breakpoint(self, pc):
+        self.core.breakpoints.discard(pc)
+        self.breakpoint_conditions.pop(pc, None)
+    
+    def add_watchpoint(self, kind, address, size=4, condition=None):
+        """'read' / 'write' / 'access'(둘 다) 메모리 워치포인트 [address, address + size)"""
+        if kind not in ('read', 'write', 'access'):
+            raise ValueError(f"알 수 없는 워치포인트 종류: {kind}")
+        if size <= 0:
+            raise ValueError("워치포인트 크기는 양수여야 합니다")
+        added = []
+        for table_kind, table in (('read', self.read_words), ('write', self.write_words)):
+            if kind in (table_kind, 'access'):
+                watchpoint = Watchpoint(table_kind, address, size, condition)
+                for index in range(address >> 2, ((address + size - 1) >> 2) + 1):
+                    table.setdefault(index, []).append(watchpoint)
+                added.append(watchpoint)
+        return added
+    
+    def add_register_watch(self, register, condition=None):
+        """레지스터 값이 바뀌면 정지 (register는 번호 또는 'a0' / 'x10' 같은 이름)"""
+        index = REGISTER_INDEX[register] if isinstance(register, str) else register
+        if not 0 < index < 32:
+            raise ValueError(f"워치할 수 없는 레지스터: {register}")
+        watchpoint = Watchpoint('register', index, condition=condition)
+        if self.registers[index] is None:
+            self.registers[index] = []
+        self.registers[index].append(watchpoint)
+        return watchpoint
+    
+    def add_condition(self, expression):
+        """명령어 경계마다 평가해 거짓에서 참으로 바뀌면 정지하는 조건식"""
+        self.conditions.append([expression, compile(expression, '<condition>', 'eval'), False])
+    
+    def clear(self):
+        """워치포인트 / 조건 모두 제거 (PC 브레이크포인트 집합은 그대로)"""
+        self.read_words.clear()
+        self.write_words.clear()
+        self.registers = [None] * 32
+        self.breakpoint_conditions.clear()
+        self.conditions.clear()
+    
+    @property
+    def watchpoints(self):
+        """등록된 워치포인트 목록 (중복 없이)"""
+        seen = {}
+        for table in (self.read_words, self.write_words):
+            for watchpoints in table.values():
+                for watchpoint in watchpoints:
+                    seen[id(watchpoint)] = watchpoint
+        for watchpoints in self.registers:
+            for watchpoint in watchpoints or ():
+                seen[id(watchpoint)] = watchpoint
+        return list(seen.values())
+    
+    # --- 평가 -----------------------------------------------------------------
+    
+    def namespace(self, pc, **extra):
+        """조건식 이름 공간 (pc는 평가 시점의 명령어 주소)"""
+        core = self.core
+        regfile = core.regfile
+        
+        def mem(addr):
+            memory, offset = core.data_memory(addr & 0xFFFFFFFF)
+            return memory.read_word(offset) if memory is not None else 0
+        
+        names = dict(zip(REG_NAMES, regfile))
+        names.update(x=regfile, pc=pc, cycle=core.cycle_count, mem=mem, core=core)
+        names.update(extra)
+        return names
+    
+    def _evaluate(self, code, pc, **extra):
+        return bool(eval(code, {}, self.namespace(pc, **extra)))
+    
+    def _hit(self, hit):
+        if self.core.watch_hit is None:
+            self.core.watch_hit = hit
+    
+    def _check_memory(self, table, kind, addr, width, value):
+        first = addr >> 2
+        last = (addr + width - 1) >> 2
+        watchpoints = table.get(first)
+        if first != last:
+            watchpoints = (watchpoints or []) + table.get(last, [])
+        if not watchpoints:
+            return
+        pc = self.core.pipe.PCOutData - 4  # 실행 중인 명령어 (PC는 FETCH에서 이미 +4)
+        for watchpoint in watchpoints:
+            if not (watchpoint.address < addr + width and addr < watchpoint.address + watchpoint.size):
+                continue
+            if watchpoint.condition is not None and not self._evaluate(
+                    watchpoint.condition, pc, addr=addr, value=value):
+                continue
+            watchpoint.hits += 1
+            self._hit(WatchHit(kind, pc, self.core.cycle_count, addr, value, watchpoint=watchpoint))
+            return
+    
+    def check_write(self, addr, ram_control, value):
+        """Store 경로 (busWe)에서 호출"""
+        if self.write_words:
+            width = STORE_WIDTH.get(ram_control, 4)
+            self._check_memory(self.write_words, 'write', addr, width,
+                               value & (0xFFFFFFFF >> (32 - 8 * width)))
+    
+    def check_read(self, addr, ram_control):
+        """Load의 L_MEM 경로에서 호출 (읽은 값은 정지 뒤 MemAccReg_busRData로 볼 수 있다)"""
+        if self.read_words:
+            self._check_memory(self.read_words, 'read', addr, LOAD_WIDTH.get(ram_control, 4), None)
+    
+    def check_register(self, rd, old, value):
+        """레지스터 쓰기 경로에서 호출 (registers[rd]가 있을 때만)"""
+        if old == value:
+            return
+        pc = self.core.pipe.PCOutData - 4
+        for watchpoint in self.registers[rd]:
+            if watchpoint.condition is not None and not self._evaluate(
+                    watchpoint.condition, pc, value=value, old=old):
+                continue
+            watchpoint.hits += 1
+            self._hit(WatchHit('register', pc, self.core.cycle_count, rd, value, old, watchpoint))
+            return
+    
+    def breakpoint_condition(self, pc):
+        """PC 브레이크포인트에서 멈출지 (조건식이 없으면 항상)"""
+        entry = self.breakpoint_conditions.get(pc)
+        if entry is None:
+            return True
+        if not self._evaluate(entry[1], pc):
+            return False
+        self._hit(WatchHit('breakpoint', pc, self.core.cycle_count, entry[0]))
+        return True
+    
+    def check_conditions(self):
+        """명령어 경계에서 조건식 평가 (거짓에서 참이 된 것이 있으면 True)"""
+        pc = self.core.pipe.PCOutData
+        stopped = False
+        for entry in self.conditions:
+            value = self._evaluate(entry[1], pc)
+            if value and not entry[2] and not stopped:
+                self._hit(WatchHit('condition', pc, self.core.cycle_count, entry[0]))
+                stopped = True
+            entry[2] = value
+        return stopped
+
+
+def _parse_watch(spec):
+    """'w:0x3C[:4][:조건]' -> (종류, 주소, 크기, 조건)"""
+    kinds = {'r': 'read', 'w': 'write', 'rw': 'access', 'read': 'read', 'write': 'write', 'access': 'access'}
+    parts = spec.split(':', 3)
+    if len(parts) < 2 or parts[0] not in kinds:
+        raise ValueError(f"잘못된 워치포인트 '{spec}' (r|w|rw:주소[:크기][:조건])")
+    size = int(parts[2], 0) if len(parts) > 2 and parts[2] else 4
+    return kinds[parts[0]], int(parts[1], 0), size, parts[3] if len(parts) > 3 else None
+
+
+def main(argv=None):
+    import argparse
+    from riscv_core import RISCVCore
+    
+    parser = argparse.ArgumentParser(description="브레이크포인트 / 워치포인트로 멈추며 실행 (정지할 때마다 출력)")
+    parser.add_argument("program", nargs="?", default="code.mem", help="프로그램 이미지 (.mem / flat binary / ELF)")
+    parser.add_argument("--max-cycles", type=int, default=100000, help="최대 사이클 수")
+    parser.add_argument("--break", dest="breaks", action="append", default=[], metavar="PC[:조건]",
+                        help="PC 브레이크포인트 (예: 0x40, 0x40:a0 == 3)")
+    parser.add_argument("--watch", action="append", default=[], metavar="r|w|rw:주소[:크기][:조건]",
+                        help="메모리 워치포인트 (예: w:0x3C, rw:0x100:16)")
+    parser.add_argument("--watch-reg", action="append", default=[], metavar="이름[:조건]",
+                        help="레지스터 워치 (예: a0, sp:value < 0x80)")
+    parser.add_argument("--stop-if", action="append", default=[], metavar="식",
+                        help="명령어 경계마다 평가하는 정지 조건 (예: mem(0x3C) == 5)")
+    parser.add_argument("--instructions", action="store_true", help="명령어 단위로 실행 (step_instruction)")
+    parser.add_argument("--max-stops", type=int, default=100, help="이 횟수만큼 멈추면 끝낸다")
+    args = parser.parse_args(argv)
+    
+    core = RISCVCore(max_cycles=args.max_cycles)
+    core.load_image(args.program)
+    engine = core.start_watch()
+    try:
+        for spec in args.breaks:
+            pc, _, condition = spec.partition(':')
+            engine.add_breakpoint(int(pc, 0), condition or None)
+        for spec in args.watch:
+            kind, address, size, condition = _parse_watch(spec)
+            engine.add_watchpoint(kind, address, size, condition)
+        for spec in args.watch_reg:
+            name, _, condition = spec.partition(':')
+            engine.add_register_watch(name, condition or None)
+        for expression in args.stop_if:
+            engine.add_condition(expression)
+    except (ValueError, KeyError, SyntaxError) as e:
+        parser.error(str(e))
+    
+    run = core.run_instructions if args.instructions else core.run
+    stops = 0
+    while not core.halted and stops < args.max_stops:
+        run(until_breakpoint=True)
+        if core.watch_hit is not None:
+            print(core.watch_hit.describe())
+        elif core.breakpoint_hit:
+            print(f"브레이크포인트 (PC 0x{core.pipe.PCOutData:08X}, 사이클 {core.cycle_count})")
+        else:
+            break
+        stops += 1
+    print(f"정지 사유: {core.halt_reason} ({core.cycle_count} 사이클, 정지 {stops}회)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())